@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+from banking_system_impl import BankingSystemImpl
+
+
+def _monotonic_ms() -> int:
+    return time.monotonic_ns() // 1_000_000
+
+
+class AsyncBankingService:
+    """
+    asyncio front-end for BankingSystemImpl that stamps every request with its own clock
+    and executes scheduled payments from a timer instead of waiting for the next caller.
+
+    Due payments are drained in slices of at most slice_size, yielding to the event loop
+    between slices, so neither the timer nor a request that finds a backlog blocks the
+    loop for longer than one slice. Delays passed to schedule_payment are in clock units
+    (milliseconds for the default clock).
+    """
+
+    def __init__(self, system: BankingSystemImpl | None = None, clock=_monotonic_ms,
+                 tick: float = 0.01, slice_size: int = 256):
+        self.system = system if system is not None else BankingSystemImpl()
+        self.clock = clock
+        self.tick = tick
+        self.slice_size = max(1, int(slice_size))
+        self._last_timestamp = 0
+        self._timer_task: asyncio.Task | None = None
+
+    def now(self) -> int:
+        """Current logical timestamp; never moves backwards."""
+        self._last_timestamp = max(self._last_timestamp, int(self.clock()))
+        return self._last_timestamp
+
+    async def start(self) -> None:
+        if self._timer_task is None:
+            self._timer_task = asyncio.create_task(self._run_timer())
+
+    async def stop(self) -> None:
+        if self._timer_task is None:
+            return
+        self._timer_task.cancel()
+        try:
+            await self._timer_task
+        except asyncio.CancelledError:
+            pass
+        self._timer_task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def _run_timer(self) -> None:
+        while True:
+            await self.drain()
+            await asyncio.sleep(self.tick)
+
+    async def drain(self) -> int:
+        """Executes every payment due now, one slice per event-loop turn. Returns the timestamp used."""
+        while True:
+            timestamp = self.now()
+            if not self.system.drain_due_payments(timestamp, self.slice_size):
+                return timestamp
+            await asyncio.sleep(0)
+
+    async def _call(self, name: str, *args):
+        # drain() returns without yielding once nothing is due, so the call runs at the
+        # timestamp it drained to and no other request can slip in between.
+        timestamp = await self.drain()
+        return getattr(self.system, name)(timestamp, *args)
+
+    # --------------------------------------------------------------------------
+    # BankingSystemImpl API, stamped with the service clock
+    # --------------------------------------------------------------------------
+
+    async def create_account(self, account_id: str) -> bool:
+        return await self._call('create_account', account_id)
+
+    async def deposit(self, account_id: str, amount: int) -> int | None:
+        return await self._call('deposit', account_id, amount)
+
+    async def pay(self, account_id: str, amount: int) -> int | None:
+        return await self._call('pay', account_id, amount)
+
+    async def transfer(self, source_account_id: str, target_account_id: str, amount: int) -> int | None:
+        return await self._call('transfer', source_account_id, target_account_id, amount)
+
+    async def top_spenders(self, num_accounts: int) -> list[str]:
+        return await self._call('top_spenders', num_accounts)
+
+    async def schedule_payment(self, account_id: str, amount: int, delay: int) -> str | None:
+        return await self._call('schedule_payment', account_id, amount, delay)
+
+    async def cancel_payment(self, account_id: str, payment_id: str) -> bool:
+        return await self._call('cancel_payment', account_id, payment_id)
+
+    async def list_pending_payments(self, account_id: str) -> list[str]:
+        return await self._call('list_pending_payments', account_id)
@@ -0,0 +1,223 @@
+from array import array
+from dataclasses import dataclass
+import heapq
+
+from banking_system_impl import BankingSystemImpl
+from sorted_list import SortedList
+
+# Status codes stored in CompactBankingSystemImpl.payment_status.
+PENDING, COMPLETED, SKIPPED, CANCELED = range(4)
+
+
+@dataclass(slots=True)
+class ScheduledPayment:
+    account: int
+    amount: int
+    exec_time: int
+
+
+class CompactBankingSystemImpl(BankingSystemImpl):
+    """
+    BankingSystemImpl with struct-of-arrays storage for large account counts.
+    The public API and results are identical to BankingSystemImpl; balances and
+    spend totals must fit in a signed 64-bit integer.
+    """
+
+    # payment_status is one byte per payment and is read by callers, so it is kept.
+    _history_attributes = ()
+
+    def __init__(self):
+        """
+        Initializes the banking system.
+        - account_index: Maps account_id to a dense row index.
+        - account_ids: Row index back to account_id.
+        - balances / spent: int64 columns indexed by row.
+        - scheduled_payments: PENDING payments only, mapping payment number to a ScheduledPayment.
+        - pending_by_account: Row index to an ordered set (dict) of its pending payment numbers.
+        - payment_status: One status byte per payment number (index 0 unused).
+        - payment_queue: Min-heap of (exec_time, payment number) for pending payments.
+        - spend_ranking: SortedList of the row indices of accounts with spent > 0, by (-spent, account_id).
+        """
+        self.account_index = {}
+        self.account_ids = []
+        self.balances = array('q')
+        self.spent = array('q')
+        self.scheduled_payments = {}
+        self.pending_by_account = {}
+        self.payment_status = bytearray(1)
+        self.payment_counter = 0
+        self.payment_queue = []
+        self._canceled_in_queue = 0
+        self.spend_ranking = SortedList(key=self._rank_key)
+
+    def _snapshot_state(self) -> dict:
+        state = super()._snapshot_state()
+        # The ranking's key is bound to this instance; store the order and rebind on load.
+        state['spend_ranking'] = list(self.spend_ranking)
+        return state
+
+    @classmethod
+    def _from_snapshot_state(cls, state: dict) -> "CompactBankingSystemImpl":
+        state = dict(state)
+        ranking = state.pop('spend_ranking')
+        system = super()._from_snapshot_state(state)
+        system.spend_ranking = SortedList(ranking, key=system._rank_key)
+        return system
+
+    def _process_pending_events(self, timestamp: int, limit: int | None = None):
+        queue = self.payment_queue
+        balances = self.balances
+        status = self.payment_status
+        while queue and queue[0][0] <= timestamp:
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            _, number = heapq.heappop(queue)
+            payment = self.scheduled_payments.pop(number, None)
+            if payment is None:
+                # Canceled while queued.
+                self._canceled_in_queue -= 1
+                continue
+
+            index = payment.account
+            self._unindex_pending(index, number)
+            if balances[index] >= payment.amount:
+                balances[index] -= payment.amount
+                self._record_spend_at(index, payment.amount)
+                status[number] = COMPLETED
+            else:
+                status[number] = SKIPPED
+
+    def _rank_key(self, index: int) -> tuple[int, str]:
+        return -self.spent[index], self.account_ids[index]
+
+    def _record_spend_at(self, index: int, amount: int):
+        ranking = self.spend_ranking
+        old_spent = self.spent[index]
+        if old_spent > 0:
+            ranking.remove(index)
+        self.spent[index] = old_spent + amount
+        ranking.add(index)
+
+    def _compact_payment_queue(self):
+        if self._canceled_in_queue * 2 <= len(self.payment_queue):
+            return
+        self.payment_queue = [
+            entry for entry in self.payment_queue
+            if entry[1] in self.scheduled_payments
+        ]
+        heapq.heapify(self.payment_queue)
+        self._canceled_in_queue = 0
+
+    def _payment_number(self, payment_id: str) -> int | None:
+        """Returns N for an id of the form 'paymentN' that was issued, else None."""
+        if not isinstance(payment_id, str) or not payment_id.startswith("payment"):
+            return None
+        digits = payment_id[7:]
+        if not digits.isdigit() or str(int(digits)) != digits:
+            return None
+        number = int(digits)
+        if not 0 < number <= self.payment_counter:
+            return None
+        return number
+
+    # --------------------------------------------------------------------------
+    # Level 1 Methods
+    # --------------------------------------------------------------------------
+
+    def _apply_create_account(self, timestamp: int, account_id: str) -> bool:
+        if account_id in self.account_index:
+            return False
+        self.account_index[account_id] = len(self.account_ids)
+        self.account_ids.append(account_id)
+        self.balances.append(0)
+        self.spent.append(0)
+        return True
+
+    def _apply_deposit(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        amount = int(amount)
+        index = self.account_index.get(account_id)
+        if index is None or amount < 0:
+            return None
+        self.balances[index] += amount
+        return self.balances[index]
+
+    def _apply_pay(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        amount = int(amount)
+        index = self.account_index.get(account_id)
+        if index is None or amount <= 0:
+            return None
+        if self.balances[index] < amount:
+            return None
+        self.balances[index] -= amount
+        self._record_spend_at(index, amount)
+        return self.balances[index]
+
+    def _apply_transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int | None:
+        amount = int(amount)
+        source = self.account_index.get(source_account_id)
+        target = self.account_index.get(target_account_id)
+        if (source is None or
+                target is None or
+                source == target or
+                amount <= 0 or
+                self.balances[source] < amount):
+            return None
+
+        self.balances[source] -= amount
+        self.balances[target] += amount
+        self._record_spend_at(source, amount)
+        return self.balances[source]
+
+    # --------------------------------------------------------------------------
+    # Level 2 Method
+    # --------------------------------------------------------------------------
+
+    def _apply_top_spenders(self, timestamp: int, num_accounts: int) -> list[str]:
+        num_accounts = int(num_accounts)
+        account_ids = self.account_ids
+        return [account_ids[index] for index in self.spend_ranking[:num_accounts]]
+
+    # --------------------------------------------------------------------------
+    # Level 3 Methods
+    # --------------------------------------------------------------------------
+
+    def _apply_schedule_payment(self, timestamp: int, account_id: str, amount: int, delay: int) -> str | None:
+        amount = int(amount)
+        delay = int(delay)
+        index = self.account_index.get(account_id)
+        if index is None or amount <= 0 or delay < 0:
+            return None
+
+        self.payment_counter += 1
+        number = self.payment_counter
+        exec_time = timestamp + delay
+        self.scheduled_payments[number] = ScheduledPayment(index, amount, exec_time)
+        self.payment_status.append(PENDING)
+        self.pending_by_account.setdefault(index, {})[number] = None
+        heapq.heappush(self.payment_queue, (exec_time, number))
+        return f"payment{number}"
+
+    def _apply_list_pending_payments(self, timestamp: int, account_id: str) -> list[str]:
+        index = self.account_index.get(account_id)
+        return [f"payment{number}" for number in self.pending_by_account.get(index, ())]
+
+    def _apply_cancel_payment(self, timestamp: int, account_id: str, payment_id: str) -> bool:
+        number = self._payment_number(payment_id)
+        if number is None:
+            return False
+        payment = self.scheduled_payments.get(number)
+        if payment is None:
+            return False
+        if self.account_ids[payment.account] != account_id:
+            return False
+        if payment.exec_time <= timestamp:
+            return False
+
+        del self.scheduled_payments[number]
+        self._unindex_pending(payment.account, number)
+        self.payment_status[number] = CANCELED
+        self._canceled_in_queue += 1
+        self._compact_payment_queue()
+        return True
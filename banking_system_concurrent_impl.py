@@ -0,0 +1,259 @@
+import heapq
+import itertools
+import threading
+
+from banking_system_impl import BankingSystemImpl
+from sorted_list import SortedList
+
+
+class _Shard:
+    __slots__ = ("lock", "accounts", "ranking")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.accounts = {}
+        self.ranking = SortedList()  # (-spent, account_id) of this shard's spenders
+
+    def __getstate__(self):
+        return self.accounts, self.ranking
+
+    def __setstate__(self, state):
+        self.lock = threading.Lock()
+        self.accounts, self.ranking = state
+
+
+class ConcurrentBankingSystemImpl(BankingSystemImpl):
+    """
+    Thread-safe BankingSystemImpl with accounts sharded by hash and one lock per shard.
+
+    Lock order, which every method follows to stay deadlock-free:
+    scheduler lock -> shard locks in ascending shard index.
+    Scheduled payments live in a single heap behind the scheduler lock, so they
+    execute in (exec_time, payment number) order no matter which shard they touch.
+    Each shard ranks its own spenders under its lock; top_spenders merges them.
+    Pickling drops the locks and unpickling creates new ones.
+    """
+
+    def __init__(self, num_shards: int = 16):
+        """
+        Initializes the banking system.
+        - shards: Account dicts ({'balance': int, 'spent': int}) split by hash(account_id),
+          each with the spend ranking of its accounts.
+        - scheduled_payments / pending_by_account / payment_history / payment_queue: As in BankingSystemImpl,
+          guarded by the scheduler lock.
+        - next_due: exec_time at the head of payment_queue, readable without a lock.
+        """
+        self.shards = [_Shard() for _ in range(max(1, int(num_shards)))]
+        self.scheduled_payments = {}
+        self.pending_by_account = {}
+        self.payment_history = {}
+        self.payment_counter = 0
+        self.payment_queue = []
+        self._canceled_in_queue = 0
+        self.next_due = float('inf')
+        self._scheduler_lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_scheduler_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._scheduler_lock = threading.Lock()
+
+    def _shard_index(self, account_id: str) -> int:
+        return hash(account_id) % len(self.shards)
+
+    def _shard(self, account_id: str) -> _Shard:
+        return self.shards[self._shard_index(account_id)]
+
+    def _account_exists(self, account_id: str) -> bool:
+        shard = self._shard(account_id)
+        with shard.lock:
+            return account_id in shard.accounts
+
+    def _process_pending_events(self, timestamp: int, limit: int | None = None):
+        # Unlocked fast path: next_due only moves under the scheduler lock. A read that
+        # races with a schedule_payment of an earlier payment can miss it, so payments
+        # that became due concurrently with this call may wait for the next call;
+        # anything scheduled before this call started is seen.
+        if timestamp < self.next_due:
+            return
+        with self._scheduler_lock:
+            queue = self.payment_queue
+            while queue and queue[0][0] <= timestamp:
+                if limit is not None:
+                    if limit <= 0:
+                        break
+                    limit -= 1
+                _, _, payment_id = heapq.heappop(queue)
+                details = self.scheduled_payments.pop(payment_id, None)
+                if details is None:
+                    # Canceled while queued.
+                    self._canceled_in_queue -= 1
+                    continue
+
+                account_id = details['account_id']
+                amount = details['amount']
+                self._unindex_pending(account_id, payment_id)
+                shard = self._shard(account_id)
+                with shard.lock:
+                    account = shard.accounts.get(account_id)
+                    if account and account['balance'] >= amount:
+                        account['balance'] -= amount
+                        self._record_spend(account_id, account, amount)
+                        details['status'] = 'COMPLETED'
+                    else:
+                        details['status'] = 'SKIPPED'
+                self.payment_history[payment_id] = details
+            self._update_next_due()
+
+    def drain_due_payments(self, timestamp: int, limit: int | None = None) -> bool:
+        self._process_pending_events(timestamp, limit)
+        return self.next_due <= timestamp
+
+    def _update_next_due(self):
+        """Must hold the scheduler lock."""
+        self.next_due = self.payment_queue[0][0] if self.payment_queue else float('inf')
+
+    def _spend_ranking_of(self, account_id: str) -> SortedList:
+        """Must hold the account's shard lock."""
+        return self._shard(account_id).ranking
+
+    def _compact_payment_queue(self):
+        super()._compact_payment_queue()
+        self._update_next_due()
+
+    # --------------------------------------------------------------------------
+    # Level 1 Methods
+    # --------------------------------------------------------------------------
+
+    def _apply_create_account(self, timestamp: int, account_id: str) -> bool:
+        shard = self._shard(account_id)
+        with shard.lock:
+            if account_id in shard.accounts:
+                return False
+            shard.accounts[account_id] = {'balance': 0, 'spent': 0}
+            return True
+
+    def _apply_deposit(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        amount = int(amount)
+        shard = self._shard(account_id)
+        with shard.lock:
+            account = shard.accounts.get(account_id)
+            if account is None or amount < 0:
+                return None
+            account['balance'] += amount
+            return account['balance']
+
+    def _apply_pay(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        amount = int(amount)
+        shard = self._shard(account_id)
+        with shard.lock:
+            account = shard.accounts.get(account_id)
+            if account is None or amount <= 0:
+                return None
+            if account['balance'] < amount:
+                return None
+            account['balance'] -= amount
+            self._record_spend(account_id, account, amount)
+            return account['balance']
+
+    def _apply_transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int | None:
+        amount = int(amount)
+        if source_account_id == target_account_id or amount <= 0:
+            return None
+
+        source_index = self._shard_index(source_account_id)
+        target_index = self._shard_index(target_account_id)
+        locks = [self.shards[i].lock for i in sorted({source_index, target_index})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            source = self.shards[source_index].accounts.get(source_account_id)
+            target = self.shards[target_index].accounts.get(target_account_id)
+            if source is None or target is None or source['balance'] < amount:
+                return None
+
+            source['balance'] -= amount
+            target['balance'] += amount
+            self._record_spend(source_account_id, source, amount)
+            return source['balance']
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    # --------------------------------------------------------------------------
+    # Level 2 Method
+    # --------------------------------------------------------------------------
+
+    def _apply_top_spenders(self, timestamp: int, num_accounts: int) -> list[str]:
+        num_accounts = int(num_accounts)
+        # All shard locks, in ascending order, so the merge sees one point in time.
+        for shard in self.shards:
+            shard.lock.acquire()
+        try:
+            if num_accounts < 0:
+                # Matches slicing the full ranking with a negative stop.
+                num_accounts = max(0, sum(len(shard.ranking) for shard in self.shards) + num_accounts)
+            merged = heapq.merge(*(shard.ranking for shard in self.shards))
+            return [acc_id for _, acc_id in itertools.islice(merged, num_accounts)]
+        finally:
+            for shard in reversed(self.shards):
+                shard.lock.release()
+
+    # --------------------------------------------------------------------------
+    # Level 3 Methods
+    # --------------------------------------------------------------------------
+
+    def _apply_schedule_payment(self, timestamp: int, account_id: str, amount: int, delay: int) -> str | None:
+        amount = int(amount)
+        delay = int(delay)
+        # Accounts are never removed, so the check stays valid after the shard lock
+        # is released; the scheduler lock cannot be taken while holding a shard lock.
+        if amount <= 0 or delay < 0 or not self._account_exists(account_id):
+            return None
+
+        with self._scheduler_lock:
+            self.payment_counter += 1
+            payment_id = f"payment{self.payment_counter}"
+            exec_time = timestamp + delay
+            self.scheduled_payments[payment_id] = {
+                'account_id': account_id,
+                'amount': amount,
+                'exec_time': exec_time,
+                'status': 'PENDING'
+            }
+            self.pending_by_account.setdefault(account_id, {})[payment_id] = None
+            heapq.heappush(self.payment_queue, (exec_time, self.payment_counter, payment_id))
+            self._update_next_due()
+            return payment_id
+
+    def _apply_cancel_payment(self, timestamp: int, account_id: str, payment_id: str) -> bool:
+        with self._scheduler_lock:
+            return super()._apply_cancel_payment(timestamp, account_id, payment_id)
+
+    def _apply_list_pending_payments(self, timestamp: int, account_id: str) -> list[str]:
+        with self._scheduler_lock:
+            return super()._apply_list_pending_payments(timestamp, account_id)
+
+    # --------------------------------------------------------------------------
+    # Batch API
+    # --------------------------------------------------------------------------
+
+    def apply_batch(self, ops) -> list:
+        """
+        Same contract as BankingSystemImpl.apply_batch. Ops from concurrent batches may
+        interleave; each op is individually atomic.
+        """
+        dispatch = {name: getattr(self, f"_apply_{name}") for name in self._BATCH_OPS}
+        process = self._process_pending_events
+        results = []
+        for op in ops:
+            apply_op = dispatch.get(op[0])
+            if apply_op is None:
+                raise ValueError(f"Unknown batch operation: {op[0]!r}")
+            process(op[1])
+            results.append(apply_op(*op[1:]))
+        return results
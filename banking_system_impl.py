@@ -1,44 +1,144 @@
+import bisect
+import heapq
+
+from sorted_list import SortedList
+
+
 class BankingSystemImpl:
     """
     A simplified banking system that supports account creation, deposits, transfers,
     and scheduled payments.
     """
 
-    def __init__(self):
+    # Per-account balance history; None unless enabled in the constructor.
+    ledger = None
+    # Finished-payment records that no operation reads back; snapshots leave them out.
+    _history_attributes = ('payment_history',)
+
+    def __init__(self, keep_ledger: bool = False, ledger_retention: int | None = None):
         """
         Initializes the banking system.
         - accounts: Stores account data, mapping account_id to {'balance': int, 'spent': int}.
-        - scheduled_payments: Stores scheduled payment data, mapping payment_id to its details.
+        - scheduled_payments: Stores PENDING payments only, mapping payment_id to its details.
+        - pending_by_account: Maps account_id to its PENDING payment ids, in creation order
+          (a dict used as an ordered set). Accounts without pending payments have no entry.
+        - payment_history: Stores COMPLETED, SKIPPED and CANCELED payments, mapping payment_id to its details.
         - payment_counter: A counter to generate unique payment IDs.
+        - payment_queue: Min-heap of (exec_time, sequence, payment_id) for pending payments.
+          Canceled payments are removed lazily when they reach the top of the heap.
+        - spend_ranking: SortedList of (-spent, account_id) for every account with spent > 0,
+          kept up to date on each spend so top_spenders is a slice.
+        - ledger: When keep_ledger is set, maps account_id to ([timestamps], [balances]),
+          the balance after every change in time order, for get_balance lookups.
+          ledger_retention caps the number of changes kept per account.
         """
         self.accounts = {}
         self.scheduled_payments = {}
+        self.pending_by_account = {}
+        self.payment_history = {}
         self.payment_counter = 0
+        self.payment_queue = []
+        self._canceled_in_queue = 0
+        self.spend_ranking = SortedList()
+        if keep_ledger:
+            if ledger_retention is not None and ledger_retention < 1:
+                raise ValueError("ledger_retention must be at least 1")
+            self.ledger = {}
+            self.ledger_retention = ledger_retention
 
-    def _process_pending_events(self, timestamp: int):
+    def _process_pending_events(self, timestamp: int, limit: int | None = None):
         """
-        Processes all scheduled payments that should have occurred by the given timestamp.
+        Processes all scheduled payments that should have occurred by the given timestamp,
+        or only the first `limit` queue entries when a limit is given.
+        Only due entries are popped, so the cost does not depend on payment history.
         """
-        pending_due_payments = [
-            (payment_id, details)
-            for payment_id, details in self.scheduled_payments.items()
-            if details['status'] == 'PENDING' and details['exec_time'] <= timestamp
-        ]
-
-        # Sort payments first by execution time, then by creation order (payment id number).
-        pending_due_payments.sort(key=lambda p: (p[1]['exec_time'], int(p[0][7:])))
+        queue = self.payment_queue
+        # Heap order is execution time, then creation order (payment id number).
+        while queue and queue[0][0] <= timestamp:
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            _, _, payment_id = heapq.heappop(queue)
+            details = self.scheduled_payments.pop(payment_id, None)
+            if details is None:
+                # Canceled while queued.
+                self._canceled_in_queue -= 1
+                continue
 
-        for payment_id, details in pending_due_payments:
             account_id = details['account_id']
             amount = details['amount']
             account = self.accounts.get(account_id)
+            self._unindex_pending(account_id, payment_id)
 
             if account and account['balance'] >= amount:
                 account['balance'] -= amount
-                account['spent'] += amount
+                self._record_spend(account_id, account, amount)
+                if self.ledger is not None:
+                    self._record_balance(details['exec_time'], account_id, account['balance'])
                 details['status'] = 'COMPLETED'
             else:
                 details['status'] = 'SKIPPED'
+            self.payment_history[payment_id] = details
+
+    def _record_spend(self, account_id: str, account: dict, amount: int):
+        """
+        Adds amount to the account's spent total and moves it within its ranking.
+        """
+        ranking = self._spend_ranking_of(account_id)
+        old_spent = account['spent']
+        if old_spent > 0:
+            ranking.remove((-old_spent, account_id))
+        account['spent'] = old_spent + amount
+        ranking.add((-account['spent'], account_id))
+
+    def _spend_ranking_of(self, account_id: str) -> SortedList:
+        """The ranking that holds account_id; subclasses may split the ranking."""
+        return self.spend_ranking
+
+    def _unindex_pending(self, account_id, payment_id):
+        """Removes a payment that is no longer PENDING from pending_by_account."""
+        pending = self.pending_by_account[account_id]
+        del pending[payment_id]
+        if not pending:
+            del self.pending_by_account[account_id]
+
+    def _record_balance(self, timestamp: int, account_id: str, balance: int):
+        """
+        Appends the account's new balance to its ledger. Once the ledger holds twice
+        ledger_retention entries it is trimmed back to the newest ledger_retention,
+        so trimming is amortized O(1) per change.
+        """
+        times, balances = self.ledger.setdefault(account_id, ([], []))
+        times.append(timestamp)
+        balances.append(balance)
+        retention = self.ledger_retention
+        if retention is not None and len(times) >= 2 * retention:
+            del times[:-retention]
+            del balances[:-retention]
+
+    def _compact_payment_queue(self):
+        """
+        Drops canceled entries from the heap once they make up more than half of it,
+        so far-future cancellations cannot grow the queue without bound.
+        """
+        if self._canceled_in_queue * 2 <= len(self.payment_queue):
+            return
+        self.payment_queue = [
+            entry for entry in self.payment_queue
+            if entry[2] in self.scheduled_payments
+        ]
+        heapq.heapify(self.payment_queue)
+        self._canceled_in_queue = 0
+
+    def drain_due_payments(self, timestamp: int, limit: int | None = None) -> bool:
+        """
+        Executes up to `limit` scheduled payments due by timestamp, in the same order the
+        next call at timestamp would. Returns True if due payments remain.
+        """
+        self._process_pending_events(timestamp, limit)
+        queue = self.payment_queue
+        return bool(queue) and queue[0][0] <= timestamp
 
     # --------------------------------------------------------------------------
     # Level 1 Methods
@@ -46,49 +146,74 @@ class BankingSystemImpl:
 
     def create_account(self, timestamp: int, account_id: str) -> bool:
         self._process_pending_events(timestamp)
+        return self._apply_create_account(timestamp, account_id)
+
+    def deposit(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        self._process_pending_events(timestamp)
+        return self._apply_deposit(timestamp, account_id, amount)
+
+    def pay(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        self._process_pending_events(timestamp)
+        return self._apply_pay(timestamp, account_id, amount)
+
+    def transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int | None:
+        self._process_pending_events(timestamp)
+        return self._apply_transfer(timestamp, source_account_id, target_account_id, amount)
+
+    def _apply_create_account(self, timestamp: int, account_id: str) -> bool:
         if account_id in self.accounts:
             return False
         self.accounts[account_id] = {'balance': 0, 'spent': 0}
+        if self.ledger is not None:
+            self._record_balance(timestamp, account_id, 0)
         return True
 
-    def deposit(self, timestamp: int, account_id: str, amount: int) -> int | None:
-        self._process_pending_events(timestamp)
+    def _apply_deposit(self, timestamp: int, account_id: str, amount: int) -> int | None:
         amount = int(amount)
-        if account_id not in self.accounts or amount < 0:
+        account = self.accounts.get(account_id)
+        if account is None or amount < 0:
             return None
-        self.accounts[account_id]['balance'] += amount
-        return self.accounts[account_id]['balance']
+        account['balance'] += amount
+        if self.ledger is not None and amount:
+            self._record_balance(timestamp, account_id, account['balance'])
+        return account['balance']
 
-    def pay(self, timestamp: int, account_id: str, amount: int) -> int | None:
-        self._process_pending_events(timestamp)
+    def _apply_pay(self, timestamp: int, account_id: str, amount: int) -> int | None:
         amount = int(amount)
-        if account_id not in self.accounts or amount <= 0:
+        account = self.accounts.get(account_id)
+        if account is None or amount <= 0:
             return None
-        if self.accounts[account_id]['balance'] < amount:
+        if account['balance'] < amount:
             return None
-        self.accounts[account_id]['balance'] -= amount
-        self.accounts[account_id]['spent'] += amount
-        return self.accounts[account_id]['balance']
+        account['balance'] -= amount
+        self._record_spend(account_id, account, amount)
+        if self.ledger is not None:
+            self._record_balance(timestamp, account_id, account['balance'])
+        return account['balance']
 
-    def transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int | None:
-        self._process_pending_events(timestamp)
+    def _apply_transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int | None:
         amount = int(amount)
+        source = self.accounts.get(source_account_id)
+        target = self.accounts.get(target_account_id)
         # Validate transfer conditions
-        if (source_account_id not in self.accounts or
-                target_account_id not in self.accounts or
+        if (source is None or
+                target is None or
                 source_account_id == target_account_id or
                 amount <= 0 or
-                self.accounts[source_account_id]['balance'] < amount):
+                source['balance'] < amount):
             return None
 
         # Perform the transfer
-        self.accounts[source_account_id]['balance'] -= amount
-        self.accounts[target_account_id]['balance'] += amount
-        
+        source['balance'] -= amount
+        target['balance'] += amount
+
         # Update the total amount spent for the source account (for Level 2)
-        self.accounts[source_account_id]['spent'] += amount
-        
-        return self.accounts[source_account_id]['balance']
+        self._record_spend(source_account_id, source, amount)
+
+        if self.ledger is not None:
+            self._record_balance(timestamp, source_account_id, source['balance'])
+            self._record_balance(timestamp, target_account_id, target['balance'])
+        return source['balance']
 
     # --------------------------------------------------------------------------
     # Level 2 Method
@@ -96,15 +221,11 @@ class BankingSystemImpl:
 
     def top_spenders(self, timestamp: int, num_accounts: int) -> list[str]:
         self._process_pending_events(timestamp)
-        num_accounts = int(num_accounts)
+        return self._apply_top_spenders(timestamp, num_accounts)
 
-        spenders = [
-            (acc_id, data['spent'])
-            for acc_id, data in self.accounts.items()
-            if data['spent'] > 0
-        ]
-        spenders.sort(key=lambda item: (-item[1], item[0]))
-        return [acc_id for acc_id, _ in spenders[:num_accounts]]
+    def _apply_top_spenders(self, timestamp: int, num_accounts: int) -> list[str]:
+        num_accounts = int(num_accounts)
+        return [acc_id for _, acc_id in self.spend_ranking[:num_accounts]]
 
     # --------------------------------------------------------------------------
     # Level 3 Methods
@@ -112,35 +233,145 @@ class BankingSystemImpl:
 
     def schedule_payment(self, timestamp: int, account_id: str, amount: int, delay: int) -> str | None:
         self._process_pending_events(timestamp)
+        return self._apply_schedule_payment(timestamp, account_id, amount, delay)
+
+    def cancel_payment(self, timestamp: int, account_id: str, payment_id: str) -> bool:
+        # Payments due at the timestamp are processed before cancellations.
+        self._process_pending_events(timestamp)
+        return self._apply_cancel_payment(timestamp, account_id, payment_id)
+
+    def _apply_schedule_payment(self, timestamp: int, account_id: str, amount: int, delay: int) -> str | None:
         amount = int(amount)
         delay = int(delay)
         if account_id not in self.accounts or amount <= 0 or delay < 0:
             return None
-            
+
         self.payment_counter += 1
         payment_id = f"payment{self.payment_counter}"
-        
+
+        exec_time = timestamp + delay
         self.scheduled_payments[payment_id] = {
             'account_id': account_id,
             'amount': amount,
-            'exec_time': timestamp + delay,
+            'exec_time': exec_time,
             'status': 'PENDING'
         }
+        self.pending_by_account.setdefault(account_id, {})[payment_id] = None
+        heapq.heappush(self.payment_queue, (exec_time, self.payment_counter, payment_id))
         return payment_id
 
-    def cancel_payment(self, timestamp: int, account_id: str, payment_id: str) -> bool:
-        # Payments due at the timestamp are processed before cancellations.
-        self._process_pending_events(timestamp)
-
+    def _apply_cancel_payment(self, timestamp: int, account_id: str, payment_id: str) -> bool:
+        # Only PENDING payments live in scheduled_payments.
         payment = self.scheduled_payments.get(payment_id)
         if payment is None:
             return False
         if payment['account_id'] != account_id:
             return False
-        if payment['status'] != 'PENDING':
-            return False
         if payment['exec_time'] <= timestamp:
             return False
 
         payment['status'] = 'CANCELED'
+        del self.scheduled_payments[payment_id]
+        self._unindex_pending(account_id, payment_id)
+        self.payment_history[payment_id] = payment
+        self._canceled_in_queue += 1
+        self._compact_payment_queue()
         return True
+
+    def list_pending_payments(self, timestamp: int, account_id: str) -> list[str]:
+        """
+        Returns the ids of account_id's payments still PENDING after processing at
+        timestamp, in creation order. Reads the per-account index, not every payment.
+        """
+        self._process_pending_events(timestamp)
+        return self._apply_list_pending_payments(timestamp, account_id)
+
+    def _apply_list_pending_payments(self, timestamp: int, account_id: str) -> list[str]:
+        return list(self.pending_by_account.get(account_id, ()))
+
+    # --------------------------------------------------------------------------
+    # Balance History
+    # --------------------------------------------------------------------------
+
+    def get_balance(self, timestamp: int, account_id: str, time_at: int) -> int | None:
+        """
+        Returns the balance of account_id at time_at, after all changes made at time_at.
+        Returns None if the account did not exist at time_at, if time_at is older than
+        the retained ledger, or if the ledger is not enabled.
+        """
+        self._process_pending_events(timestamp)
+        if self.ledger is None:
+            return None
+        entry = self.ledger.get(account_id)
+        if entry is None:
+            return None
+        times, balances = entry
+        index = bisect.bisect_right(times, int(time_at)) - 1
+        if index < 0:
+            return None
+        return balances[index]
+
+    # --------------------------------------------------------------------------
+    # Snapshot state
+    # --------------------------------------------------------------------------
+
+    def _snapshot_state(self) -> dict:
+        """
+        The state DurableBankingSystem snapshots: accounts, spend ranking, payment
+        counter, pending payments and the ledger (bounded by ledger_retention), but
+        not _history_attributes, so a snapshot does not grow with payment history.
+        """
+        state = dict(self.__getstate__())
+        for name in self._history_attributes:
+            state.pop(name, None)
+        return state
+
+    @classmethod
+    def _from_snapshot_state(cls, state: dict) -> "BankingSystemImpl":
+        system = cls.__new__(cls)
+        for name in cls._history_attributes:
+            setattr(system, name, {})
+        setstate = getattr(system, '__setstate__', None)
+        if setstate is not None:
+            setstate(state)
+        else:
+            system.__dict__.update(state)
+        return system
+
+    # --------------------------------------------------------------------------
+    # Batch API
+    # --------------------------------------------------------------------------
+
+    _BATCH_OPS = (
+        'create_account',
+        'deposit',
+        'pay',
+        'transfer',
+        'top_spenders',
+        'schedule_payment',
+        'cancel_payment',
+        'list_pending_payments',
+    )
+
+    def apply_batch(self, ops) -> list:
+        """
+        Applies a timestamp-ordered sequence of operations and returns their results.
+        Each op is a tuple (method_name, timestamp, *args) using the same arguments as
+        the corresponding public method, e.g. ('transfer', 7, 'a', 'b', 100).
+        Scheduled payments are only processed when one is due, which gives exactly the
+        same results as calling the methods one by one.
+        """
+        dispatch = {name: getattr(self, f"_apply_{name}") for name in self._BATCH_OPS}
+        process = self._process_pending_events
+        results = []
+        append = results.append
+        for op in ops:
+            apply_op = dispatch.get(op[0])
+            if apply_op is None:
+                raise ValueError(f"Unknown batch operation: {op[0]!r}")
+            timestamp = op[1]
+            queue = self.payment_queue
+            if queue and queue[0][0] <= timestamp:
+                process(timestamp)
+            append(apply_op(*op[1:]))
+        return results
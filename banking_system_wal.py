@@ -0,0 +1,268 @@
+import os
+import pickle
+import struct
+import zlib
+
+from banking_system_impl import BankingSystemImpl
+
+# Operation codes and argument layouts of WAL records: 's' = utf-8 string,
+# 'n' = utf-8 string or None, 'i' = int64.
+_OPS = (
+    ('create_account', 's'),
+    ('deposit', 'si'),
+    ('pay', 'si'),
+    ('transfer', 'ssi'),
+    ('top_spenders', 'i'),
+    ('schedule_payment', 'sii'),
+    ('cancel_payment', 'sn'),
+    ('list_pending_payments', 's'),
+)
+_OP_CODES = {name: (code, layout) for code, (name, layout) in enumerate(_OPS)}
+
+_WAL_MAGIC = b"BWAL1\0\0\0"
+_WAL_HEADER = struct.Struct("<8sQ")      # magic, LSN of the first record in the file
+_RECORD_HEADER = struct.Struct("<II")    # payload length, crc32 of payload
+_OP_HEADER = struct.Struct("<Bq")        # op code, timestamp
+_INT = struct.Struct("<q")
+_STR_LEN = struct.Struct("<I")
+_NONE_LEN = 0xFFFFFFFF  # string length marking None in an 'n' argument
+
+WAL_FILE = "wal.log"
+SNAPSHOT_FILE = "snapshot.bin"
+
+
+def encode_op(op: tuple) -> bytes:
+    """Encodes (method_name, timestamp, *args) as a WAL payload, coercing ints like the API does."""
+    entry = _OP_CODES.get(op[0])
+    if entry is None:
+        raise ValueError(f"Unknown operation: {op[0]!r}")
+    code, layout = entry
+    args = op[2:]
+    if len(args) != len(layout):
+        raise TypeError(f"{op[0]} takes {len(layout)} arguments after the timestamp, got {len(args)}")
+
+    parts = [_OP_HEADER.pack(code, int(op[1]))]
+    for kind, arg in zip(layout, args):
+        if kind == 'i':
+            parts.append(_INT.pack(int(arg)))
+        elif kind == 'n' and arg is None:
+            parts.append(_STR_LEN.pack(_NONE_LEN))
+        else:
+            data = arg.encode()
+            parts.append(_STR_LEN.pack(len(data)))
+            parts.append(data)
+    return b"".join(parts)
+
+
+def decode_op(payload: bytes) -> tuple:
+    code, timestamp = _OP_HEADER.unpack_from(payload, 0)
+    name, layout = _OPS[code]
+    offset = _OP_HEADER.size
+    op = [name, timestamp]
+    for kind in layout:
+        if kind == 'i':
+            op.append(_INT.unpack_from(payload, offset)[0])
+            offset += _INT.size
+        else:
+            (length,) = _STR_LEN.unpack_from(payload, offset)
+            offset += _STR_LEN.size
+            if kind == 'n' and length == _NONE_LEN:
+                op.append(None)
+                continue
+            op.append(payload[offset:offset + length].decode())
+            offset += length
+    return tuple(op)
+
+
+def read_wal(path: str) -> tuple[int, list[tuple], int]:
+    """
+    Reads a WAL file and returns (first LSN, ops, byte offset of the last valid record end).
+    Reading stops at the first truncated or corrupt record, which is a torn tail write.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _WAL_HEADER.size:
+        raise ValueError(f"{path} is missing its WAL header")
+    magic, base_lsn = _WAL_HEADER.unpack_from(data, 0)
+    if magic != _WAL_MAGIC:
+        raise ValueError(f"{path} is not a banking WAL file")
+
+    ops = []
+    offset = _WAL_HEADER.size
+    while offset + _RECORD_HEADER.size <= len(data):
+        length, crc = _RECORD_HEADER.unpack_from(data, offset)
+        start = offset + _RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            break
+        ops.append(decode_op(payload))
+        offset = start + length
+    return base_lsn, ops, offset
+
+
+def _fsync_directory(directory: str) -> None:
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DurableBankingSystem:
+    """
+    Persistent front-end for BankingSystemImpl (or a subclass such as the compact backend).
+    Every call is appended to a binary write-ahead log; fsync is batched so one fsync
+    covers up to group_commit records. Every snapshot_every records the live state
+    (see BankingSystemImpl._snapshot_state; finished-payment history is left out) is
+    written to a snapshot and the WAL restarts empty, so recovery loads the snapshot and
+    replays only the WAL tail.
+    Calls are acknowledged before their fsync; use sync() when a result must be durable.
+    """
+
+    def __init__(self, directory: str, system_factory=BankingSystemImpl,
+                 group_commit: int = 64, snapshot_every: int = 100_000):
+        self.directory = directory
+        self.group_commit = max(1, int(group_commit))
+        self.snapshot_every = int(snapshot_every)
+        self.wal_path = os.path.join(directory, WAL_FILE)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        self.system, self.lsn = self._recover(system_factory)
+        self._unsynced = 0
+        self._since_snapshot = 0
+        self._wal = open(self.wal_path, "ab")
+
+    # --------------------------------------------------------------------------
+    # Recovery and persistence
+    # --------------------------------------------------------------------------
+
+    def _recover(self, system_factory):
+        """Loads the latest snapshot and replays WAL records newer than it."""
+        system, lsn = system_factory(), 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as f:
+                lsn, system_class, state = pickle.load(f)
+            system = system_class._from_snapshot_state(state)
+
+        if not os.path.exists(self.wal_path):
+            self._write_empty_wal(lsn)
+            return system, lsn
+
+        base_lsn, ops, valid_end = read_wal(self.wal_path)
+        if base_lsn > lsn:
+            raise ValueError(f"WAL starts at LSN {base_lsn} but the snapshot ends at LSN {lsn}")
+        # Records before the snapshot LSN are left over from a crash between
+        # writing the snapshot and rotating the WAL.
+        tail = ops[lsn - base_lsn:]
+        system.apply_batch(tail)
+        lsn += len(tail)
+
+        if valid_end != os.path.getsize(self.wal_path):
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(valid_end)
+                os.fsync(f.fileno())
+        return system, lsn
+
+    def _write_empty_wal(self, base_lsn: int) -> None:
+        tmp_path = self.wal_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_WAL_HEADER.pack(_WAL_MAGIC, base_lsn))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.wal_path)
+        _fsync_directory(self.directory)
+
+    def _append(self, payloads: list[bytes]) -> None:
+        write = self._wal.write
+        for payload in payloads:
+            write(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+            write(payload)
+        self.lsn += len(payloads)
+        self._unsynced += len(payloads)
+        self._since_snapshot += len(payloads)
+
+        if self.snapshot_every > 0 and self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+        elif self._unsynced >= self.group_commit:
+            self.sync()
+
+    def sync(self) -> None:
+        """Flushes and fsyncs every record appended so far."""
+        self._wal.flush()
+        os.fsync(self._wal.fileno())
+        self._unsynced = 0
+
+    def snapshot(self) -> None:
+        """Writes the current state as the new snapshot and starts an empty WAL after it."""
+        self.sync()
+        tmp_path = self.snapshot_path + ".tmp"
+        state = (self.lsn, type(self.system), self.system._snapshot_state())
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_directory(self.directory)
+
+        self._wal.close()
+        self._write_empty_wal(self.lsn)
+        self._wal = open(self.wal_path, "ab")
+        self._since_snapshot = 0
+
+    def close(self) -> None:
+        if self._wal.closed:
+            return
+        self.sync()
+        self._wal.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _call(self, op: tuple):
+        # Encoding first surfaces bad arguments before the state changes.
+        payload = encode_op(op)
+        result = getattr(self.system, op[0])(*op[1:])
+        self._append([payload])
+        return result
+
+    # --------------------------------------------------------------------------
+    # BankingSystemImpl API
+    # --------------------------------------------------------------------------
+
+    def create_account(self, timestamp: int, account_id: str) -> bool:
+        return self._call(('create_account', timestamp, account_id))
+
+    def deposit(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        return self._call(('deposit', timestamp, account_id, amount))
+
+    def pay(self, timestamp: int, account_id: str, amount: int) -> int | None:
+        return self._call(('pay', timestamp, account_id, amount))
+
+    def transfer(self, timestamp: int, source_account_id: str, target_account_id: str, amount: int) -> int | None:
+        return self._call(('transfer', timestamp, source_account_id, target_account_id, amount))
+
+    def top_spenders(self, timestamp: int, num_accounts: int) -> list[str]:
+        # Logged because it advances scheduled-payment processing to timestamp.
+        return self._call(('top_spenders', timestamp, num_accounts))
+
+    def schedule_payment(self, timestamp: int, account_id: str, amount: int, delay: int) -> str | None:
+        return self._call(('schedule_payment', timestamp, account_id, amount, delay))
+
+    def cancel_payment(self, timestamp: int, account_id: str, payment_id: str) -> bool:
+        return self._call(('cancel_payment', timestamp, account_id, payment_id))
+
+    def list_pending_payments(self, timestamp: int, account_id: str) -> list[str]:
+        return self._call(('list_pending_payments', timestamp, account_id))
+
+    def apply_batch(self, ops) -> list:
+        ops = list(ops)
+        payloads = [encode_op(op) for op in ops]
+        results = self.system.apply_batch(ops)
+        self._append(payloads)
+        return results
@@ -0,0 +1,103 @@
+"""
+Measures BankingSystemImpl throughput by thread count, comparing one global lock
+against ConcurrentBankingSystemImpl. Scaling needs a free-threaded CPython build.
+
+    python benchmarks/banking_system_concurrency_bench.py --threads 1 2 4 8
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banking_system_concurrent_impl import ConcurrentBankingSystemImpl
+from banking_system_impl import BankingSystemImpl
+
+
+class GlobalLockBankingSystem:
+    """The current deployment: one BankingSystemImpl behind one lock."""
+
+    def __init__(self):
+        self._system = BankingSystemImpl()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self._system, name)
+
+        def locked(*args):
+            with self._lock:
+                return method(*args)
+
+        return locked
+
+
+def _make_ops(seed: int, count: int, num_accounts: int) -> list[tuple]:
+    rng = random.Random(seed)
+    ops = []
+    for _ in range(count):
+        roll = rng.random()
+        account_id = f"acc{rng.randrange(num_accounts)}"
+        if roll < 0.4:
+            ops.append(("deposit", 3, account_id, rng.randint(1, 100)))
+        elif roll < 0.7:
+            ops.append(("pay", 3, account_id, rng.randint(1, 50)))
+        elif roll < 0.95:
+            ops.append(("transfer", 3, account_id, f"acc{rng.randrange(num_accounts)}", rng.randint(1, 50)))
+        else:
+            ops.append(("top_spenders", 3, 10))
+    return ops
+
+
+def run(factory, num_threads: int, ops_per_thread: int, num_accounts: int) -> float:
+    system = factory()
+    for i in range(num_accounts):
+        system.create_account(1, f"acc{i}")
+        system.deposit(2, f"acc{i}", 10**6)
+
+    workloads = [_make_ops(seed, ops_per_thread, num_accounts) for seed in range(num_threads)]
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker(ops):
+        calls = [(getattr(system, op[0]), op[1:]) for op in ops]
+        barrier.wait()
+        for method, args in calls:
+            method(*args)
+
+    threads = [threading.Thread(target=worker, args=(ops,)) for ops in workloads]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return num_threads * ops_per_thread / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops-per-thread", type=int, default=50_000)
+    parser.add_argument("--accounts", type=int, default=10_000)
+    parser.add_argument("--shards", type=int, default=64)
+    args = parser.parse_args()
+
+    gil_check = getattr(sys, "_is_gil_enabled", None)
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_check is None or gil_check() else 'disabled'}")
+    factories = {
+        "global lock": GlobalLockBankingSystem,
+        f"sharded x{args.shards}": lambda: ConcurrentBankingSystemImpl(num_shards=args.shards),
+    }
+    for name, factory in factories.items():
+        base_rate = None
+        for num_threads in args.threads:
+            rate = run(factory, num_threads, args.ops_per_thread, args.accounts)
+            base_rate = base_rate or rate
+            print(f"{name:12s} threads={num_threads:<3d} {rate:12,.0f} ops/s  {rate / base_rate:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
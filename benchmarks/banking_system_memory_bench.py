@@ -0,0 +1,63 @@
+"""
+Measures heap bytes per account for BankingSystemImpl and CompactBankingSystemImpl.
+
+    python benchmarks/banking_system_memory_bench.py --accounts 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banking_system_compact_impl import CompactBankingSystemImpl
+from banking_system_impl import BankingSystemImpl
+
+
+def _populate(system, num_accounts: int, pending_every: int) -> None:
+    """Creates accounts, funds them, spends on half and leaves some payments pending."""
+    ops = []
+    for i in range(num_accounts):
+        account_id = f"acc{i}"
+        ops.append(("create_account", 1, account_id))
+        ops.append(("deposit", 2, account_id, 1000 + i % 97))
+        if i % 2 == 0:
+            ops.append(("pay", 3, account_id, 1 + i % 13))
+        if pending_every and i % pending_every == 0:
+            ops.append(("schedule_payment", 4, account_id, 5, 10**9))
+    system.apply_batch(ops)
+
+
+def measure(factory, num_accounts: int, pending_every: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    system = factory()
+    _populate(system, num_accounts, pending_every)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del system
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=200_000)
+    parser.add_argument("--pending-every", type=int, default=10,
+                        help="schedule one pending payment every N accounts (0 disables)")
+    args = parser.parse_args()
+
+    results = {}
+    for factory in (BankingSystemImpl, CompactBankingSystemImpl):
+        results[factory.__name__] = measure(factory, args.accounts, args.pending_every)
+
+    baseline = results[BankingSystemImpl.__name__]
+    for name, total in results.items():
+        print(f"{name:28s} {total / 2**20:10.1f} MiB "
+              f"{total / args.accounts:8.1f} B/account "
+              f"{total / baseline:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Replays a seeded synthetic workload against a BankingSystemImpl backend.
+
+    python benchmarks/banking_system_replay_bench.py --ops 200000 --accounts 50000 --zipf 1.1
+    python benchmarks/banking_system_replay_bench.py --impl compact --mix deposit=5,pay=3,top_spenders=2
+
+Reports throughput, p50/p99/max per-op latency and peak RSS so regressions in
+_process_pending_events or top_spenders show up before deploy.
+"""
+import argparse
+import gc
+import itertools
+import os
+import random
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from banking_system_compact_impl import CompactBankingSystemImpl
+from banking_system_concurrent_impl import ConcurrentBankingSystemImpl
+from banking_system_impl import BankingSystemImpl
+
+IMPLS = {
+    "dict": BankingSystemImpl,
+    "compact": CompactBankingSystemImpl,
+    "concurrent": ConcurrentBankingSystemImpl,
+}
+
+DEFAULT_MIX = {
+    "deposit": 30,
+    "pay": 25,
+    "transfer": 25,
+    "top_spenders": 5,
+    "schedule_payment": 10,
+    "cancel_payment": 5,
+}
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Parses 'deposit=3,pay=1' into relative op weights."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown op in mix: {name!r}")
+        mix[name] = float(weight)
+    return mix
+
+
+class ZipfSampler:
+    """Draws account ids with Zipfian popularity; s=0 is uniform."""
+
+    def __init__(self, rng: random.Random, account_ids: list[str], s: float):
+        self.rng = rng
+        # Shuffle so popularity is not correlated with account id order.
+        self.ranked = list(account_ids)
+        rng.shuffle(self.ranked)
+        self.cum_weights = list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, len(self.ranked) + 1)))
+
+    def sample(self, k: int = 1) -> list[str]:
+        return self.rng.choices(self.ranked, cum_weights=self.cum_weights, k=k)
+
+
+def generate_workload(seed: int, num_ops: int, num_accounts: int, mix: dict[str, float] | None = None,
+                      zipf_s: float = 1.0, max_delay: int = 1000, top_n: int = 10,
+                      initial_balance: int = 10_000) -> list[tuple]:
+    """
+    Returns setup ops followed by num_ops apply_batch-style op tuples at timestamps 1, 2, ...
+    Scheduled-payment density is controlled by the schedule_payment weight and max_delay,
+    which sets how far ahead payments land and therefore how many are pending at once.
+    """
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    account_ids = [f"acc{i}" for i in range(num_accounts)]
+    ops = [("create_account", 0, account_id) for account_id in account_ids]
+    ops += [("deposit", 0, account_id, initial_balance) for account_id in account_ids]
+
+    sampler = ZipfSampler(rng, account_ids, zipf_s)
+    names = list(mix)
+    kinds = rng.choices(names, weights=[mix[name] for name in names], k=num_ops)
+    sources = sampler.sample(num_ops)
+    targets = sampler.sample(num_ops)
+    scheduled = 0
+    for timestamp, (kind, source, target) in enumerate(zip(kinds, sources, targets), start=1):
+        if kind == "deposit":
+            ops.append(("deposit", timestamp, source, rng.randint(1, 500)))
+        elif kind == "pay":
+            ops.append(("pay", timestamp, source, rng.randint(1, 200)))
+        elif kind == "transfer":
+            ops.append(("transfer", timestamp, source, target, rng.randint(1, 200)))
+        elif kind == "top_spenders":
+            ops.append(("top_spenders", timestamp, top_n))
+        elif kind == "schedule_payment":
+            scheduled += 1
+            ops.append(("schedule_payment", timestamp, source, rng.randint(1, 200), rng.randint(0, max_delay)))
+        else:
+            # Guessing the owner is right for popular accounts and wrong otherwise,
+            # which exercises both cancel outcomes.
+            payment_id = f"payment{rng.randint(1, scheduled)}" if scheduled else "payment1"
+            ops.append(("cancel_payment", timestamp, source, payment_id))
+    return ops
+
+
+def replay(system, ops: list[tuple]) -> list[int]:
+    """Runs ops through the public methods and returns per-op latencies in nanoseconds."""
+    clock = time.perf_counter_ns
+    latencies = []
+    append = latencies.append
+    for op in ops:
+        method = getattr(system, op[0])
+        args = op[1:]
+        start = clock()
+        method(*args)
+        append(clock() - start)
+    return latencies
+
+
+def percentile(sorted_values: list[int], fraction: float) -> int:
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def peak_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--impl", choices=sorted(IMPLS), default="dict")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ops", type=int, default=200_000)
+    parser.add_argument("--accounts", type=int, default=10_000)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="comma separated op=weight pairs, e.g. deposit=3,pay=1,schedule_payment=1")
+    parser.add_argument("--zipf", type=float, default=1.0, help="Zipf exponent for account popularity (0 = uniform)")
+    parser.add_argument("--max-delay", type=int, default=1000, help="largest schedule_payment delay")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--batch", action="store_true", help="replay through apply_batch and report throughput only")
+    args = parser.parse_args()
+
+    ops = generate_workload(args.seed, args.ops, args.accounts, args.mix, args.zipf, args.max_delay, args.top_n)
+    setup, workload = ops[:2 * args.accounts], ops[2 * args.accounts:]
+    system = IMPLS[args.impl]()
+    system.apply_batch(setup)
+
+    gc.collect()
+    start = time.perf_counter()
+    if args.batch:
+        system.apply_batch(workload)
+        latencies = []
+    else:
+        latencies = replay(system, workload)
+    elapsed = time.perf_counter() - start
+
+    print(f"impl={args.impl} ops={len(workload)} accounts={args.accounts} zipf={args.zipf} seed={args.seed}")
+    print(f"throughput {len(workload) / elapsed:12,.0f} ops/s")
+    if latencies:
+        latencies.sort()
+        print(f"latency    p50 {percentile(latencies, 0.50) / 1000:8.2f} us"
+              f"  p99 {percentile(latencies, 0.99) / 1000:8.2f} us"
+              f"  max {latencies[-1] / 1000:8.2f} us")
+    rss = peak_rss_mib()
+    if rss is not None:
+        print(f"peak RSS   {rss:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
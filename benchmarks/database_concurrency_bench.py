@@ -0,0 +1,109 @@
+"""
+Measures DatabaseImpl throughput by thread count, comparing one global lock
+against ConcurrentDatabaseImpl. Scaling needs a free-threaded CPython build.
+
+    python benchmarks/database_concurrency_bench.py --threads 1 2 4 8 --backup-every 1000
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_concurrent_impl import ConcurrentDatabaseImpl
+from database_impl import DatabaseImpl, keep_last
+
+
+class GlobalLockDatabase:
+    """The current deployment: one DatabaseImpl behind one lock."""
+
+    def __init__(self, **kwargs):
+        self._db = DatabaseImpl(**kwargs)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self._db, name)
+
+        def locked(*args):
+            with self._lock:
+                return method(*args)
+
+        return locked
+
+
+def _make_ops(seed: int, count: int, num_keys: int, backup_every: int) -> list[tuple]:
+    rng = random.Random(seed)
+    ops = []
+    for i in range(count):
+        key = f"key{rng.randrange(num_keys)}"
+        field = f"field{rng.randrange(64)}"
+        roll = rng.random()
+        if backup_every and seed == 0 and i % backup_every == backup_every - 1:
+            ops.append(("backup", i))
+        elif roll < 0.5:
+            ops.append(("get_at", key, field, i))
+        elif roll < 0.8:
+            ops.append(("set_at_with_ttl", key, field, "v", i, 1000))
+        elif roll < 0.9:
+            ops.append(("delete_at", key, field, i))
+        else:
+            ops.append(("scan_by_prefix_at", key, "field1", i))
+    return ops
+
+
+def run(factory, num_threads: int, ops_per_thread: int, num_keys: int, backup_every: int) -> float:
+    db = factory()
+    for i in range(num_keys):
+        db.mset_at(f"key{i}", [(f"field{j}", "v") for j in range(64)], 0)
+
+    workloads = [_make_ops(seed, ops_per_thread, num_keys, backup_every) for seed in range(num_threads)]
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker(ops):
+        calls = [(getattr(db, op[0]), op[1:]) for op in ops]
+        barrier.wait()
+        for method, args in calls:
+            method(*args)
+
+    threads = [threading.Thread(target=worker, args=(ops,)) for ops in workloads]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return num_threads * ops_per_thread / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops-per-thread", type=int, default=50_000)
+    parser.add_argument("--keys", type=int, default=1_000)
+    parser.add_argument("--stripes", type=int, default=64)
+    parser.add_argument("--backup-every", type=int, default=0,
+                        help="thread 0 takes a backup every N ops (0 disables)")
+    args = parser.parse_args()
+
+    gil_check = getattr(sys, "_is_gil_enabled", None)
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_check is None or gil_check() else 'disabled'}")
+    retention = keep_last(8)
+    factories = {
+        "global lock": lambda: GlobalLockDatabase(backup_retention=retention),
+        f"striped x{args.stripes}": lambda: ConcurrentDatabaseImpl(num_stripes=args.stripes,
+                                                                   backup_retention=retention),
+    }
+    for name, factory in factories.items():
+        base_rate = None
+        for num_threads in args.threads:
+            rate = run(factory, num_threads, args.ops_per_thread, args.keys, args.backup_every)
+            base_rate = base_rate or rate
+            print(f"{name:12s} threads={num_threads:<3d} {rate:12,.0f} ops/s  {rate / base_rate:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
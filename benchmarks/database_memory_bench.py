@@ -0,0 +1,61 @@
+"""
+Measures heap bytes per record for DatabaseImpl and CompactDatabaseImpl.
+
+    python benchmarks/database_memory_bench.py --fields 10000000 --fields-per-key 100
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database_compact_impl import CompactDatabaseImpl
+from database_impl import DatabaseImpl
+
+
+def _populate(db, num_fields: int, fields_per_key: int, ttl_every: int) -> None:
+    """Writes num_fields records in sorted field order, giving every ttl_every-th one a TTL."""
+    for i in range(num_fields):
+        key = f"key{i // fields_per_key}"
+        field = f"field{i % fields_per_key:08d}"
+        if ttl_every and i % ttl_every == 0:
+            db.set_at_with_ttl(key, field, "v", i, 10**9)
+        else:
+            db.set_at(key, field, "v", i)
+
+
+def measure(factory, num_fields: int, fields_per_key: int, ttl_every: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    db = factory()
+    _populate(db, num_fields, fields_per_key, ttl_every)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del db
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fields", type=int, default=1_000_000)
+    parser.add_argument("--fields-per-key", type=int, default=100)
+    parser.add_argument("--ttl-every", type=int, default=2,
+                        help="give one record in N a finite TTL (0 disables)")
+    args = parser.parse_args()
+
+    results = {}
+    for factory in (DatabaseImpl, CompactDatabaseImpl):
+        results[factory.__name__] = measure(factory, args.fields, args.fields_per_key, args.ttl_every)
+
+    baseline = results[DatabaseImpl.__name__]
+    for name, total in results.items():
+        print(f"{name:24s} {total / 2**20:10.1f} MiB "
+              f"{total / args.fields:8.1f} B/record "
+              f"{total / baseline:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
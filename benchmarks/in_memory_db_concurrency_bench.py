@@ -0,0 +1,94 @@
+"""
+Measures InMemoryDBImpl throughput by thread count, comparing one global mutex
+against ShardedInMemoryDBImpl. Scaling needs a free-threaded CPython build.
+
+    python benchmarks/in_memory_db_concurrency_bench.py --threads 1 2 4 8 --shards 64
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from in_memory_db_sharded_impl import ShardedInMemoryDBImpl
+from in_memory_db_threaded_impl import ThreadedInMemoryDBImpl
+
+
+def _make_ops(seed: int, count: int, num_keys: int, top_every: int) -> list[tuple]:
+    rng = random.Random(seed)
+    caller_id = f"caller{seed}"
+    ops = []
+    for i in range(count):
+        key = f"key{rng.randrange(num_keys)}"
+        field = f"field{rng.randrange(8)}"
+        roll = rng.random()
+        if top_every and seed == 0 and i % top_every == top_every - 1:
+            ops.append(("top_n_keys", 10))
+        elif roll < 0.4:
+            ops.append(("get", key, field))
+        elif roll < 0.7:
+            ops.append(("set_or_inc_by_caller", key, field, 1, caller_id))
+        elif roll < 0.8:
+            ops.append(("delete_by_caller", key, field, caller_id))
+        elif roll < 0.9:
+            ops.append(("lock", caller_id, key))
+        else:
+            ops.append(("unlock", key))
+    return ops
+
+
+def run(factory, num_threads: int, ops_per_thread: int, num_keys: int, top_every: int) -> float:
+    db = factory()
+    for i in range(num_keys):
+        for j in range(8):
+            db.set_or_inc(f"key{i}", f"field{j}", 1)
+
+    workloads = [_make_ops(seed, ops_per_thread, num_keys, top_every) for seed in range(num_threads)]
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker(ops):
+        calls = [(getattr(db, op[0]), op[1:]) for op in ops]
+        barrier.wait()
+        for method, args in calls:
+            method(*args)
+
+    threads = [threading.Thread(target=worker, args=(ops,)) for ops in workloads]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return num_threads * ops_per_thread / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops-per-thread", type=int, default=50_000)
+    parser.add_argument("--keys", type=int, default=1_000)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--top-every", type=int, default=0,
+                        help="thread 0 calls top_n_keys every N ops (0 disables)")
+    args = parser.parse_args()
+
+    gil_check = getattr(sys, "_is_gil_enabled", None)
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil_check is None or gil_check() else 'disabled'}")
+    factories = {
+        "global mutex": ThreadedInMemoryDBImpl,
+        f"sharded x{args.shards}": lambda: ShardedInMemoryDBImpl(num_shards=args.shards),
+    }
+    for name, factory in factories.items():
+        base_rate = None
+        for num_threads in args.threads:
+            rate = run(factory, num_threads, args.ops_per_thread, args.keys, args.top_every)
+            base_rate = base_rate or rate
+            print(f"{name:12s} threads={num_threads:<3d} {rate:12,.0f} ops/s  {rate / base_rate:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
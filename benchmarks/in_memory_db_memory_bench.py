@@ -0,0 +1,76 @@
+"""
+Measures heap bytes per key and write time for InMemoryDBImpl and CompactInMemoryDBImpl.
+
+    python benchmarks/in_memory_db_memory_bench.py --keys 200000 --fields-per-key 8
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from in_memory_db_compact_impl import CompactInMemoryDBImpl
+from in_memory_db_impl import InMemoryDBImpl
+
+
+def _populate(db, num_keys: int, fields: list[str], rounds: int, many: bool) -> None:
+    """Adds to every field of every key rounds times, one field per call or one key per call."""
+    values = list(range(1, len(fields) + 1))
+    for _ in range(rounds):
+        for i in range(num_keys):
+            key = f"key{i}"
+            if many:
+                db.set_or_inc_many(key, fields, values)
+            else:
+                for field, value in zip(fields, values):
+                    db.set_or_inc(key, field, value)
+
+
+def measure_memory(factory, num_keys: int, fields: list[str]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    db = factory()
+    _populate(db, num_keys, fields, 1, True)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del db
+    return current
+
+
+def measure_time(factory, num_keys: int, fields: list[str], rounds: int, many: bool) -> float:
+    db = factory()
+    start = time.perf_counter()
+    _populate(db, num_keys, fields, rounds, many)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--keys", type=int, default=20_000)
+    parser.add_argument("--fields-per-key", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="times every field is incremented in the timed runs")
+    args = parser.parse_args()
+    fields = [f"field{j}" for j in range(args.fields_per_key)]
+
+    results = {}
+    for factory in (InMemoryDBImpl, CompactInMemoryDBImpl):
+        results[factory.__name__] = (
+            measure_memory(factory, args.keys, fields),
+            measure_time(factory, args.keys, fields, args.rounds, False),
+            measure_time(factory, args.keys, fields, args.rounds, True),
+        )
+
+    baseline = results[InMemoryDBImpl.__name__][0]
+    print(f"{'':24s} {'B/key':>8s} {'memory':>7s} {'set_or_inc':>11s} {'set_or_inc_many':>16s}")
+    for name, (total, single, many) in results.items():
+        print(f"{name:24s} {total / args.keys:8.1f} {total / baseline:6.2f}x "
+              f"{single:10.3f}s {many:15.3f}s")
+
+
+if __name__ == "__main__":
+    main()
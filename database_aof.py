@@ -0,0 +1,593 @@
+import contextlib
+import itertools
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import typing as tp
+import weakref
+import zlib
+
+from database_impl import DatabaseImpl, Snapshot
+
+# Operation codes, argument layouts and timestamp argument index of AOF records.
+# Layout kinds: 's' = utf-8 string, 'i' = int64, 'p' = list of (str, str) pairs,
+# 'w' = list of (str, list of (str, str) pairs).
+_OPS = (
+    ('set_at_with_ttl', 'sssii', 3),
+    ('delete_at', 'ssi', 2),
+    ('mset_at_with_ttl', 'spii', 2),
+    ('mset_many_at_with_ttl', 'wii', 1),
+    ('backup', 'i', 0),
+    ('restore', 'ii', 0),
+    ('purge_expired', 'i', 0),
+)
+_OP_CODES = {name: (code, layout) for code, (name, layout, _) in enumerate(_OPS)}
+
+_AOF_MAGIC = b"DBAOF1\0\0"
+_AOF_HEADER = struct.Struct("<8sQ")      # magic, LSN of the first record in the file
+_RECORD_HEADER = struct.Struct("<II")    # payload length, crc32 of payload
+_CODE = struct.Struct("<B")
+_INT = struct.Struct("<q")
+_LEN = struct.Struct("<I")
+
+AOF_FILE = "appendonly.aof"
+# The segment being folded into the snapshot by a log rewrite.
+PREVIOUS_AOF_FILE = "appendonly.aof.prev"
+SNAPSHOT_FILE = "snapshot.bin"
+
+FSYNC_ALWAYS = "always"
+FSYNC_EVERYSEC = "everysec"
+FSYNC_NO = "no"
+_FSYNC_POLICIES = (FSYNC_ALWAYS, FSYNC_EVERYSEC, FSYNC_NO)
+
+
+def _encode_str(parts: list, text: str) -> None:
+    data = text.encode()
+    parts.append(_LEN.pack(len(data)))
+    parts.append(data)
+
+
+def _encode_pairs(parts: list, pairs) -> None:
+    pairs = DatabaseImpl._pairs(pairs)
+    parts.append(_LEN.pack(len(pairs)))
+    for field, value in pairs:
+        _encode_str(parts, field)
+        _encode_str(parts, value)
+
+
+def encode_op(op: tuple) -> bytes:
+    """Encodes (method_name, *args) as an AOF payload, coercing ints like the API does."""
+    entry = _OP_CODES.get(op[0])
+    if entry is None:
+        raise ValueError(f"Unknown operation: {op[0]!r}")
+    code, layout = entry
+    args = op[1:]
+    if len(args) != len(layout):
+        raise TypeError(f"{op[0]} takes {len(layout)} arguments, got {len(args)}")
+
+    parts = [_CODE.pack(code)]
+    for kind, arg in zip(layout, args):
+        if kind == 'i':
+            parts.append(_INT.pack(int(arg)))
+        elif kind == 's':
+            _encode_str(parts, arg)
+        elif kind == 'p':
+            _encode_pairs(parts, arg)
+        else:
+            writes = DatabaseImpl._pairs(arg)
+            parts.append(_LEN.pack(len(writes)))
+            for key, items in writes:
+                _encode_str(parts, key)
+                _encode_pairs(parts, items)
+    return b"".join(parts)
+
+
+def _decode_str(payload: bytes, offset: int) -> tuple[str, int]:
+    (length,) = _LEN.unpack_from(payload, offset)
+    offset += _LEN.size
+    return payload[offset:offset + length].decode(), offset + length
+
+
+def _decode_pairs(payload: bytes, offset: int) -> tuple[list, int]:
+    (count,) = _LEN.unpack_from(payload, offset)
+    offset += _LEN.size
+    pairs = []
+    for _ in range(count):
+        field, offset = _decode_str(payload, offset)
+        value, offset = _decode_str(payload, offset)
+        pairs.append((field, value))
+    return pairs, offset
+
+
+def decode_op(payload: bytes) -> tuple:
+    (code,) = _CODE.unpack_from(payload, 0)
+    name, layout, _ = _OPS[code]
+    offset = _CODE.size
+    op = [name]
+    for kind in layout:
+        if kind == 'i':
+            op.append(_INT.unpack_from(payload, offset)[0])
+            offset += _INT.size
+        elif kind == 's':
+            text, offset = _decode_str(payload, offset)
+            op.append(text)
+        elif kind == 'p':
+            pairs, offset = _decode_pairs(payload, offset)
+            op.append(pairs)
+        else:
+            (count,) = _LEN.unpack_from(payload, offset)
+            offset += _LEN.size
+            writes = []
+            for _ in range(count):
+                key, offset = _decode_str(payload, offset)
+                pairs, offset = _decode_pairs(payload, offset)
+                writes.append((key, pairs))
+            op.append(writes)
+    return tuple(op)
+
+
+def op_timestamp(op: tuple) -> int:
+    """Returns the timestamp argument of a decoded op."""
+    return op[1 + _OPS[_OP_CODES[op[0]][0]][2]]
+
+
+def read_aof(path: str) -> tuple[int, list[tuple], int]:
+    """
+    Reads an AOF file and returns (first LSN, ops, byte offset of the last valid record end).
+    Reading stops at the first truncated or corrupt record, which is a torn tail write.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _AOF_HEADER.size:
+        raise ValueError(f"{path} is missing its AOF header")
+    magic, base_lsn = _AOF_HEADER.unpack_from(data, 0)
+    if magic != _AOF_MAGIC:
+        raise ValueError(f"{path} is not a database AOF file")
+
+    ops = []
+    offset = _AOF_HEADER.size
+    while offset + _RECORD_HEADER.size <= len(data):
+        length, crc = _RECORD_HEADER.unpack_from(data, offset)
+        start = offset + _RECORD_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            break
+        ops.append(decode_op(payload))
+        offset = start + length
+    return base_lsn, ops, offset
+
+
+def _fsync_directory(directory: str) -> None:
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SnapshotFile:
+    """
+    One memory-mapped temporary file holding the pickled contents of many
+    MappedSnapshots at their own offsets, so any number of backups costs one file
+    and one mapping. Space of collected snapshots is reclaimed by rewriting the
+    file once it is more than half garbage.
+    """
+
+    _MIN_COMPACT_BYTES = 1 << 20
+
+    def __init__(self):
+        self._lock = threading.RLock()  # RLock: finalizers may run while it is held
+        self._file = tempfile.TemporaryFile()
+        self._map: mmap.mmap | None = None
+        self._size = 0
+        self._live = 0
+        # Keyed by insertion number: snapshots are dataclasses, compared by value, not identity.
+        self._snapshots: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._numbers = itertools.count()
+
+    def add(self, snapshot: "MappedSnapshot", data: bytes) -> None:
+        with self._lock:
+            if self._size - self._live > max(self._live, self._MIN_COMPACT_BYTES):
+                self._compact()
+            self._file.seek(self._size)
+            self._file.write(data)
+            self._file.flush()
+            snapshot._offset, snapshot._length = self._size, len(data)
+            self._size += len(data)
+            self._live += len(data)
+            self._snapshots[next(self._numbers)] = snapshot
+            weakref.finalize(snapshot, self._release, len(data))
+            self._remap()
+
+    def read(self, snapshot: "MappedSnapshot") -> bytes:
+        with self._lock:
+            return self._map[snapshot._offset:snapshot._offset + snapshot._length]
+
+    def _release(self, length: int) -> None:
+        with self._lock:
+            self._live -= length
+
+    def _remap(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ) if self._size else None
+
+    def _compact(self) -> None:
+        """Must hold the lock. Copies the live snapshots to a new file, in offset order."""
+        new_file = tempfile.TemporaryFile()
+        offset = 0
+        for snapshot in sorted(self._snapshots.values(), key=lambda snapshot: snapshot._offset):
+            new_file.write(self._map[snapshot._offset:snapshot._offset + snapshot._length])
+            snapshot._offset = offset
+            offset += snapshot._length
+        new_file.flush()
+        self._map.close()
+        self._map = None
+        self._file.close()
+        self._file = new_file
+        self._size = self._live = offset
+        self._remap()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+
+
+def _load_mapped_snapshot(header: Snapshot, data: bytes) -> Snapshot:
+    db, field_order = pickle.loads(data)
+    return Snapshot(header.timestamp, db, field_order, header.time_shift,
+                    header.generation, header.generation_floors)
+
+
+class MappedSnapshot(Snapshot):
+    """
+    A backup whose db and field_order live pickled in a SnapshotFile instead of on
+    the Python heap. Creating one pickles the whole db it references, even the
+    parts it shares copy-on-write with the live database and with other backups, so
+    each mapped backup costs O(database size) time and file space; restoring from it
+    unpickles the contents, so it costs O(snapshot size) rather than O(1). It pickles
+    as its bytes and loads back as a plain Snapshot, which DurableDatabase maps again
+    when mmap_backups is set.
+    """
+    __slots__ = ("_store", "_offset", "_length", "__weakref__")
+
+    def __init__(self, snapshot: Snapshot, store: SnapshotFile):
+        super().__init__(snapshot.timestamp, None, None, snapshot.time_shift,
+                         snapshot.generation, snapshot.generation_floors)
+        self._store = store
+        store.add(self, pickle.dumps(snapshot.contents(), protocol=pickle.HIGHEST_PROTOCOL))
+
+    def contents(self):
+        return pickle.loads(self._store.read(self))
+
+    def __reduce__(self):
+        header = Snapshot(self.timestamp, None, None, self.time_shift, self.generation, self.generation_floors)
+        return _load_mapped_snapshot, (header, self._store.read(self))
+
+
+def _run_fsync_timer(ref: "weakref.ref[DurableDatabase]", closed: threading.Event) -> None:
+    """FSYNC_EVERYSEC timer; holds only a weak reference so an unclosed database can still be collected."""
+    while not closed.wait(1.0):
+        durable = ref()
+        if durable is None:
+            return
+        durable._sync_if_unsynced()
+        del durable
+
+
+class DurableDatabase:
+    """
+    Persistent front-end for DatabaseImpl (or a subclass such as the compact backend).
+    Every write, backup and restore is appended to an append-only file (AOF) before
+    returning; reads go straight to the in-memory database.
+
+    fsync policy: FSYNC_ALWAYS fsyncs every record, FSYNC_EVERYSEC fsyncs from a
+    background timer within about a second of a record being written, even if no
+    further writes come, and FSYNC_NO leaves it to the OS. Records are written to the
+    OS on every call under all three, so only an OS crash or power loss can lose
+    acknowledged records.
+
+    A log rewrite snapshots a copy-on-write clone of the database, purged of records
+    expired at the latest logged timestamp, in a background thread while new records
+    go to a fresh AOF segment. Recovery loads the snapshot and replays only the
+    segments after it. A rewrite starts every rewrite_every records (0 disables).
+    Writes never raise the error of a failed background rewrite: rewrite_error()
+    reports it, wait_for_rewrite() and close() raise it, and the next rewrite retries
+    the fold without dropping the unfolded segment.
+
+    With mmap_backups, backups are moved out of the heap into MappedSnapshots that
+    share one SnapshotFile. That trades memory for time: every backup then writes a
+    full copy of the database instead of sharing it, O(database size) per backup.
+    """
+
+    def __init__(self, directory: str, db_factory=DatabaseImpl, fsync: str = FSYNC_EVERYSEC,
+                 rewrite_every: int = 100_000, mmap_backups: bool = False):
+        if fsync not in _FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {_FSYNC_POLICIES}, got {fsync!r}")
+        self.directory = directory
+        self.fsync = fsync
+        self.rewrite_every = int(rewrite_every)
+        self.mmap_backups = mmap_backups
+        self.aof_path = os.path.join(directory, AOF_FILE)
+        self.previous_aof_path = os.path.join(directory, PREVIOUS_AOF_FILE)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        self._rewrite_thread: threading.Thread | None = None
+        self._rewrite_error: BaseException | None = None
+        self._snapshot_file = SnapshotFile() if mmap_backups else None
+        self.db, self.lsn, self.last_timestamp = self._recover(db_factory)
+        self._since_rewrite = 0
+        self._unsynced = 0
+        # Held while writing, syncing or swapping the AOF, so the fsync timer never
+        # touches a file being replaced or closed.
+        self._aof_lock = threading.RLock()
+        self._aof = open(self.aof_path, "ab")
+        self._closed = threading.Event()
+        if fsync == FSYNC_EVERYSEC:
+            threading.Thread(target=_run_fsync_timer, args=(weakref.ref(self), self._closed),
+                             daemon=True).start()
+        if os.path.exists(self.previous_aof_path):
+            # A rewrite was interrupted; finish it before accepting writes.
+            self._finish_rewrite(self.db.clone(), self.lsn, self.last_timestamp)
+
+    # --------------------------------------------------------------------------
+    # Recovery and persistence
+    # --------------------------------------------------------------------------
+
+    def _recover(self, db_factory):
+        """Loads the snapshot and replays AOF records newer than it, oldest segment first."""
+        db, lsn, last_timestamp = db_factory(), 0, None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as f:
+                lsn, last_timestamp, db = pickle.load(f)
+
+        for path in (self.previous_aof_path, self.aof_path):
+            if not os.path.exists(path):
+                continue
+            base_lsn, ops, valid_end = read_aof(path)
+            if base_lsn > lsn:
+                raise ValueError(f"{path} starts at LSN {base_lsn} but the log before it ends at LSN {lsn}")
+            # Records before lsn are already in the snapshot.
+            for op in ops[lsn - base_lsn:]:
+                getattr(db, op[0])(*op[1:])
+                last_timestamp = op_timestamp(op) if last_timestamp is None else max(last_timestamp, op_timestamp(op))
+                lsn += 1
+
+            if valid_end != os.path.getsize(path):
+                with open(path, "r+b") as f:
+                    f.truncate(valid_end)
+                    os.fsync(f.fileno())
+        if not os.path.exists(self.aof_path):
+            self._write_empty_aof(lsn)
+        if self.mmap_backups:
+            self._map_backups(db)
+        return db, lsn, last_timestamp
+
+    def _write_empty_aof(self, base_lsn: int) -> None:
+        tmp_path = self.aof_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_AOF_HEADER.pack(_AOF_MAGIC, base_lsn))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.aof_path)
+        _fsync_directory(self.directory)
+
+    def _append(self, payload: bytes, timestamp: int) -> None:
+        with self._aof_lock:
+            self._aof.write(_RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+            self._aof.write(payload)
+            self._aof.flush()
+            self._unsynced += 1
+            if self.fsync == FSYNC_ALWAYS:
+                self.sync()
+        self.lsn += 1
+        self._since_rewrite += 1
+        self.last_timestamp = timestamp if self.last_timestamp is None else max(self.last_timestamp, timestamp)
+
+        if self.rewrite_every > 0 and self._since_rewrite >= self.rewrite_every and not self.rewriting():
+            self.rewrite()
+
+    def sync(self) -> None:
+        """Flushes and fsyncs every record appended so far."""
+        with self._aof_lock:
+            if self._aof.closed:
+                return
+            self._aof.flush()
+            os.fsync(self._aof.fileno())
+            self._unsynced = 0
+
+    def _sync_if_unsynced(self) -> None:
+        with self._aof_lock:
+            if self._unsynced:
+                self.sync()
+
+    def rewriting(self) -> bool:
+        return self._rewrite_thread is not None and self._rewrite_thread.is_alive()
+
+    def rewrite_error(self) -> BaseException | None:
+        """Returns the error of the last background rewrite if it failed, else None."""
+        return self._rewrite_error
+
+    def rewrite(self, background: bool = True) -> None:
+        """
+        Compacts the log: snapshots the current state and drops the AOF records before it.
+        Waits for a rewrite already in progress first. If an earlier rewrite failed, its
+        segment is still waiting to be folded, so the AOF is not rotated over it; the new
+        snapshot covers both, and the next successful rewrite rotates the AOF again.
+        """
+        self._join_rewrite()
+        self._rewrite_error = None
+        clone = self.db.clone()
+        if not os.path.exists(self.previous_aof_path):
+            with self._aof_lock:
+                self.sync()
+                self._aof.close()
+                os.replace(self.aof_path, self.previous_aof_path)
+                self._write_empty_aof(self.lsn)
+                self._aof = open(self.aof_path, "ab")
+        self._since_rewrite = 0
+
+        args = (clone, self.lsn, self.last_timestamp)
+        if not background:
+            self._finish_rewrite(*args)
+            return
+        self._rewrite_thread = threading.Thread(target=self._run_rewrite, args=args, daemon=True)
+        self._rewrite_thread.start()
+
+    def _run_rewrite(self, *args) -> None:
+        try:
+            self._finish_rewrite(*args)
+        except BaseException as error:
+            self._rewrite_error = error
+
+    def _finish_rewrite(self, db: DatabaseImpl, lsn: int, last_timestamp: int | None) -> None:
+        # db is a clone, so purging it leaves the live database untouched.
+        if last_timestamp is not None:
+            db.purge_expired(last_timestamp)
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((lsn, last_timestamp, db), f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, self.snapshot_path)
+        _fsync_directory(self.directory)
+        if os.path.exists(self.previous_aof_path):
+            os.remove(self.previous_aof_path)
+            _fsync_directory(self.directory)
+
+    def _join_rewrite(self) -> None:
+        if self._rewrite_thread is not None:
+            self._rewrite_thread.join()
+            self._rewrite_thread = None
+
+    def wait_for_rewrite(self) -> None:
+        """Blocks until a background rewrite finishes and re-raises its error, if any."""
+        self._join_rewrite()
+        if self._rewrite_error is not None:
+            error, self._rewrite_error = self._rewrite_error, None
+            raise error
+
+    def close(self) -> None:
+        if self._aof.closed:
+            return
+        self._closed.set()
+        with self._aof_lock:
+            self.sync()
+            self._aof.close()
+        try:
+            self.wait_for_rewrite()
+        finally:
+            if self._snapshot_file is not None:
+                self._snapshot_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _map_backups(self, db: DatabaseImpl) -> None:
+        for index, snapshot in enumerate(db.backups):
+            if not isinstance(snapshot, MappedSnapshot):
+                db.backups[index] = MappedSnapshot(snapshot, self._snapshot_file)
+
+    def _call(self, op: tuple):
+        # Encoding first surfaces bad arguments before the state changes.
+        payload = encode_op(op)
+        result = getattr(self.db, op[0])(*op[1:])
+        self._append(payload, int(op_timestamp(op)))
+        return result
+
+    # --------------------------------------------------------------------------
+    # DatabaseImpl writes, logged
+    # --------------------------------------------------------------------------
+
+    def set(self, key: str, field: str, value: str) -> None:
+        self.set_at(key, field, value, 0)
+
+    def set_at(self, key: str, field: str, value: str, timestamp: int) -> None:
+        self.set_at_with_ttl(key, field, value, timestamp, DatabaseImpl._INF_TTL)
+
+    def set_at_with_ttl(self, key: str, field: str, value: str, timestamp: int, ttl: int) -> None:
+        self._call(('set_at_with_ttl', key, field, value, timestamp, ttl))
+
+    def delete(self, key: str, field: str) -> bool:
+        return self.delete_at(key, field, 0)
+
+    def delete_at(self, key: str, field: str, timestamp: int) -> bool:
+        return self._call(('delete_at', key, field, timestamp))
+
+    def mset_at(self, key: str, items, timestamp: int) -> None:
+        self.mset_at_with_ttl(key, items, timestamp, DatabaseImpl._INF_TTL)
+
+    def mset_at_with_ttl(self, key: str, items, timestamp: int, ttl: int) -> None:
+        self._call(('mset_at_with_ttl', key, DatabaseImpl._pairs(items), timestamp, ttl))
+
+    def mset_many_at(self, writes, timestamp: int) -> None:
+        self.mset_many_at_with_ttl(writes, timestamp, DatabaseImpl._INF_TTL)
+
+    def mset_many_at_with_ttl(self, writes, timestamp: int, ttl: int) -> None:
+        writes = [(key, DatabaseImpl._pairs(items)) for key, items in DatabaseImpl._pairs(writes)]
+        self._call(('mset_many_at_with_ttl', writes, timestamp, ttl))
+
+    def purge_expired(self, timestamp: int) -> int:
+        return self._call(('purge_expired', timestamp))
+
+    def backup(self, timestamp: int) -> int:
+        count = self._call(('backup', timestamp))
+        if self.mmap_backups:
+            self._map_backups(self.db)
+        return count
+
+    def restore(self, timestamp: int, timestamp_to_restore: int) -> None:
+        return self._call(('restore', timestamp, timestamp_to_restore))
+
+    # --------------------------------------------------------------------------
+    # DatabaseImpl reads, not logged
+    # --------------------------------------------------------------------------
+
+    def get(self, key: str, field: str) -> str | None:
+        return self.db.get(key, field)
+
+    def get_at(self, key: str, field: str, timestamp: int) -> str | None:
+        return self.db.get_at(key, field, timestamp)
+
+    def mget_at(self, key: str, fields: tp.Iterable[str], timestamp: int) -> tp.List[str | None]:
+        return self.db.mget_at(key, fields, timestamp)
+
+    def mget_many_at(self, requests, timestamp: int) -> tp.List[tp.List[str | None]]:
+        return self.db.mget_many_at(requests, timestamp)
+
+    def scan(self, key: str) -> str:
+        return self.db.scan(key)
+
+    def scan_at(self, key: str, timestamp: int) -> str:
+        return self.db.scan_at(key, timestamp)
+
+    def scan_by_prefix(self, key: str, prefix: str) -> str:
+        return self.db.scan_by_prefix(key, prefix)
+
+    def scan_by_prefix_at(self, key: str, prefix: str, timestamp: int) -> str:
+        return self.db.scan_by_prefix_at(key, prefix, timestamp)
+
+    def iter_scan_at(self, key: str, timestamp: int, prefix: str = "",
+                     cursor: str | None = None) -> tp.Iterator[tp.Tuple[str, str]]:
+        return self.db.iter_scan_at(key, timestamp, prefix, cursor)
+
+    def scan_page_at(self, key: str, timestamp: int, limit: int, cursor: str | None = None,
+                     prefix: str = "") -> tp.Tuple[tp.List[tp.Tuple[str, str]], str | None]:
+        return self.db.scan_page_at(key, timestamp, limit, cursor, prefix)
@@ -0,0 +1,286 @@
+from array import array
+from dataclasses import dataclass, field as dataclass_field
+import bisect
+import heapq
+import typing as tp
+
+from database_impl import DatabaseImpl, RetentionPolicy, Snapshot
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+@dataclass(slots=True)
+class FieldColumns:
+    """
+    The records of one key as parallel columns, sorted by field name.
+    ttls holds 0 for rows whose has_ttl byte is 0.
+    """
+    names: tp.List[str] = dataclass_field(default_factory=list)
+    values: tp.List[str] = dataclass_field(default_factory=list)
+    created: array = dataclass_field(default_factory=lambda: array('q'))
+    ttls: array = dataclass_field(default_factory=lambda: array('q'))
+    generations: array = dataclass_field(default_factory=lambda: array('q'))
+    has_ttl: bytearray = dataclass_field(default_factory=bytearray)
+
+    def copy(self) -> "FieldColumns":
+        return FieldColumns(list(self.names), list(self.values), self.created[:],
+                            self.ttls[:], self.generations[:], self.has_ttl[:])
+
+    def index(self, field: str) -> int:
+        """Returns the row of field, or -1 if the key has no such field."""
+        row = bisect.bisect_left(self.names, field)
+        if row < len(self.names) and self.names[row] == field:
+            return row
+        return -1
+
+    def insert(self, row: int, field: str, value: str, created: int, ttl: int, generation: int, has_ttl: bool) -> None:
+        self.names.insert(row, field)
+        self.values.insert(row, value)
+        self.created.insert(row, created)
+        self.ttls.insert(row, ttl)
+        self.generations.insert(row, generation)
+        self.has_ttl.insert(row, has_ttl)
+
+    def update(self, row: int, value: str, created: int, ttl: int, generation: int, has_ttl: bool) -> None:
+        self.values[row] = value
+        self.created[row] = created
+        self.ttls[row] = ttl
+        self.generations[row] = generation
+        self.has_ttl[row] = has_ttl
+
+    def delete(self, row: int) -> None:
+        del self.names[row]
+        del self.values[row]
+        del self.created[row]
+        del self.ttls[row]
+        del self.generations[row]
+        del self.has_ttl[row]
+
+
+class CompactDatabaseImpl(DatabaseImpl):
+    """
+    DatabaseImpl with each key's records stored as FieldColumns instead of a dict of
+    tuples, for databases with many fields. The public API and results are identical
+    to DatabaseImpl; timestamps and finite TTLs must fit in a signed 64-bit integer,
+    and a write with one that does not raises OverflowError and changes nothing.
+    """
+
+    def __init__(self, purge_on_write: bool = False, backup_retention: RetentionPolicy | None = None):
+        """
+        Initializes the database.
+        - db: Maps each key to its FieldColumns; the sorted names column replaces field_order.
+        - expiry_heap: (virtual expiry, key, field) for rows with a TTL. An entry is stale
+          when the row is gone or now expires at a different time.
+        Everything else is as in DatabaseImpl.
+        """
+        self.db: tp.Dict[str, FieldColumns] = {}
+        self.time_shift = 0
+        self.generation = 0
+        self.generation_floors: tp.Dict[int, int] = {}
+        self._generation_counter = 0
+        self.expiry_heap: tp.List[tp.Tuple[int, str, str]] = []
+        self._expiry_heap_stale = False
+        self._live_expiring = 0
+        self.purge_on_write = purge_on_write
+        self.backups: tp.List[Snapshot] = []
+        self.backup_times: tp.List[int] = []
+        self.backup_retention = backup_retention
+        self.owned_keys: tp.Set[str] = set()
+        self._outer_shared = False
+
+    def _row_expired(self, columns: FieldColumns, row: int, current_timestamp: int) -> bool:
+        if not columns.has_ttl[row]:
+            return False
+        expires_at = columns.created[row] + columns.ttls[row]
+        if current_timestamp - self.time_shift >= expires_at:
+            return True
+        generation = columns.generations[row]
+        return generation != self.generation and expires_at <= self.generation_floors[generation]
+
+    def _track_row(self, key: str, field: str, expires_at: int) -> None:
+        if self._expiry_heap_stale:
+            return
+        heapq.heappush(self.expiry_heap, (expires_at, key, field))
+        self._live_expiring += 1
+
+    def _untrack_row(self, columns: FieldColumns, row: int) -> None:
+        if columns.has_ttl[row] and not self._expiry_heap_stale:
+            self._live_expiring -= 1
+
+    def _rebuild_expiry_heap(self) -> None:
+        self.expiry_heap = [
+            (columns.created[row] + columns.ttls[row], key, columns.names[row])
+            for key, columns in self.db.items()
+            for row in range(len(columns.names))
+            if columns.has_ttl[row]
+        ]
+        heapq.heapify(self.expiry_heap)
+        self._live_expiring = len(self.expiry_heap)
+        self._expiry_heap_stale = False
+
+    def _writable_columns(self, key: str) -> FieldColumns:
+        """Returns the columns of a key, creating the key or copying shared columns first."""
+        if self._outer_shared:
+            self.db = dict(self.db)
+            self._outer_shared = False
+        if key not in self.owned_keys:
+            columns = self.db.get(key)
+            self.db[key] = columns.copy() if columns is not None else FieldColumns()
+            self.owned_keys.add(key)
+        return self.db[key]
+
+    def _remove_row(self, key: str, row: int) -> None:
+        columns = self._writable_columns(key)
+        self._untrack_row(columns, row)
+        columns.delete(row)
+        if not columns.names:
+            del self.db[key]
+            self.owned_keys.discard(key)
+
+    def _purge(self, timestamp: int, limit: int | None = None) -> int:
+        if self._expiry_heap_stale:
+            self._rebuild_expiry_heap()
+        removed = 0
+        heap = self.expiry_heap
+        virtual_ts = timestamp - self.time_shift
+        while heap and heap[0][0] <= virtual_ts:
+            if limit is not None and removed >= limit:
+                break
+            expires_at, key, field = heapq.heappop(heap)
+            columns = self.db.get(key)
+            row = columns.index(field) if columns is not None else -1
+            if (row < 0 or not columns.has_ttl[row] or
+                    columns.created[row] + columns.ttls[row] != expires_at):
+                # Deleted or rewritten with another expiry since the entry was pushed.
+                continue
+            self._remove_row(key, row)
+            removed += 1
+        self._compact_expiry_heap()
+        return removed
+
+    # --------------------------------------------------------------------------
+    # Level 1 & 3: SET, GET, DELETE Methods
+    # --------------------------------------------------------------------------
+
+    def _write_fields(self, key: str, items: tp.Iterable[tp.Tuple[str, str]], timestamp: int, ttl: int) -> None:
+        has_ttl = ttl != self._INF_TTL
+        if not has_ttl:
+            ttl = 0
+        created = timestamp - self.time_shift
+        # Check before touching the key: FieldColumns.insert and update write the
+        # name and value lists before the int64 columns.
+        for name, number in (("timestamp", created), ("ttl", ttl)):
+            if not _INT64_MIN <= number <= _INT64_MAX:
+                raise OverflowError(f"{key}: {name} {number} is outside the int64 range")
+        columns = self._writable_columns(key)
+        names = columns.names
+        generation = self.generation
+        for field, value in items:
+            row = bisect.bisect_left(names, field)
+            if row < len(names) and names[row] == field:
+                self._untrack_row(columns, row)
+                columns.update(row, value, created, ttl, generation, has_ttl)
+            else:
+                columns.insert(row, field, value, created, ttl, generation, has_ttl)
+            if has_ttl:
+                self._track_row(key, field, created + ttl)
+
+    def get_at(self, key: str, field: str, timestamp: int) -> str | None:
+        columns = self.db.get(key)
+        if columns is None:
+            return None
+        row = columns.index(field)
+        if row < 0 or self._row_expired(columns, row, int(timestamp)):
+            return None
+        return columns.values[row]
+
+    def delete_at(self, key: str, field: str, timestamp: int) -> bool:
+        columns = self.db.get(key)
+        if columns is None:
+            return False
+        ts = int(timestamp)
+        row = columns.index(field)
+        if row < 0 or self._row_expired(columns, row, ts):
+            return False
+
+        self._remove_row(key, row)
+        if self.purge_on_write:
+            self._purge(ts, self._PURGE_ON_WRITE_LIMIT)
+        else:
+            self._compact_expiry_heap()
+        return True
+
+    def mget_at(self, key: str, fields: tp.Iterable[str], timestamp: int) -> tp.List[str | None]:
+        columns = self.db.get(key)
+        if columns is None:
+            return [None for _ in fields]
+        ts = int(timestamp)
+        values = columns.values
+        results = []
+        for field in fields:
+            row = columns.index(field)
+            if row < 0 or self._row_expired(columns, row, ts):
+                results.append(None)
+            else:
+                results.append(values[row])
+        return results
+
+    # --------------------------------------------------------------------------
+    # Level 2 & 3: SCAN Methods
+    # --------------------------------------------------------------------------
+
+    def _scan_rows(self, columns: FieldColumns, start: int, end: int, timestamp: int) -> str:
+        names = columns.names
+        values = columns.values
+        return ", ".join(
+            f"{names[row]}({values[row]})"
+            for row in range(start, end)
+            if not self._row_expired(columns, row, timestamp)
+        )
+
+    def scan_at(self, key: str, timestamp: int) -> str:
+        columns = self.db.get(key)
+        if columns is None:
+            return ""
+        return self._scan_rows(columns, 0, len(columns.names), int(timestamp))
+
+    def scan_by_prefix_at(self, key: str, prefix: str, timestamp: int) -> str:
+        columns = self.db.get(key)
+        if columns is None:
+            return ""
+        start, end = self._prefix_range(columns.names, prefix)
+        return self._scan_rows(columns, start, end, int(timestamp))
+
+    def _next_record(self, key: str, prefix: str, after: str | None, timestamp: int) -> tp.Tuple[str, str] | None:
+        columns = self.db.get(key)
+        if columns is None:
+            return None
+        names = columns.names
+        start = bisect.bisect_left(names, prefix)
+        if after is not None:
+            start = max(start, bisect.bisect_right(names, after))
+        for row in range(start, len(names)):
+            field = names[row]
+            if not field.startswith(prefix):
+                return None
+            if not self._row_expired(columns, row, timestamp):
+                return field, columns.values[row]
+        return None
+
+    # --------------------------------------------------------------------------
+    # Level 4: Backup and Restore
+    # --------------------------------------------------------------------------
+
+    def _take_snapshot(self, timestamp: int) -> Snapshot:
+        return Snapshot(timestamp, self.db, None, self.time_shift,
+                        self.generation, self.generation_floors)
+
+    def _load_snapshot(self, snapshot: Snapshot | None) -> None:
+        self.db = snapshot.contents()[0] if snapshot is not None else {}
+
+    def _count_live_keys(self, timestamp: int) -> int:
+        count = 0
+        for columns in self.db.values():
+            if any(not self._row_expired(columns, row, timestamp) for row in range(len(columns.names))):
+                count += 1
+        return count
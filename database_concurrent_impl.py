@@ -0,0 +1,209 @@
+import threading
+import typing as tp
+
+from database_impl import DatabaseImpl, RetentionPolicy
+
+
+class _Stripe:
+    __slots__ = ("lock", "db")
+
+    def __init__(self, db: DatabaseImpl):
+        self.lock = threading.Lock()
+        self.db = db
+
+
+class ConcurrentDatabaseImpl:
+    """
+    Thread-safe DatabaseImpl with keys striped by hash over independent databases,
+    each behind its own lock. Calls on different stripes run without contention,
+    and every call sees its keys consistently.
+
+    Calls that span stripes (the *_many methods, backup, restore) lock the stripes
+    they need in ascending stripe index. backup and restore lock every stripe. A
+    backup holds them only for the O(1) copy-on-write snapshot of each one; counting
+    the keys it returns reads the snapshots after the locks are released. A restore
+    is O(1) per stripe too, except with purge_on_write, where each stripe rebuilds
+    its expiry heap and so every lock is held for a pass over all stored fields.
+    """
+
+    def __init__(self, num_stripes: int = 16, db_factory=DatabaseImpl, purge_on_write: bool = False,
+                 backup_retention: RetentionPolicy | None = None):
+        self.stripes = [
+            _Stripe(db_factory(purge_on_write=purge_on_write, backup_retention=backup_retention))
+            for _ in range(max(1, int(num_stripes)))
+        ]
+
+    def _stripe_index(self, key: str) -> int:
+        return hash(key) % len(self.stripes)
+
+    def _stripe(self, key: str) -> _Stripe:
+        return self.stripes[self._stripe_index(key)]
+
+    def _group(self, pairs) -> tp.Dict[int, tp.List[tp.Tuple[int, tp.Any, tp.Any]]]:
+        """Groups (key, x) pairs by stripe index, remembering each pair's position."""
+        groups = {}
+        for position, (key, item) in enumerate(DatabaseImpl._pairs(pairs)):
+            groups.setdefault(self._stripe_index(key), []).append((position, key, item))
+        return groups
+
+    def _lock_all(self, indices) -> tp.List[threading.Lock]:
+        locks = [self.stripes[i].lock for i in sorted(indices)]
+        for lock in locks:
+            lock.acquire()
+        return locks
+
+    @staticmethod
+    def _release(locks: tp.List[threading.Lock]) -> None:
+        for lock in reversed(locks):
+            lock.release()
+
+    # --------------------------------------------------------------------------
+    # Level 1 & 3: SET, GET, DELETE Methods
+    # --------------------------------------------------------------------------
+
+    def set(self, key: str, field: str, value: str) -> None:
+        self.set_at(key, field, value, 0)
+
+    def set_at(self, key: str, field: str, value: str, timestamp: int) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.db.set_at(key, field, value, timestamp)
+
+    def set_at_with_ttl(self, key: str, field: str, value: str, timestamp: int, ttl: int) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.db.set_at_with_ttl(key, field, value, timestamp, ttl)
+
+    def get(self, key: str, field: str) -> str | None:
+        return self.get_at(key, field, 0)
+
+    def get_at(self, key: str, field: str, timestamp: int) -> str | None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.db.get_at(key, field, timestamp)
+
+    def delete(self, key: str, field: str) -> bool:
+        return self.delete_at(key, field, 0)
+
+    def delete_at(self, key: str, field: str, timestamp: int) -> bool:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.db.delete_at(key, field, timestamp)
+
+    def purge_expired(self, timestamp: int) -> int:
+        removed = 0
+        for stripe in self.stripes:
+            with stripe.lock:
+                removed += stripe.db.purge_expired(timestamp)
+        return removed
+
+    # --------------------------------------------------------------------------
+    # Level 2 & 3: SCAN Methods
+    # --------------------------------------------------------------------------
+
+    def scan(self, key: str) -> str:
+        return self.scan_at(key, 0)
+
+    def scan_at(self, key: str, timestamp: int) -> str:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.db.scan_at(key, timestamp)
+
+    def scan_by_prefix(self, key: str, prefix: str) -> str:
+        return self.scan_by_prefix_at(key, prefix, 0)
+
+    def scan_by_prefix_at(self, key: str, prefix: str, timestamp: int) -> str:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.db.scan_by_prefix_at(key, prefix, timestamp)
+
+    def iter_scan_at(self, key: str, timestamp: int, prefix: str = "",
+                     cursor: str | None = None) -> tp.Iterator[tp.Tuple[str, str]]:
+        """As DatabaseImpl.iter_scan_at; each step holds the stripe lock, not the whole iteration."""
+        stripe = self._stripe(key)
+        ts = int(timestamp)
+        after = cursor
+        while True:
+            with stripe.lock:
+                record = stripe.db._next_record(key, prefix, after, ts)
+            if record is None:
+                return
+            after = record[0]
+            yield record
+
+    def scan_page_at(self, key: str, timestamp: int, limit: int, cursor: str | None = None,
+                     prefix: str = "") -> tp.Tuple[tp.List[tp.Tuple[str, str]], str | None]:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.db.scan_page_at(key, timestamp, limit, cursor, prefix)
+
+    # --------------------------------------------------------------------------
+    # Batched GET and SET Methods
+    # --------------------------------------------------------------------------
+
+    def mget_at(self, key: str, fields: tp.Iterable[str], timestamp: int) -> tp.List[str | None]:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            return stripe.db.mget_at(key, fields, timestamp)
+
+    def mget_many_at(self, requests, timestamp: int) -> tp.List[tp.List[str | None]]:
+        """As DatabaseImpl.mget_many_at, reading every key at the same point in time."""
+        groups = self._group(requests)
+        results = [None] * sum(len(group) for group in groups.values())
+        locks = self._lock_all(groups)
+        try:
+            for index, group in groups.items():
+                db = self.stripes[index].db
+                for position, key, fields in group:
+                    results[position] = db.mget_at(key, fields, timestamp)
+        finally:
+            self._release(locks)
+        return results
+
+    def mset_at(self, key: str, items, timestamp: int) -> None:
+        self.mset_at_with_ttl(key, items, timestamp, DatabaseImpl._INF_TTL)
+
+    def mset_at_with_ttl(self, key: str, items, timestamp: int, ttl: int) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.db.mset_at_with_ttl(key, items, timestamp, ttl)
+
+    def mset_many_at(self, writes, timestamp: int) -> None:
+        self.mset_many_at_with_ttl(writes, timestamp, DatabaseImpl._INF_TTL)
+
+    def mset_many_at_with_ttl(self, writes, timestamp: int, ttl: int) -> None:
+        """As DatabaseImpl.mset_many_at_with_ttl; readers see all of the writes or none."""
+        groups = self._group(writes)
+        locks = self._lock_all(groups)
+        try:
+            for index, group in groups.items():
+                self.stripes[index].db.mset_many_at_with_ttl(
+                    [(key, items) for _, key, items in group], timestamp, ttl)
+        finally:
+            self._release(locks)
+
+    # --------------------------------------------------------------------------
+    # Level 4: Backup and Restore
+    # --------------------------------------------------------------------------
+
+    def backup(self, timestamp: int) -> int:
+        ts = int(timestamp)
+        locks = self._lock_all(range(len(self.stripes)))
+        try:
+            snapshots = [stripe.db._add_backup(ts) for stripe in self.stripes]
+        finally:
+            self._release(locks)
+        # Snapshots are immutable, so they can be counted without the locks.
+        return sum(
+            stripe.db._snapshot_view(snapshot)._count_live_keys(ts)
+            for stripe, snapshot in zip(self.stripes, snapshots)
+        )
+
+    def restore(self, timestamp: int, timestamp_to_restore: int) -> None:
+        locks = self._lock_all(range(len(self.stripes)))
+        try:
+            for stripe in self.stripes:
+                stripe.db.restore(timestamp, timestamp_to_restore)
+        finally:
+            self._release(locks)
+        return None
@@ -1,6 +1,83 @@
+from dataclasses import dataclass
+import bisect
 import copy
+import heapq
+import itertools
+import math
 import typing as tp
 
+# A retention policy receives the sorted backup timestamps and the timestamp of the
+# backup just taken, and returns the indices of backups to drop. Policies are pickled
+# with the database (e.g. by DurableDatabase snapshots), so they must be picklable:
+# module-level functions or instances of module-level classes, not closures.
+RetentionPolicy = tp.Callable[[tp.List[int], int], tp.List[int]]
+
+
+@dataclass(frozen=True, slots=True)
+class _KeepLast:
+    n: int
+
+    def __call__(self, backup_times: tp.List[int], now: int) -> tp.List[int]:
+        return list(range(max(0, len(backup_times) - self.n)))
+
+
+@dataclass(frozen=True, slots=True)
+class _ExponentialThinning:
+    min_age: int
+    factor: float
+
+    def _bucket(self, age: int) -> int:
+        if age < self.min_age:
+            return 0
+        return 1 + int(math.log(age / self.min_age, self.factor))
+
+    def __call__(self, backup_times: tp.List[int], now: int) -> tp.List[int]:
+        drop = []
+        seen = set()
+        for index in range(len(backup_times)):
+            age_bucket = self._bucket(max(0, now - backup_times[index]))
+            if age_bucket in seen:
+                drop.append(index)
+            seen.add(age_bucket)
+        return drop
+
+
+def keep_last(n: int) -> RetentionPolicy:
+    """Retention policy that keeps only the n most recent backups."""
+    if n < 1:
+        raise ValueError("keep_last needs n >= 1")
+    return _KeepLast(n)
+
+
+def exponential_thinning(min_age: int = 1, factor: float = 2.0) -> RetentionPolicy:
+    """
+    Retention policy that keeps one backup per exponentially growing age bucket:
+    ages [0, min_age), [min_age, min_age * factor), [min_age * factor, min_age * factor**2), ...
+    The oldest backup in each bucket survives, so backups age into the next bucket
+    instead of being replaced, and the count grows with log(age).
+    """
+    if min_age < 1 or factor <= 1:
+        raise ValueError("exponential_thinning needs min_age >= 1 and factor > 1")
+    return _ExponentialThinning(min_age, factor)
+
+
+# A stored record: (value, creation timestamp on the virtual clock, ttl, generation).
+Record = tp.Tuple[str, int, int, int]
+
+
+@dataclass(slots=True)
+class Snapshot:
+    timestamp: int
+    db: tp.Dict[str, tp.Any]
+    field_order: tp.Dict[str, tp.List[str]] | None
+    time_shift: int
+    generation: int
+    generation_floors: tp.Dict[int, int]
+
+    def contents(self) -> tp.Tuple[tp.Dict[str, tp.Any], tp.Dict[str, tp.List[str]] | None]:
+        """Returns (db, field_order); snapshots kept outside the heap load them here."""
+        return self.db, self.field_order
+
 
 class DatabaseImpl:
     """
@@ -8,25 +85,163 @@ class DatabaseImpl:
     """
 
     _INF_TTL = 10**18
+    # Most expired records reclaimed by one opportunistic purge on a write.
+    _PURGE_ON_WRITE_LIMIT = 16
 
-    def __init__(self):
+    def __init__(self, purge_on_write: bool = False, backup_retention: RetentionPolicy | None = None):
         """
         Initializes the database.
         The data is stored in a nested dictionary structure:
         {
             "key1": {
-                "field1": (value, creation_timestamp, ttl),
-                "field2": (value, creation_timestamp, ttl),
+                "field1": (value, creation_timestamp, ttl, generation),
+                "field2": (value, creation_timestamp, ttl, generation),
             },
             ...
         }
+        Creation timestamps are on a virtual clock that runs time_shift behind the
+        caller's timestamps, so a restore moves every TTL by changing time_shift alone.
+        Each restore starts a new generation; a record written in an older generation
+        is also expired when its virtual expiry is at or before generation_floors[its
+        generation], which hides records that had expired when their snapshot was taken.
+
+        field_order keeps each key's field names in sorted order so scans walk
+        it directly and prefix scans bisect to their range.
+        expiry_heap holds (virtual expiry, key, field, value_info) for every record
+        with a finite TTL; entries whose record was overwritten or deleted are skipped
+        when popped. Unpickling rebuilds it; restore and clone leave it stale, and the
+        next purge rebuilds it (restore rebuilds it at once with purge_on_write, so
+        writes never pay for a full rebuild).
+        With purge_on_write, writes also reclaim a few expired records.
+
+        Backups share structure with the live database (copy-on-write): a backup keeps
+        references to the current db and field_order dicts, and writes copy the outer
+        dicts once and each key's inner containers once before changing them. Keys in
+        owned_keys have inner containers that no backup references.
+        backups are kept sorted by timestamp, with backup_times alongside for bisect
+        lookups; backup_retention (e.g. keep_last or exponential_thinning) bounds them.
         """
-        self.db: tp.Dict[str, tp.Dict[str, tp.Tuple[str, int, int]]] = {}
-        self.backups: tp.List[tp.Tuple[int, tp.Dict[str, tp.Dict[str, tp.Tuple[str, int, int]]]]] = []
-
-    def _is_expired(self, value_info: tp.Tuple[str, int, int], current_timestamp: int) -> bool:
-        _, creation_ts, ttl = value_info
-        return current_timestamp >= creation_ts + ttl
+        self.db: tp.Dict[str, tp.Dict[str, Record]] = {}
+        self.field_order: tp.Dict[str, tp.List[str]] = {}
+        self.time_shift = 0
+        self.generation = 0
+        self.generation_floors: tp.Dict[int, int] = {}
+        self._generation_counter = 0
+        self.expiry_heap: tp.List[tp.Tuple[int, str, str, Record]] = []
+        self._expiry_heap_stale = False
+        self._live_expiring = 0
+        self.purge_on_write = purge_on_write
+        self.backups: tp.List[Snapshot] = []
+        self.backup_times: tp.List[int] = []
+        self.backup_retention = backup_retention
+        self.owned_keys: tp.Set[str] = set()
+        self._outer_shared = False
+
+    def _is_expired(self, value_info: Record, current_timestamp: int) -> bool:
+        _, creation_ts, ttl, generation = value_info
+        expires_at = creation_ts + ttl
+        if current_timestamp - self.time_shift >= expires_at:
+            return True
+        return generation != self.generation and expires_at <= self.generation_floors[generation]
+
+    def _track_expiry(self, key: str, field: str, value_info: Record) -> None:
+        _, creation_ts, ttl, _ = value_info
+        if ttl == self._INF_TTL or self._expiry_heap_stale:
+            return
+        heapq.heappush(self.expiry_heap, (creation_ts + ttl, key, field, value_info))
+        self._live_expiring += 1
+
+    def _untrack_expiry(self, value_info: Record) -> None:
+        """Called when a record leaves the database; its heap entry goes stale."""
+        if value_info[2] != self._INF_TTL and not self._expiry_heap_stale:
+            self._live_expiring -= 1
+
+    def _compact_expiry_heap(self) -> None:
+        # Stale entries otherwise linger until their expiry time passes.
+        if len(self.expiry_heap) > 2 * self._live_expiring + 64:
+            self._rebuild_expiry_heap()
+
+    def _rebuild_expiry_heap(self) -> None:
+        self.expiry_heap = [
+            (creation_ts + ttl, key, field, value_info)
+            for key, fields in self.db.items()
+            for field, value_info in fields.items()
+            for _, creation_ts, ttl, _ in (value_info,)
+            if ttl != self._INF_TTL
+        ]
+        heapq.heapify(self.expiry_heap)
+        self._live_expiring = len(self.expiry_heap)
+        self._expiry_heap_stale = False
+
+    def _writable_key(self, key: str) -> tp.Tuple[tp.Dict[str, Record], tp.List[str]]:
+        """
+        Returns the fields dict and sorted field list of a key, creating the key if
+        needed and copying anything still shared with a backup first.
+        """
+        if self._outer_shared:
+            self.db = dict(self.db)
+            self.field_order = dict(self.field_order)
+            self._outer_shared = False
+        if key not in self.owned_keys:
+            if key in self.db:
+                self.db[key] = dict(self.db[key])
+                self.field_order[key] = list(self.field_order[key])
+            else:
+                self.db[key] = {}
+                self.field_order[key] = []
+            self.owned_keys.add(key)
+        return self.db[key], self.field_order[key]
+
+    def _remove_field(self, key: str, field: str) -> None:
+        fields, order = self._writable_key(key)
+        self._untrack_expiry(fields.pop(field))
+        del order[bisect.bisect_left(order, field)]
+        if not fields:
+            del self.db[key]
+            del self.field_order[key]
+            self.owned_keys.discard(key)
+
+    def _purge(self, timestamp: int, limit: int | None = None) -> int:
+        if self._expiry_heap_stale:
+            self._rebuild_expiry_heap()
+        removed = 0
+        heap = self.expiry_heap
+        virtual_ts = timestamp - self.time_shift
+        while heap and heap[0][0] <= virtual_ts:
+            if limit is not None and removed >= limit:
+                break
+            _, key, field, value_info = heapq.heappop(heap)
+            fields = self.db.get(key)
+            if fields is None or fields.get(field) is not value_info:
+                # Overwritten or deleted since the entry was pushed.
+                continue
+            self._remove_field(key, field)
+            removed += 1
+        self._compact_expiry_heap()
+        return removed
+
+    def purge_expired(self, timestamp: int) -> int:
+        """
+        Removes every record expired at the given timestamp, and keys left empty.
+        Returns the number of records removed. Reads at earlier timestamps will no
+        longer see the purged records, so only purge up to the oldest time still queried.
+        """
+        return self._purge(int(timestamp))
+
+    @staticmethod
+    def _prefix_range(fields: tp.List[str], prefix: str) -> tp.Tuple[int, int]:
+        """Returns the [start, end) slice of a sorted field list that starts with prefix."""
+        start = bisect.bisect_left(fields, prefix)
+        if not prefix:
+            return start, len(fields)
+        last = ord(prefix[-1])
+        if last == 0x10FFFF:
+            end = start
+            while end < len(fields) and fields[end].startswith(prefix):
+                end += 1
+            return start, end
+        # Every string with the prefix sorts before the prefix with its last character bumped.
+        return start, bisect.bisect_left(fields, prefix[:-1] + chr(last + 1), start)
 
     # --------------------------------------------------------------------------
     # Level 1 & 3: SET, GET, DELETE Methods
@@ -42,9 +257,26 @@ class DatabaseImpl:
 
     def set_at_with_ttl(self, key: str, field: str, value: str, timestamp: int, ttl: int) -> None:
         """Level 3: Sets a value with a creation timestamp and a TTL."""
-        if key not in self.db:
-            self.db[key] = {}
-        self.db[key][field] = (value, int(timestamp), int(ttl))
+        ts = int(timestamp)
+        if self.purge_on_write:
+            self._purge(ts, self._PURGE_ON_WRITE_LIMIT)
+        self._write_fields(key, ((field, value),), ts, int(ttl))
+        self._compact_expiry_heap()
+
+    def _write_fields(self, key: str, items: tp.Iterable[tp.Tuple[str, str]], timestamp: int, ttl: int) -> None:
+        """Writes non-empty (field, value) pairs to one key, resolving the key once."""
+        fields, order = self._writable_key(key)
+        created = timestamp - self.time_shift
+        generation = self.generation
+        for field, value in items:
+            old_value_info = fields.get(field)
+            if old_value_info is None:
+                bisect.insort(order, field)
+            value_info = (value, created, ttl, generation)
+            fields[field] = value_info
+            if old_value_info is not None:
+                self._untrack_expiry(old_value_info)
+            self._track_expiry(key, field, value_info)
 
     def get(self, key: str, field: str) -> str | None:
         """Level 1: Gets a value. Backward compatible, assumes timestamp=0."""
@@ -70,13 +302,16 @@ class DatabaseImpl:
         if key not in self.db or field not in self.db[key]:
             return False
 
+        ts = int(timestamp)
         value_info = self.db[key][field]
-        if self._is_expired(value_info, int(timestamp)):
+        if self._is_expired(value_info, ts):
             return False
 
-        del self.db[key][field]
-        if not self.db[key]:
-            del self.db[key]
+        self._remove_field(key, field)
+        if self.purge_on_write:
+            self._purge(ts, self._PURGE_ON_WRITE_LIMIT)
+        else:
+            self._compact_expiry_heap()
         return True
 
     # --------------------------------------------------------------------------
@@ -92,11 +327,13 @@ class DatabaseImpl:
         if key not in self.db:
             return ""
 
+        ts = int(timestamp)
+        fields = self.db[key]
         records = []
-        for field, value_info in sorted(self.db[key].items()):
-            if not self._is_expired(value_info, int(timestamp)):
-                value = value_info[0]
-                records.append(f"{field}({value})")
+        for field in self.field_order[key]:
+            value_info = fields[field]
+            if not self._is_expired(value_info, ts):
+                records.append(f"{field}({value_info[0]})")
 
         return ", ".join(records)
 
@@ -109,65 +346,250 @@ class DatabaseImpl:
         if key not in self.db:
             return ""
 
+        ts = int(timestamp)
+        fields = self.db[key]
+        order = self.field_order[key]
+        start, end = self._prefix_range(order, prefix)
         records = []
-        for field, value_info in sorted(self.db[key].items()):
-            if field.startswith(prefix) and not self._is_expired(value_info, int(timestamp)):
-                value = value_info[0]
-                records.append(f"{field}({value})")
+        for field in order[start:end]:
+            value_info = fields[field]
+            if not self._is_expired(value_info, ts):
+                records.append(f"{field}({value_info[0]})")
 
         return ", ".join(records)
 
+    def _next_record(self, key: str, prefix: str, after: str | None, timestamp: int) -> tp.Tuple[str, str] | None:
+        """Returns the first non-expired (field, value) of key with the prefix that sorts after `after`."""
+        fields = self.db.get(key)
+        if fields is None:
+            return None
+        order = self.field_order[key]
+        start = bisect.bisect_left(order, prefix)
+        if after is not None:
+            start = max(start, bisect.bisect_right(order, after))
+        for index in range(start, len(order)):
+            field = order[index]
+            if not field.startswith(prefix):
+                return None
+            value_info = fields[field]
+            if not self._is_expired(value_info, timestamp):
+                return field, value_info[0]
+        return None
+
+    def iter_scan_at(self, key: str, timestamp: int, prefix: str = "",
+                     cursor: str | None = None) -> tp.Iterator[tp.Tuple[str, str]]:
+        """
+        Yields the non-expired (field, value) records of a key that start with prefix,
+        in field order, evaluated lazily at the given timestamp. A cursor returned by
+        scan_page_at resumes after the last record of that page.
+        Each step looks its position up again, so writes between steps are safe:
+        records are never repeated and later fields written meanwhile are seen.
+        """
+        ts = int(timestamp)
+        after = cursor
+        while True:
+            record = self._next_record(key, prefix, after, ts)
+            if record is None:
+                return
+            after = record[0]
+            yield record
+
+    def scan_page_at(self, key: str, timestamp: int, limit: int, cursor: str | None = None,
+                     prefix: str = "") -> tp.Tuple[tp.List[tp.Tuple[str, str]], str | None]:
+        """
+        Returns up to limit records of iter_scan_at and a cursor for the next page,
+        which is None once the scan is complete. Treat the cursor as opaque.
+        """
+        limit = int(limit)
+        if limit < 1:
+            raise ValueError("scan_page_at needs limit >= 1")
+        records = list(itertools.islice(self.iter_scan_at(key, timestamp, prefix, cursor), limit + 1))
+        if len(records) <= limit:
+            return records, None
+        del records[limit:]
+        return records, records[-1][0]
+
     # --------------------------------------------------------------------------
-    # Level 4: Backup and Restore
+    # Batched GET and SET Methods
     # --------------------------------------------------------------------------
 
-    def backup(self, timestamp: int) -> int:
+    @staticmethod
+    def _pairs(items) -> tp.List[tp.Tuple[tp.Any, tp.Any]]:
+        """Accepts a mapping or an iterable of pairs, like dict.update."""
+        return list(items.items()) if isinstance(items, tp.Mapping) else list(items)
+
+    def mget_at(self, key: str, fields: tp.Iterable[str], timestamp: int) -> tp.List[str | None]:
+        """Gets several fields of one key at a timestamp; like get_at for each field, in order."""
+        records = self.db.get(key)
+        if records is None:
+            return [None for _ in fields]
+        ts = int(timestamp)
+        results = []
+        for field in fields:
+            value_info = records.get(field)
+            if value_info is None or self._is_expired(value_info, ts):
+                results.append(None)
+            else:
+                results.append(value_info[0])
+        return results
+
+    def mget_many_at(self, requests, timestamp: int) -> tp.List[tp.List[str | None]]:
         """
-        Stores a snapshot of the database and returns the number of keys
-        with at least one non-expired record at the given timestamp.
+        Runs mget_at for each (key, fields) pair of requests (a mapping or an iterable
+        of pairs) at one timestamp, returning one result list per pair.
+        """
+        ts = int(timestamp)
+        return [self.mget_at(key, fields, ts) for key, fields in self._pairs(requests)]
+
+    def mset_at(self, key: str, items, timestamp: int) -> None:
+        """Sets several fields of one key with infinite TTL; items is a mapping or (field, value) pairs."""
+        self.mset_at_with_ttl(key, items, timestamp, self._INF_TTL)
+
+    def mset_at_with_ttl(self, key: str, items, timestamp: int, ttl: int) -> None:
+        """
+        Sets several fields of one key with the same creation timestamp and TTL.
+        Equivalent to set_at_with_ttl for each (field, value) in order.
         """
+        self.mset_many_at_with_ttl(((key, items),), timestamp, ttl)
+
+    def mset_many_at(self, writes, timestamp: int) -> None:
+        """Runs mset_at for each (key, items) pair of writes at one timestamp."""
+        self.mset_many_at_with_ttl(writes, timestamp, self._INF_TTL)
+
+    def mset_many_at_with_ttl(self, writes, timestamp: int, ttl: int) -> None:
+        """Runs mset_at_with_ttl for each (key, items) pair of writes at one timestamp."""
         ts = int(timestamp)
-        snapshot = copy.deepcopy(self.db)
-        self.backups.append((ts, snapshot))
+        ttl = int(ttl)
+        if self.purge_on_write:
+            self._purge(ts, self._PURGE_ON_WRITE_LIMIT)
+        for key, items in self._pairs(writes):
+            items = self._pairs(items)
+            if items:
+                self._write_fields(key, items, ts, ttl)
+        self._compact_expiry_heap()
+
+    # --------------------------------------------------------------------------
+    # Level 4: Backup and Restore
+    # --------------------------------------------------------------------------
+
+    def _take_snapshot(self, timestamp: int) -> Snapshot:
+        return Snapshot(timestamp, self.db, self.field_order, self.time_shift,
+                        self.generation, self.generation_floors)
 
+    def _load_snapshot(self, snapshot: Snapshot | None) -> None:
+        """Points the live storage at a snapshot's, or at empty storage for None."""
+        if snapshot is None:
+            self.db = {}
+            self.field_order = {}
+        else:
+            self.db, self.field_order = snapshot.contents()
+
+    def _count_live_keys(self, timestamp: int) -> int:
         count = 0
-        for fields in snapshot.values():
-            if any(not self._is_expired(value_info, ts) for value_info in fields.values()):
+        for fields in self.db.values():
+            if any(not self._is_expired(value_info, timestamp) for value_info in fields.values()):
                 count += 1
         return count
 
+    def _add_backup(self, timestamp: int) -> Snapshot:
+        """Stores and returns a snapshot of the current state, applying backup_retention."""
+        snapshot = self._take_snapshot(timestamp)
+        # bisect_right keeps backups taken at the same timestamp in call order.
+        index = bisect.bisect_right(self.backup_times, timestamp)
+        self.backup_times.insert(index, timestamp)
+        self.backups.insert(index, snapshot)
+        if self.backup_retention is not None:
+            for index in sorted(self.backup_retention(self.backup_times, timestamp), reverse=True):
+                del self.backup_times[index]
+                del self.backups[index]
+        self._outer_shared = True
+        self.owned_keys = set()
+        return snapshot
+
+    def _snapshot_view(self, snapshot: Snapshot) -> "DatabaseImpl":
+        """Returns a shallow copy that reads the snapshot's state; only fit for reads."""
+        view = copy.copy(self)
+        view._load_snapshot(snapshot)
+        view.time_shift = snapshot.time_shift
+        view.generation = snapshot.generation
+        view.generation_floors = snapshot.generation_floors
+        return view
+
+    def backup(self, timestamp: int) -> int:
+        """
+        Stores a snapshot of the database and returns the number of keys
+        with at least one non-expired record at the given timestamp.
+        The snapshot shares the live dicts, so taking it copies nothing.
+        """
+        ts = int(timestamp)
+        self._add_backup(ts)
+        return self._count_live_keys(ts)
+
     def restore(self, timestamp: int, timestamp_to_restore: int) -> None:
         """
         Restores the database state to the latest snapshot at or before timestamp_to_restore.
-        TTLs are adjusted relative to the restore timestamp.
+        TTLs are adjusted relative to the restore timestamp by moving time_shift, and the
+        snapshot's dicts are shared until written, so restoring copies no records and is
+        O(1). The expiry heap is left stale for the next purge_expired to rebuild, except
+        with purge_on_write: there it is rebuilt here, O(stored fields), so the writes
+        that follow keep doing only their usual bounded purge work.
         """
         ts = int(timestamp)
         target_ts = int(timestamp_to_restore)
 
-        chosen = None
-        for backup_ts, snapshot in reversed(self.backups):
-            if backup_ts <= target_ts:
-                chosen = (backup_ts, snapshot)
-                break
+        index = bisect.bisect_right(self.backup_times, target_ts) - 1
+        chosen = self.backups[index] if index >= 0 else None
 
+        self._generation_counter += 1
+        self.generation = self._generation_counter
         if chosen is None:
-            self.db = {}
-            return None
-
-        backup_ts, snapshot = chosen
-        self.db = copy.deepcopy(snapshot)
-
-        for key in list(self.db.keys()):
-            fields = self.db[key]
-            for field in list(fields.keys()):
-                value, creation_ts, ttl = fields[field]
-                remaining_ttl = ttl - (backup_ts - creation_ts)
-                if remaining_ttl <= 0:
-                    del fields[field]
-                    continue
-                fields[field] = (value, ts, remaining_ttl)
-
-            if not fields:
-                del self.db[key]
-
+            self.generation_floors = {}
+        else:
+            # Records whose virtual expiry is at or before the snapshot's virtual time
+            # had expired when it was taken, and stay expired after the shift.
+            floor = chosen.timestamp - chosen.time_shift
+            floors = {generation: max(old_floor, floor)
+                      for generation, old_floor in chosen.generation_floors.items()}
+            floors[chosen.generation] = floor
+            self.generation_floors = floors
+            self.time_shift = chosen.time_shift + (ts - chosen.timestamp)
+
+        self._load_snapshot(chosen)
+        self.owned_keys = set()
+        self._outer_shared = chosen is not None
+        if self.purge_on_write:
+            self._rebuild_expiry_heap()
+        else:
+            self.expiry_heap = []
+            self._live_expiring = 0
+            self._expiry_heap_stale = True
         return None
+
+    def clone(self) -> "DatabaseImpl":
+        """
+        Returns an independent copy of the database, including its backups. Both copies
+        share storage copy-on-write, so this costs O(backups) and later writes to either
+        copy never show in the other.
+        """
+        clone = copy.copy(self)
+        for db in (self, clone):
+            db._outer_shared = True
+            db.owned_keys = set()
+        clone.backups = list(self.backups)
+        clone.backup_times = list(self.backup_times)
+        clone.expiry_heap = []
+        clone._live_expiring = 0
+        clone._expiry_heap_stale = True
+        return clone
+
+    def __getstate__(self) -> tp.Dict[str, tp.Any]:
+        # The expiry heap is derived from db and rebuilt on load.
+        state = self.__dict__.copy()
+        state["expiry_heap"] = []
+        state["_live_expiring"] = 0
+        state["_expiry_heap_stale"] = True
+        return state
+
+    def __setstate__(self, state: tp.Dict[str, tp.Any]) -> None:
+        self.__dict__.update(state)
+        self._rebuild_expiry_heap()
@@ -0,0 +1,111 @@
+from array import array
+import time
+
+from in_memory_db_impl import InMemoryDBImpl
+
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+# Marks an absent field in a row, so counters range over (_INT64_MIN, _INT64_MAX].
+_ABSENT = _INT64_MIN
+_ABSENT_ROW = array('q', [_ABSENT])
+
+
+class CompactInMemoryDBImpl(InMemoryDBImpl):
+    """
+    InMemoryDBImpl for workloads that count a small, fixed set of fields per key.
+    Field names are interned to column indices shared by all keys, and each key
+    stores its counters as one array('q') row instead of a dict, with -2**63 marking
+    absent fields. A row may be shorter than the column table; the missing columns
+    are absent too. The public API and results are identical to InMemoryDBImpl;
+    counters must lie in (-2**63, 2**63 - 1]. Columns are never freed, so field
+    names should come from a bounded set. It uses a quarter to a third less memory
+    per key at the cost of slightly slower writes (within about 10%); see
+    benchmarks/in_memory_db_memory_bench.py.
+    """
+
+    def __init__(self, lock_lease: float | None = None, clock=time.monotonic):
+        """
+        Initializes the database.
+        - db: Maps each key to its row of counters.
+        - field_index: Maps each field name ever written to its column.
+        - field_names: Column back to field name.
+        Everything else is as in InMemoryDBImpl.
+        """
+        super().__init__(lock_lease, clock)
+        self.field_index = {}
+        self.field_names = []
+
+    def _column(self, field: str) -> int:
+        column = self.field_index.get(field)
+        if column is None:
+            column = self.field_index[field] = len(self.field_names)
+            self.field_names.append(field)
+        return column
+
+    @staticmethod
+    def _overflow(key: str, field: str, total: int) -> OverflowError:
+        return OverflowError(f"{key}.{field} would be {total}, outside the int64 range")
+
+    def _read_field(self, key: str, field: str, default: int | None = None) -> int | None:
+        row = self.db.get(key)
+        column = self.field_index.get(field)
+        if row is None or column is None or column >= len(row):
+            return default
+        value = row[column]
+        return default if value == _ABSENT else value
+
+    def _inc_field(self, key: str, field: str, value: int) -> int:
+        row = self.db.get(key)
+        column = self.field_index.get(field)
+        if row is not None and column is not None and column < len(row):
+            old = row[column]
+            total = value if old == _ABSENT else old + value
+            if not _INT64_MIN < total <= _INT64_MAX:
+                raise self._overflow(key, field, total)
+            row[column] = total
+            return total
+
+        # A new key or column: check before interning the field or creating the row.
+        if not _INT64_MIN < value <= _INT64_MAX:
+            raise self._overflow(key, field, value)
+        if column is None:
+            column = self._column(field)
+        # Rows grow to the whole column table, exactly sized (concatenation does not over-allocate).
+        width = len(self.field_names)
+        row = _ABSENT_ROW * width if row is None else row + _ABSENT_ROW * (width - len(row))
+        row[column] = value
+        self.db[key] = row
+        return value
+
+    def _inc_fields(self, key: str, pairs: list[tuple[str, int]]) -> list[int]:
+        # Add into a copy of the row, so a batch that would overflow changes nothing.
+        field_index = self.field_index
+        row = self.db.get(key)
+        work = row[:] if row is not None else array('q')
+        new_columns = {}  # {field: column} for fields not interned yet
+        width = len(self.field_names)
+        results = []
+        for field, value in pairs:
+            column = field_index.get(field)
+            if column is None:
+                column = new_columns.get(field)
+                if column is None:
+                    column = new_columns[field] = width + len(new_columns)
+            if column >= len(work):
+                work = work + _ABSENT_ROW * (width + len(new_columns) - len(work))
+            old = work[column]
+            total = value if old == _ABSENT else old + value
+            if not _INT64_MIN < total <= _INT64_MAX:
+                raise self._overflow(key, field, total)
+            work[column] = total
+            results.append(total)
+
+        for field in new_columns:
+            self._column(field)
+        self.db[key] = work
+        return results
+
+    def _delete_field(self, key: str, field: str) -> None:
+        row = self.db[key]
+        row[self.field_index[field]] = _ABSENT
+        if row.count(_ABSENT) == len(row):
+            self._remove_key(key)
@@ -1,112 +1,282 @@
 from collections import deque
+from itertools import islice
+import heapq
+import time
+
+from sorted_list import SortedList
 
 
 class InMemoryDBImpl:
     """
     In-memory DB with modification counts and key-level locking.
+    With lock_lease set, a lock holder that does not unlock or renew (by calling
+    lock again) within lock_lease clock units loses the lock to the next waiter.
     """
 
-    def __init__(self):
+    def __init__(self, lock_lease: float | None = None, clock=time.monotonic):
         self.db = {}  # {key: {field: value}}
         self.modifs = {}  # {key: modification_count}
+        self.modif_buckets = {}  # {modification_count: SortedList of keys}
+        self.modif_counts = SortedList()  # counts with a non-empty bucket
         self.locks = {}  # {key: deque([caller_id, ...])}
+        self.lock_waiters = {}  # {key: {caller_id, ...}}, the callers in locks[key]
+        self.lock_lease = lock_lease
+        self.clock = clock
+        self.lock_leases = {}  # {key: (expires_at, grant, key, holder)} for held locks
+        self.lease_heap = []  # lock_leases entries by expiry; replaced ones go stale
+        self._lease_grants = 0
+
+    def _rank(self, key: str, count: int) -> None:
+        bucket = self.modif_buckets.get(count)
+        if bucket is None:
+            bucket = self.modif_buckets[count] = SortedList()
+            self.modif_counts.add(count)
+        bucket.add(key)
+
+    def _unrank(self, key: str, count: int) -> None:
+        bucket = self.modif_buckets[count]
+        bucket.remove(key)
+        if not bucket:
+            del self.modif_buckets[count]
+            self.modif_counts.remove(count)
+
+    def _inc_modif(self, key: str, by: int = 1) -> None:
+        count = self.modifs.get(key, 0)
+        if count:
+            self._unrank(key, count)
+        self.modifs[key] = count + by
+        self._rank(key, count + by)
+
+    def _drop_modif(self, key: str) -> None:
+        count = self.modifs.pop(key, None)
+        if count is not None:
+            self._unrank(key, count)
 
-    def _inc_modif(self, key: str) -> None:
-        self.modifs[key] = self.modifs.get(key, 0) + 1
+    def _grant_lease(self, key: str) -> None:
+        """Starts a lease for the current holder of key."""
+        if self.lock_lease is None:
+            return
+        self._lease_grants += 1
+        lease = (self.clock() + self.lock_lease, self._lease_grants, key, self.locks[key][0])
+        self.lock_leases[key] = lease
+        heapq.heappush(self.lease_heap, lease)
+        if len(self.lease_heap) > 2 * len(self.lock_leases) + 64:
+            self.lease_heap = list(self.lock_leases.values())
+            heapq.heapify(self.lease_heap)
+
+    def _expire_leases(self) -> None:
+        heap = self.lease_heap
+        if not heap:
+            return
+        now = self.clock()
+        while heap and heap[0][0] <= now:
+            lease = heapq.heappop(heap)
+            if self.lock_leases.get(lease[2]) is lease:
+                self._release(lease[2])
+
+    def _release(self, key: str) -> None:
+        """Removes the holder of key and hands the lock to the next waiter, if any."""
+        self.lock_waiters[key].discard(self.locks[key].popleft())
+        if self.locks[key]:
+            self._grant_lease(key)
+            return
+        del self.locks[key]
+        del self.lock_waiters[key]
+        self.lock_leases.pop(key, None)
+
+    def _remove_key(self, key: str) -> None:
+        del self.db[key]
+        self._drop_modif(key)
+        self.locks.pop(key, None)
+        self.lock_waiters.pop(key, None)
+        self.lock_leases.pop(key, None)
 
     def _is_locked(self, key: str) -> bool:
         return key in self.locks and len(self.locks[key]) > 0
 
+    # Field storage; subclasses with another layout for self.db[key] override these.
+
+    def _read_field(self, key: str, field: str, default: int | None = None) -> int | None:
+        fields = self.db.get(key)
+        if fields is None:
+            return default
+        return fields.get(field, default)
+
+    def _inc_field(self, key: str, field: str, value: int) -> int:
+        """Adds value to the field, creating the key and field as needed. Returns the new value."""
+        fields = self.db.get(key)
+        if fields is None:
+            fields = self.db[key] = {}
+        fields[field] = fields.get(field, 0) + value
+        return fields[field]
+
+    def _inc_fields(self, key: str, pairs: list[tuple[str, int]]) -> list[int]:
+        return [self._inc_field(key, field, value) for field, value in pairs]
+
+    def _delete_field(self, key: str, field: str) -> None:
+        """Removes an existing field, and the key with its last field."""
+        del self.db[key][field]
+        if not self.db[key]:
+            self._remove_key(key)
+
     def set_or_inc(self, key: str, field: str, value: int) -> int:
         value = int(value)
-        if key not in self.db:
-            self.db[key] = {field: value}
-            self._inc_modif(key)
-            return value
+        self._expire_leases()
+        if self._is_locked(key):
+            return self._read_field(key, field, 0)
 
-        if not self._is_locked(key):
-            self.db[key][field] = self.db[key].get(field, 0) + value
-            self._inc_modif(key)
-            return self.db[key][field]
+        value = self._inc_field(key, field, value)
+        self._inc_modif(key)
+        return value
+
+    def set_or_inc_many(self, key: str, fields, values) -> list[int]:
+        """
+        Adds each value to the field at the same position, as set_or_inc would one
+        pair at a time, and returns the results. fields and values must be the same length.
+        """
+        pairs = [(field, int(value)) for field, value in zip(fields, values, strict=True)]
+        self._expire_leases()
+        if self._is_locked(key):
+            return [self._read_field(key, field, 0) for field, _ in pairs]
+        if not pairs:
+            return []
 
-        return self.db[key].get(field, 0)
+        results = self._inc_fields(key, pairs)
+        self._inc_modif(key, len(pairs))
+        return results
 
     def get(self, key: str, field: str) -> int | None:
-        if key not in self.db:
-            return None
-        if field not in self.db[key]:
-            return None
-        return self.db[key][field]
+        return self._read_field(key, field)
 
     def delete(self, key: str, field: str) -> bool:
-        if key not in self.db or field not in self.db[key]:
+        self._expire_leases()
+        if self._read_field(key, field) is None:
             return False
         if self._is_locked(key):
             return False
 
-        del self.db[key][field]
         self._inc_modif(key)
-        if not self.db[key]:
-            del self.db[key]
-            self.modifs.pop(key, None)
-            self.locks.pop(key, None)
+        self._delete_field(key, field)
         return True
 
+    def _top_n(self, n: int) -> list[tuple[str, int]]:
+        """The n most modified (key, count) pairs, by count descending then key."""
+        ranked = []
+        for count in reversed(self.modif_counts):
+            if len(ranked) >= n:
+                break
+            for k in islice(self.modif_buckets[count], n - len(ranked)):
+                ranked.append((k, count))
+        return ranked
+
     def top_n_keys(self, n: int) -> str:
         n = int(n)
-        candidates = sorted(self.modifs.items(), key=lambda item: (-item[1], item[0]))[:n]
-        return ", ".join([f"{k}({v})" for k, v in candidates])
+        if n < 0:
+            # Matches slicing the full ranking with a negative stop.
+            n = max(0, len(self.modifs) + n)
+        return ", ".join(f"{k}({count})" for k, count in self._top_n(n))
 
     def set_or_inc_by_caller(self, key: str, field: str, value: int, caller_id: str) -> int:
         value = int(value)
-        if key not in self.db:
-            self.db[key] = {field: value}
-            self._inc_modif(key)
-            return value
-
-        if not self._is_locked(key):
-            self.db[key][field] = self.db[key].get(field, 0) + value
-            self._inc_modif(key)
-            return self.db[key][field]
-
-        if self.locks[key][0] == caller_id:
-            self.db[key][field] = self.db[key].get(field, 0) + value
-            self._inc_modif(key)
-            return self.db[key][field]
+        self._expire_leases()
+        if self._is_locked(key) and self.locks[key][0] != caller_id:
+            return self._read_field(key, field, 0)
 
-        return self.db[key].get(field, 0)
+        value = self._inc_field(key, field, value)
+        self._inc_modif(key)
+        return value
 
     def delete_by_caller(self, key: str, field: str, caller_id: str) -> bool:
-        if key not in self.db or field not in self.db[key]:
+        self._expire_leases()
+        if self._read_field(key, field) is None:
             return False
         if self._is_locked(key) and self.locks[key][0] != caller_id:
             return False
 
-        del self.db[key][field]
         self._inc_modif(key)
-        if not self.db[key]:
-            del self.db[key]
-            self.modifs.pop(key, None)
-            self.locks.pop(key, None)
+        self._delete_field(key, field)
         return True
 
     def lock(self, caller_id: str, key: str) -> str:
+        self._expire_leases()
         if key not in self.db:
             return "invalid_request"
         if not self._is_locked(key):
             self.locks[key] = deque([caller_id])
+            self.lock_waiters[key] = {caller_id}
+            self._grant_lease(key)
             return "acquired"
-        if self.locks[key][0] == caller_id or caller_id in self.locks[key]:
+        if caller_id in self.lock_waiters[key]:
+            if self.locks[key][0] == caller_id:
+                self._grant_lease(key)
             return ""
         self.locks[key].append(caller_id)
+        self.lock_waiters[key].add(caller_id)
         return "wait"
 
     def unlock(self, key: str) -> str:
+        self._expire_leases()
         if key not in self.db:
             return "invalid_request"
         if not self._is_locked(key):
             return ""
-        self.locks[key].popleft()
-        if not self.locks[key]:
-            del self.locks[key]
+        self._release(key)
         return "released"
+
+    def deadlocks(self) -> list[list[str]]:
+        """
+        Finds callers that can never get their locks: builds the wait-for graph, where
+        each queued caller waits for the caller ahead of it in the key's queue, and
+        returns the callers of each cycle-bearing strongly connected component, sorted.
+        """
+        self._expire_leases()
+        waits_for = {}
+        self._add_wait_edges(waits_for)
+        return self._deadlocked_groups(waits_for)
+
+    def _add_wait_edges(self, waits_for: dict) -> None:
+        """Adds this database's wait-for edges to waits_for, {caller: [caller waited for, ...]}."""
+        for queue in self.locks.values():
+            for ahead, behind in zip(queue, list(queue)[1:]):
+                waits_for.setdefault(behind, []).append(ahead)
+
+    @staticmethod
+    def _deadlocked_groups(waits_for: dict) -> list[list[str]]:
+        # Iterative Tarjan; every edge joins two distinct callers, so only
+        # components with more than one caller contain a cycle.
+        index_of, lowlink, on_stack = {}, {}, set()
+        stack, groups = [], []
+        for root in waits_for:
+            if root in index_of:
+                continue
+            work = [(root, iter(waits_for.get(root, ())))]
+            index_of[root] = lowlink[root] = len(index_of)
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                caller, edges = work[-1]
+                for target in edges:
+                    if target not in index_of:
+                        index_of[target] = lowlink[target] = len(index_of)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(waits_for.get(target, ()))))
+                        break
+                    if target in on_stack:
+                        lowlink[caller] = min(lowlink[caller], index_of[target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[caller])
+                    if lowlink[caller] == index_of[caller]:
+                        group = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            group.append(member)
+                            if member == caller:
+                                break
+                        if len(group) > 1:
+                            groups.append(sorted(group))
+        return sorted(groups)
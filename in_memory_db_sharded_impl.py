@@ -0,0 +1,77 @@
+import heapq
+import itertools
+import time
+
+from in_memory_db_threaded_impl import ThreadedInMemoryDBImpl
+
+
+class ShardedInMemoryDBImpl:
+    """
+    Thread-safe InMemoryDBImpl with keys sharded by hash over independent
+    ThreadedInMemoryDBImpl shards, each behind its own mutex. Calls on different
+    shards, including blocking lock() calls, run without contention.
+
+    top_n_keys and deadlocks span shards. top_n_keys merges the top n of each
+    shard, taking one shard mutex at a time, so concurrent writes may land between
+    shards. deadlocks holds every shard mutex, in ascending shard index, while it
+    reads the lock queues, because a caller may be queued on keys of several shards.
+    """
+
+    def __init__(self, num_shards: int = 16, lock_lease: float | None = None, clock=time.monotonic,
+                 clock_unit: float = 1.0):
+        self.shards = [ThreadedInMemoryDBImpl(lock_lease, clock, clock_unit) for _ in range(max(1, int(num_shards)))]
+
+    def _shard(self, key: str) -> ThreadedInMemoryDBImpl:
+        return self.shards[hash(key) % len(self.shards)]
+
+    def set_or_inc(self, key: str, field: str, value: int) -> int:
+        return self._shard(key).set_or_inc(key, field, value)
+
+    def set_or_inc_many(self, key: str, fields, values) -> list[int]:
+        return self._shard(key).set_or_inc_many(key, fields, values)
+
+    def get(self, key: str, field: str) -> int | None:
+        return self._shard(key).get(key, field)
+
+    def delete(self, key: str, field: str) -> bool:
+        return self._shard(key).delete(key, field)
+
+    def top_n_keys(self, n: int) -> str:
+        n = int(n)
+        rankings = []
+        num_keys = 0
+        for shard in self.shards:
+            with shard._mutex:
+                num_keys += len(shard.modifs)
+                # A negative n can't be resolved until every shard is counted.
+                rankings.append(shard._top_n(n if n >= 0 else len(shard.modifs)))
+        if n < 0:
+            n = max(0, num_keys + n)
+        merged = heapq.merge(*rankings, key=lambda ranked: (-ranked[1], ranked[0]))
+        return ", ".join(f"{k}({count})" for k, count in itertools.islice(merged, n))
+
+    def set_or_inc_by_caller(self, key: str, field: str, value: int, caller_id: str) -> int:
+        return self._shard(key).set_or_inc_by_caller(key, field, value, caller_id)
+
+    def delete_by_caller(self, key: str, field: str, caller_id: str) -> bool:
+        return self._shard(key).delete_by_caller(key, field, caller_id)
+
+    def lock(self, caller_id: str, key: str, timeout: float | None = 0.0) -> str:
+        """As ThreadedInMemoryDBImpl.lock; a blocked caller holds no shard mutex while it waits."""
+        return self._shard(key).lock(caller_id, key, timeout)
+
+    def unlock(self, key: str) -> str:
+        return self._shard(key).unlock(key)
+
+    def deadlocks(self) -> list[list[str]]:
+        waits_for = {}
+        for shard in self.shards:
+            shard._mutex.acquire()
+        try:
+            for shard in self.shards:
+                shard._expire_leases()
+                shard._add_wait_edges(waits_for)
+        finally:
+            for shard in reversed(self.shards):
+                shard._mutex.release()
+        return ThreadedInMemoryDBImpl._deadlocked_groups(waits_for)
@@ -0,0 +1,111 @@
+import threading
+import time
+
+from in_memory_db_impl import InMemoryDBImpl
+
+
+class ThreadedInMemoryDBImpl(InMemoryDBImpl):
+    """
+    Thread-safe InMemoryDBImpl whose lock() can block until the caller reaches the
+    front of the key's queue. Every method runs under one mutex; blocked callers wait
+    on a per-key condition variable that is notified whenever the key's holder
+    changes: on unlock(), lease expiry and key removal. Blocked callers also wake
+    for the next lease expiry, so an expired holder is replaced without other calls.
+    clock_unit is the length in seconds of one clock unit, used to turn the time left
+    on a lease into a wait; with a clock that does not follow real time (a manual
+    test clock), a blocked caller rechecks leases that often and on every notify.
+    """
+
+    def __init__(self, lock_lease: float | None = None, clock=time.monotonic, clock_unit: float = 1.0):
+        super().__init__(lock_lease, clock)
+        if clock_unit <= 0:
+            raise ValueError(f"clock_unit must be positive, got {clock_unit!r}")
+        self.clock_unit = clock_unit
+        self._mutex = threading.Lock()
+        self._conditions = {}  # {key: threading.Condition}, for keys with blocked callers
+
+    def _release(self, key: str) -> None:
+        super()._release(key)
+        self._notify(key)
+
+    def _remove_key(self, key: str) -> None:
+        super()._remove_key(key)
+        self._notify(key)
+
+    def _notify(self, key: str) -> None:
+        """Must hold the mutex. Wakes the callers blocked on key."""
+        condition = self._conditions.get(key)
+        if condition is None:
+            return
+        condition.notify_all()
+        if key not in self.locks:
+            del self._conditions[key]
+
+    def set_or_inc(self, key: str, field: str, value: int) -> int:
+        with self._mutex:
+            return super().set_or_inc(key, field, value)
+
+    def set_or_inc_many(self, key: str, fields, values) -> list[int]:
+        with self._mutex:
+            return super().set_or_inc_many(key, fields, values)
+
+    def get(self, key: str, field: str) -> int | None:
+        with self._mutex:
+            return super().get(key, field)
+
+    def delete(self, key: str, field: str) -> bool:
+        with self._mutex:
+            return super().delete(key, field)
+
+    def top_n_keys(self, n: int) -> str:
+        with self._mutex:
+            return super().top_n_keys(n)
+
+    def set_or_inc_by_caller(self, key: str, field: str, value: int, caller_id: str) -> int:
+        with self._mutex:
+            return super().set_or_inc_by_caller(key, field, value, caller_id)
+
+    def delete_by_caller(self, key: str, field: str, caller_id: str) -> bool:
+        with self._mutex:
+            return super().delete_by_caller(key, field, caller_id)
+
+    def lock(self, caller_id: str, key: str, timeout: float | None = 0.0) -> str:
+        """
+        As InMemoryDBImpl.lock, but a caller that is queued behind another waits up to
+        timeout seconds (forever for None) for its turn and then returns "acquired".
+        On timeout the caller stays queued and the non-blocking result is returned.
+        A caller whose queue entry is gone when it wakes gets "invalid_request": the key
+        was removed (even if it has been created again since), or the caller reached
+        the front and lost the lock to lease expiry before it woke. It is not re-queued.
+        """
+        with self._mutex:
+            result = super().lock(caller_id, key)
+            if timeout == 0 or result in ("acquired", "invalid_request") or self.locks[key][0] == caller_id:
+                return result
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            condition = self._conditions.get(key)
+            if condition is None:
+                condition = self._conditions[key] = threading.Condition(self._mutex)
+            while True:
+                self._expire_leases()
+                queue = self.locks.get(key)
+                if queue is None or caller_id not in self.lock_waiters[key]:
+                    return "invalid_request"
+                if queue[0] == caller_id:
+                    return "acquired"
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return result
+                if self.lease_heap:
+                    until_expiry = max(0.0, self.lease_heap[0][0] - self.clock()) * self.clock_unit
+                    remaining = until_expiry if remaining is None else min(remaining, until_expiry)
+                condition.wait(remaining)
+
+    def unlock(self, key: str) -> str:
+        with self._mutex:
+            return super().unlock(key)
+
+    def deadlocks(self) -> list[list[str]]:
+        with self._mutex:
+            return super().deadlocks()
@@ -0,0 +1,102 @@
+from itertools import chain, islice
+import bisect
+
+
+class SortedList:
+    """
+    A list kept in ascending order, stored as a list of buckets of at most
+    2 * load items. add and remove bisect the bucket maxima and then shift only
+    the items of one bucket, so both are O(log n + load) instead of O(n).
+
+    With key, items are ordered by key(item); an item's key must not change while
+    it is in the list (remove it, update it, then add it back).
+    """
+
+    def __init__(self, iterable=(), key=None, load: int = 512):
+        self._key = key
+        self._load = max(8, int(load))
+        self._items = []  # buckets of items
+        self._keys = []  # buckets of sort keys; the item buckets themselves without key
+        self._maxes = []  # last key of each bucket
+        self._len = 0
+        for item in iterable:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self):
+        return chain.from_iterable(self._items)
+
+    def __reversed__(self):
+        return chain.from_iterable(map(reversed, reversed(self._items)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) and index.step is None:
+            start, stop = index.start or 0, index.stop
+            if start >= 0 and (stop is None or stop >= 0):
+                return list(islice(self, start, stop))
+        return list(self)[index]
+
+    def __repr__(self) -> str:
+        return f"SortedList({list(self)!r})"
+
+    def add(self, item) -> None:
+        key = item if self._key is None else self._key(item)
+        maxes = self._maxes
+        if not maxes:
+            self._items.append([item])
+            self._keys.append(self._items[-1] if self._key is None else [key])
+            maxes.append(key)
+            self._len = 1
+            return
+
+        pos = bisect.bisect_right(maxes, key)
+        if pos == len(maxes):
+            pos -= 1
+            maxes[pos] = key
+            row = len(self._items[pos])
+        else:
+            row = bisect.bisect_right(self._keys[pos], key)
+        self._items[pos].insert(row, item)
+        if self._key is not None:
+            self._keys[pos].insert(row, key)
+        self._len += 1
+        if len(self._items[pos]) > 2 * self._load:
+            self._split(pos)
+
+    def _split(self, pos: int) -> None:
+        load = self._load
+        items = self._items[pos]
+        self._items.insert(pos + 1, items[load:])
+        del items[load:]
+        if self._key is None:
+            self._keys.insert(pos + 1, self._items[pos + 1])
+        else:
+            keys = self._keys[pos]
+            self._keys.insert(pos + 1, keys[load:])
+            del keys[load:]
+        self._maxes.insert(pos + 1, self._maxes[pos])
+        self._maxes[pos] = self._keys[pos][-1]
+
+    def remove(self, item) -> None:
+        """Removes one item equal to item (by key, with key). Raises ValueError if there is none."""
+        key = item if self._key is None else self._key(item)
+        pos = bisect.bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            raise ValueError(f"{item!r} not in list")
+        keys = self._keys[pos]
+        row = bisect.bisect_left(keys, key)
+        if keys[row] != key:
+            raise ValueError(f"{item!r} not in list")
+
+        del self._items[pos][row]
+        if self._key is not None:
+            del keys[row]
+        self._len -= 1
+        if keys:
+            self._maxes[pos] = keys[-1]
+        else:
+            del self._items[pos]
+            del self._keys[pos]
+            del self._maxes[pos]
@@ -0,0 +1,80 @@
+import asyncio
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from banking_system_async import AsyncBankingService
+
+
+class _FakeClock:
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self) -> int:
+        return self.value
+
+
+class AsyncBankingServiceTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.clock = _FakeClock()
+        self.service = AsyncBankingService(clock=self.clock, tick=0.001, slice_size=10)
+
+    @timeout(1)
+    def test_async_case_01_timer_executes_payments_without_requests(self):
+        async def scenario():
+            async with self.service:
+                await self.service.create_account("acc")
+                await self.service.deposit("acc", 100)
+                payment_id = await self.service.schedule_payment("acc", 40, 5)
+                self.clock.value = 5
+                await asyncio.sleep(0.02)
+                return payment_id
+
+        payment_id = asyncio.run(scenario())
+        self.assertEqual(self.service.system.payment_history[payment_id]['status'], 'COMPLETED')
+        self.assertEqual(self.service.system.accounts["acc"]['balance'], 60)
+
+    @timeout(1)
+    def test_async_case_02_backlog_is_drained_in_slices(self):
+        progress = []
+
+        async def other_work():
+            for i in range(5):
+                progress.append(len(self.service.system.payment_history))
+                await asyncio.sleep(0)
+
+        async def scenario():
+            await self.service.create_account("acc")
+            await self.service.deposit("acc", 1000)
+            for _ in range(100):
+                await self.service.schedule_payment("acc", 1, 1)
+            self.clock.value = 1
+            balance, _ = await asyncio.gather(self.service.deposit("acc", 0), other_work())
+            return balance
+
+        self.assertEqual(asyncio.run(scenario()), 900)
+        # The other coroutine ran while the request was still draining the backlog.
+        self.assertLess(progress[0], 100)
+        self.assertGreater(progress[-1], progress[0])
+
+    @timeout(1)
+    def test_async_case_03_timestamps_never_move_backwards(self):
+        async def scenario():
+            await self.service.create_account("acc")
+            await self.service.deposit("acc", 50)
+            self.clock.value = 10
+            payment_id = await self.service.schedule_payment("acc", 20, 5)
+            self.clock.value = 3
+            self.assertEqual(self.service.now(), 10)
+            self.assertTrue(await self.service.cancel_payment("acc", payment_id))
+            return await self.service.top_spenders(1)
+
+        self.assertEqual(asyncio.run(scenario()), [])
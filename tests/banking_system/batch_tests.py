@@ -0,0 +1,60 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class BankingSystemBatchTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.system = BankingSystemImpl()
+
+    @timeout(0.4)
+    def test_batch_case_01_results_match_single_calls(self):
+        ops = [
+            ("create_account", 1, "a"),
+            ("create_account", 2, "b"),
+            ("create_account", 3, "a"),
+            ("deposit", 4, "a", 100),
+            ("pay", 5, "a", 10),
+            ("transfer", 6, "a", "b", 20),
+            ("schedule_payment", 7, "a", 30, 2),
+            ("cancel_payment", 8, "b", "payment1"),
+            ("deposit", 9, "a", 0),
+            ("top_spenders", 10, 2),
+        ]
+        self.assertEqual(
+            self.system.apply_batch(ops),
+            [True, True, False, 100, 90, 70, "payment1", False, 40, ["a"]],
+        )
+
+    @timeout(0.4)
+    def test_batch_case_02_delay_zero_runs_before_next_op_same_timestamp(self):
+        self.system.apply_batch([("create_account", 1, "acc"), ("deposit", 2, "acc", 100)])
+        results = self.system.apply_batch([
+            ("schedule_payment", 3, "acc", 30, 0),
+            ("cancel_payment", 3, "acc", "payment1"),
+            ("deposit", 3, "acc", 0),
+        ])
+        self.assertEqual(results, ["payment1", False, 70])
+
+    @timeout(0.4)
+    def test_batch_case_03_continues_single_call_state(self):
+        self.system.create_account(1, "acc")
+        self.system.deposit(2, "acc", 50)
+        self.system.schedule_payment(3, "acc", 20, 5)
+        self.assertEqual(self.system.apply_batch([("pay", 8, "acc", 5)]), [25])
+        self.assertEqual(self.system.top_spenders(9, 1), ["acc"])
+
+    @timeout(0.4)
+    def test_batch_case_04_unknown_op_raises(self):
+        with self.assertRaises(ValueError):
+            self.system.apply_batch([("withdraw", 1, "acc", 10)])
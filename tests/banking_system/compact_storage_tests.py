@@ -0,0 +1,77 @@
+import inspect
+import os
+import random
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from banking_system_compact_impl import CANCELED, COMPLETED, SKIPPED, CompactBankingSystemImpl
+from banking_system_impl import BankingSystemImpl
+
+
+def _random_ops(seed: int, count: int) -> list[tuple]:
+    rng = random.Random(seed)
+    accounts = [f"acc{i}" for i in range(6)]
+    ops = []
+    timestamp = 0
+    for _ in range(count):
+        timestamp += rng.choice([0, 0, 1, 2])
+        kind = rng.randrange(8)
+        if kind == 0:
+            ops.append(("create_account", timestamp, rng.choice(accounts)))
+        elif kind == 1:
+            ops.append(("deposit", timestamp, rng.choice(accounts + ["ghost"]), rng.randint(-5, 100)))
+        elif kind == 2:
+            ops.append(("pay", timestamp, rng.choice(accounts), rng.randint(-5, 60)))
+        elif kind == 3:
+            ops.append(("transfer", timestamp, rng.choice(accounts), rng.choice(accounts), rng.randint(-5, 60)))
+        elif kind == 4:
+            ops.append(("top_spenders", timestamp, rng.randint(0, 8)))
+        elif kind == 5:
+            ops.append(("schedule_payment", timestamp, rng.choice(accounts), rng.randint(-5, 60), rng.randint(-1, 5)))
+        elif kind == 6:
+            ops.append(("list_pending_payments", timestamp, rng.choice(accounts + ["ghost"])))
+        else:
+            ops.append(("cancel_payment", timestamp, rng.choice(accounts), f"payment{rng.randint(0, 30)}"))
+    return ops
+
+
+class CompactBankingSystemTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.system = CompactBankingSystemImpl()
+
+    @timeout(0.4)
+    def test_compact_case_01_payment_statuses_are_columnar(self):
+        self.system.create_account(1, "acc")
+        self.system.deposit(2, "acc", 50)
+        p1 = self.system.schedule_payment(3, "acc", 30, 1)
+        self.system.schedule_payment(3, "acc", 30, 1)
+        p3 = self.system.schedule_payment(3, "acc", 10, 10)
+        self.assertTrue(self.system.cancel_payment(5, "acc", p3))
+        self.assertEqual(list(self.system.payment_status[1:]), [COMPLETED, SKIPPED, CANCELED])
+        self.assertEqual(self.system.scheduled_payments, {})
+        self.assertFalse(self.system.cancel_payment(6, "acc", p1))
+
+    @timeout(0.4)
+    def test_compact_case_02_malformed_payment_ids(self):
+        self.system.create_account(1, "acc")
+        self.system.schedule_payment(2, "acc", 10, 10)
+        for payment_id in ["payment01", "payment", "payment-1", "payment2", "pay1", None]:
+            self.assertFalse(self.system.cancel_payment(3, "acc", payment_id))
+        self.assertTrue(self.system.cancel_payment(3, "acc", "payment1"))
+
+    @timeout(2)
+    def test_compact_case_03_matches_dict_backend(self):
+        for seed in range(100):
+            ops = _random_ops(seed, 150)
+            reference = BankingSystemImpl()
+            compact = CompactBankingSystemImpl()
+            expected = [getattr(reference, op[0])(*op[1:]) for op in ops]
+            self.assertEqual([getattr(compact, op[0])(*op[1:]) for op in ops], expected)
+            self.assertEqual(CompactBankingSystemImpl().apply_batch(ops), expected)
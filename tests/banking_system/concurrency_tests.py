@@ -0,0 +1,112 @@
+import inspect
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from banking_system_concurrent_impl import ConcurrentBankingSystemImpl
+from banking_system_impl import BankingSystemImpl
+from banking_system_wal import DurableBankingSystem
+
+
+def _run_threads(targets) -> None:
+    threads = [threading.Thread(target=target) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class ConcurrentBankingSystemTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.system = ConcurrentBankingSystemImpl(num_shards=4)
+
+    @timeout(0.4)
+    def test_concurrent_case_01_single_thread_matches_reference_semantics(self):
+        self.system.create_account(1, "a")
+        self.system.create_account(2, "b")
+        self.system.deposit(3, "a", 100)
+        self.assertEqual(self.system.transfer(4, "a", "b", 30), 70)
+        payment_id = self.system.schedule_payment(5, "b", 10, 0)
+        self.assertFalse(self.system.cancel_payment(5, "b", payment_id))
+        self.assertEqual(self.system.top_spenders(6, 2), ["a", "b"])
+        self.assertEqual(self.system.deposit(7, "b", 0), 20)
+
+    @timeout(5)
+    def test_concurrent_case_02_opposing_transfers_conserve_money(self):
+        accounts = [f"acc{i}" for i in range(8)]
+        for account_id in accounts:
+            self.system.create_account(1, account_id)
+            self.system.deposit(2, account_id, 1000)
+
+        def worker(offset: int):
+            for i in range(2000):
+                source = accounts[(i + offset) % len(accounts)]
+                target = accounts[(i * 3 + offset + 1) % len(accounts)]
+                self.system.transfer(3, source, target, 1 + i % 5)
+
+        _run_threads([lambda offset=offset: worker(offset) for offset in range(6)])
+        total = sum(self.system.deposit(4, account_id, 0) for account_id in accounts)
+        self.assertEqual(total, 8000)
+
+    @timeout(5)
+    def test_concurrent_case_03_scheduled_payments_run_in_timestamp_order(self):
+        self.system.create_account(1, "payer")
+        self.system.deposit(2, "payer", 30)
+        for i in range(40):
+            self.system.create_account(3, f"acc{i}")
+        # Later payments are scheduled first so creation order disagrees with exec_time.
+        late = self.system.schedule_payment(4, "payer", 20, 10)
+        early = self.system.schedule_payment(5, "payer", 20, 5)
+
+        _run_threads([
+            lambda i=i: self.system.deposit(20, f"acc{i}", 1) for i in range(40)
+        ])
+        self.assertEqual(self.system.payment_history[early]['status'], 'COMPLETED')
+        self.assertEqual(self.system.payment_history[late]['status'], 'SKIPPED')
+        self.assertEqual(self.system.deposit(21, "payer", 0), 10)
+
+    @timeout(1)
+    def test_concurrent_case_04_top_spenders_merges_shard_rankings(self):
+        reference = BankingSystemImpl()
+        for system in (self.system, reference):
+            for i in range(30):
+                system.create_account(1, f"acc{i:02d}")
+                system.deposit(2, f"acc{i:02d}", 100)
+                system.pay(3, f"acc{i:02d}", 1 + i % 7)
+        for n in (0, 1, 5, 30, 40, -1, -25, -40):
+            self.assertEqual(self.system.top_spenders(4, n), reference.top_spenders(4, n))
+
+    @timeout(2)
+    def test_concurrent_case_05_pickles_and_persists(self):
+        self.system.create_account(1, "a")
+        self.system.deposit(2, "a", 100)
+        self.system.pay(3, "a", 10)
+        copy = pickle.loads(pickle.dumps(self.system))
+        self.assertEqual(copy.transfer(4, "a", "a", 1), None)
+        self.assertEqual(copy.pay(5, "a", 5), 85)
+        self.assertEqual(copy.top_spenders(6, 1), ["a"])
+
+        directory = tempfile.mkdtemp()
+        try:
+            with DurableBankingSystem(directory, system_factory=ConcurrentBankingSystemImpl) as durable:
+                durable.create_account(1, "a")
+                durable.deposit(2, "a", 50)
+                durable.schedule_payment(3, "a", 20, 5)
+                durable.snapshot()
+            with DurableBankingSystem(directory, system_factory=ConcurrentBankingSystemImpl) as durable:
+                self.assertIsInstance(durable.system, ConcurrentBankingSystemImpl)
+                self.assertEqual(durable.top_spenders(9, 1), ["a"])
+                self.assertEqual(durable.deposit(10, "a", 0), 30)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
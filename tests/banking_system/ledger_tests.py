@@ -0,0 +1,62 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class BankingSystemLedgerTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.system = BankingSystemImpl(keep_ledger=True)
+
+    @timeout(0.4)
+    def test_ledger_case_01_balance_at_past_times(self):
+        self.system.create_account(1, "a")
+        self.system.create_account(2, "b")
+        self.system.deposit(3, "a", 100)
+        self.system.pay(5, "a", 20)
+        self.system.transfer(7, "a", "b", 30)
+        self.assertIsNone(self.system.get_balance(8, "a", 0))
+        self.assertEqual(self.system.get_balance(8, "a", 1), 0)
+        self.assertEqual(self.system.get_balance(8, "a", 4), 100)
+        self.assertEqual(self.system.get_balance(8, "a", 5), 80)
+        self.assertEqual(self.system.get_balance(8, "a", 8), 50)
+        self.assertEqual(self.system.get_balance(8, "b", 6), 0)
+        self.assertEqual(self.system.get_balance(8, "b", 7), 30)
+        self.assertIsNone(self.system.get_balance(8, "missing", 8))
+
+    @timeout(0.4)
+    def test_ledger_case_02_scheduled_payment_recorded_at_exec_time(self):
+        self.system.create_account(1, "a")
+        self.system.deposit(2, "a", 100)
+        self.system.schedule_payment(3, "a", 40, 5)
+        self.assertEqual(self.system.get_balance(20, "a", 7), 100)
+        self.assertEqual(self.system.get_balance(20, "a", 8), 60)
+
+    @timeout(0.4)
+    def test_ledger_case_03_retention_bounds_history(self):
+        system = BankingSystemImpl(keep_ledger=True, ledger_retention=3)
+        system.create_account(1, "a")
+        for t in range(2, 50):
+            system.deposit(t, "a", 1)
+        times, _ = system.ledger["a"]
+        self.assertLess(len(times), 6)
+        self.assertEqual(system.get_balance(50, "a", 49), 48)
+        self.assertEqual(system.get_balance(50, "a", 47), 46)
+        self.assertIsNone(system.get_balance(50, "a", 2))
+
+    @timeout(0.4)
+    def test_ledger_case_04_disabled_by_default(self):
+        system = BankingSystemImpl()
+        system.create_account(1, "a")
+        system.deposit(2, "a", 10)
+        self.assertIsNone(system.ledger)
+        self.assertIsNone(system.get_balance(3, "a", 2))
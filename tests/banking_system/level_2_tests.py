@@ -104,3 +104,27 @@ class BankingSystemLevel2Tests(unittest.TestCase):
         self.system.deposit(3, "a", 10)
         self.assertIsNone(self.system.transfer(4, "a", "b", 20))
         self.assertEqual(self.system.top_spenders(5, 2), [])
+
+    @timeout(0.4)
+    def test_level2_case_11_ranking_moves_on_repeated_spends(self):
+        for i, acc in enumerate(["a", "b", "c"]):
+            self.system.create_account(1 + i, acc)
+            self.system.deposit(4 + i, acc, 100)
+        self.system.pay(7, "a", 10)
+        self.system.pay(8, "b", 20)
+        self.system.transfer(9, "c", "a", 15)
+        self.assertEqual(self.system.top_spenders(10, 3), ["b", "c", "a"])
+        self.system.pay(11, "a", 10)
+        self.system.schedule_payment(12, "c", 6, 0)
+        self.assertEqual(self.system.top_spenders(12, 3), ["c", "a", "b"])
+
+    @timeout(1)
+    def test_level2_case_12_top_spenders_many_accounts(self):
+        for i in range(5000):
+            acc = f"acc{i:05d}"
+            self.system.create_account(1, acc)
+            self.system.deposit(2, acc, 10)
+            self.system.pay(3, acc, 1 + i % 7)
+        expected = ["acc00006", "acc00013", "acc00020"]
+        for t in range(4, 2004):
+            self.assertEqual(self.system.top_spenders(t, 3), expected)
@@ -0,0 +1,92 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from banking_system_impl import BankingSystemImpl
+
+
+class BankingSystemSchedulerTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.system = BankingSystemImpl()
+
+    @timeout(0.4)
+    def test_scheduler_case_01_finished_payments_leave_pending_set(self):
+        self.system.create_account(1, "acc")
+        self.system.deposit(2, "acc", 50)
+        p1 = self.system.schedule_payment(3, "acc", 30, 1)
+        p2 = self.system.schedule_payment(3, "acc", 30, 1)
+        p3 = self.system.schedule_payment(3, "acc", 10, 10)
+        self.assertTrue(self.system.cancel_payment(5, "acc", p3))
+        self.assertEqual(self.system.scheduled_payments, {})
+        self.assertEqual(self.system.payment_history[p1]['status'], 'COMPLETED')
+        self.assertEqual(self.system.payment_history[p2]['status'], 'SKIPPED')
+        self.assertEqual(self.system.payment_history[p3]['status'], 'CANCELED')
+
+    @timeout(0.4)
+    def test_scheduler_case_02_same_exec_time_runs_in_creation_order(self):
+        self.system.create_account(1, "acc")
+        self.system.deposit(2, "acc", 100)
+        for i in range(12):
+            self.system.schedule_payment(3 + i, "acc", 10, 20 - i)
+        # All twelve execute at t=23 in payment id order; the 11th and 12th are skipped.
+        self.assertEqual(self.system.deposit(23, "acc", 0), 0)
+        self.assertEqual(self.system.payment_history["payment10"]['status'], 'COMPLETED')
+        self.assertEqual(self.system.payment_history["payment11"]['status'], 'SKIPPED')
+
+    @timeout(0.4)
+    def test_scheduler_case_03_canceled_entries_are_compacted(self):
+        self.system.create_account(1, "acc")
+        payment_ids = [self.system.schedule_payment(2, "acc", 1, 10**9) for _ in range(100)]
+        for payment_id in payment_ids:
+            self.assertTrue(self.system.cancel_payment(3, "acc", payment_id))
+        self.assertLessEqual(len(self.system.payment_queue), 1)
+
+    @timeout(1)
+    def test_scheduler_case_04_history_does_not_slow_calls(self):
+        self.system.create_account(1, "acc")
+        self.system.deposit(2, "acc", 10**9)
+        for i in range(20000):
+            self.system.schedule_payment(3, "acc", 1, 0)
+        self.system.deposit(4, "acc", 0)
+        for t in range(5, 20005):
+            self.system.deposit(t, "acc", 0)
+        self.assertEqual(self.system.deposit(20005, "acc", 0), 10**9 - 20000)
+
+    @timeout(0.4)
+    def test_scheduler_case_05_drain_due_payments_in_slices(self):
+        self.system.create_account(1, "acc")
+        self.system.deposit(2, "acc", 100)
+        for _ in range(5):
+            self.system.schedule_payment(3, "acc", 10, 2)
+        self.system.schedule_payment(3, "acc", 10, 9)
+        self.assertTrue(self.system.drain_due_payments(5, 2))
+        self.assertEqual(len(self.system.payment_history), 2)
+        self.assertTrue(self.system.drain_due_payments(5, 2))
+        self.assertFalse(self.system.drain_due_payments(5, 2))
+        self.assertEqual(len(self.system.scheduled_payments), 1)
+        self.assertEqual(self.system.deposit(6, "acc", 0), 50)
+
+    @timeout(0.4)
+    def test_scheduler_case_06_list_pending_payments_per_account(self):
+        self.system.create_account(1, "a")
+        self.system.create_account(2, "b")
+        self.system.deposit(3, "a", 100)
+        p1 = self.system.schedule_payment(4, "a", 10, 1)
+        p2 = self.system.schedule_payment(4, "b", 10, 10)
+        p3 = self.system.schedule_payment(4, "a", 10, 10)
+        p4 = self.system.schedule_payment(4, "a", 10, 20)
+        self.assertEqual(self.system.list_pending_payments(4, "a"), [p1, p3, p4])
+        self.assertEqual(self.system.list_pending_payments(5, "a"), [p3, p4])
+        self.assertTrue(self.system.cancel_payment(6, "a", p3))
+        self.assertEqual(self.system.list_pending_payments(7, "a"), [p4])
+        self.assertEqual(self.system.list_pending_payments(14, "b"), [])
+        self.assertEqual(self.system.list_pending_payments(14, "missing"), [])
+        self.assertEqual(self.system.pending_by_account, {"a": {p4: None}})
@@ -0,0 +1,47 @@
+import inspect
+import os
+import random
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from sorted_list import SortedList
+
+
+class SortedListTests(unittest.TestCase):
+    failureException = Exception
+
+    @timeout(2)
+    def test_sorted_list_case_01_matches_sorted_python_list(self):
+        rng = random.Random(0)
+        ranking, reference = SortedList(load=8), []
+        for _ in range(3000):
+            if reference and rng.random() < 0.4:
+                item = rng.choice(reference)
+                ranking.remove(item)
+                reference.remove(item)
+            else:
+                item = (-rng.randrange(50), f"acc{rng.randrange(200)}")
+                ranking.add(item)
+                reference.append(item)
+                reference.sort()
+            self.assertEqual(len(ranking), len(reference))
+        self.assertEqual(list(ranking), reference)
+        self.assertEqual(list(reversed(ranking)), reference[::-1])
+        for n in (0, 1, 7, 100, len(reference) + 1, -3):
+            self.assertEqual(ranking[:n], reference[:n])
+        self.assertRaises(ValueError, ranking.remove, (1, "missing"))
+
+    @timeout(0.4)
+    def test_sorted_list_case_02_key(self):
+        spent = {"a": 5, "b": 7, "c": 5}
+        ranking = SortedList(spent, key=lambda account: (-spent[account], account))
+        self.assertEqual(list(ranking), ["b", "a", "c"])
+        ranking.remove("c")
+        spent["c"] = 9
+        ranking.add("c")
+        self.assertEqual(ranking[:2], ["c", "b"])
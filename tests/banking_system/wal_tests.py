@@ -0,0 +1,143 @@
+import inspect
+import os
+import shutil
+import sys
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from banking_system_compact_impl import CompactBankingSystemImpl
+from banking_system_wal import DurableBankingSystem, decode_op, encode_op, read_wal
+
+
+class DurableBankingSystemTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _open(self, **kwargs):
+        return DurableBankingSystem(self.directory, **kwargs)
+
+    @timeout(1)
+    def test_wal_case_01_recovers_from_wal_only(self):
+        with self._open(snapshot_every=0) as system:
+            system.create_account(1, "a")
+            system.create_account(2, "b")
+            system.deposit(3, "a", 100)
+            system.transfer(4, "a", "b", 30)
+            payment_id = system.schedule_payment(5, "a", 20, 5)
+            system.schedule_payment(6, "b", 10, 1)
+
+        with self._open(snapshot_every=0) as system:
+            self.assertEqual(system.lsn, 6)
+            self.assertFalse(system.cancel_payment(7, "a", "payment2"))
+            self.assertTrue(system.cancel_payment(8, "a", payment_id))
+            self.assertEqual(system.deposit(9, "b", 0), 20)
+            self.assertEqual(system.top_spenders(10, 2), ["a", "b"])
+
+    @timeout(1)
+    def test_wal_case_02_snapshot_rotates_wal(self):
+        with self._open(snapshot_every=4) as system:
+            system.create_account(1, "a")
+            system.deposit(2, "a", 100)
+            system.pay(3, "a", 10)
+            system.schedule_payment(4, "a", 5, 10)
+            system.pay(5, "a", 1)
+
+        base_lsn, ops, _ = read_wal(os.path.join(self.directory, "wal.log"))
+        self.assertEqual((base_lsn, ops), (4, [("pay", 5, "a", 1)]))
+        with self._open(snapshot_every=4) as system:
+            self.assertEqual(system.deposit(14, "a", 0), 84)
+
+    @timeout(1)
+    def test_wal_case_03_torn_tail_is_discarded(self):
+        with self._open(snapshot_every=0) as system:
+            system.create_account(1, "a")
+            system.deposit(2, "a", 100)
+        wal_path = os.path.join(self.directory, "wal.log")
+        with open(wal_path, "ab") as f:
+            f.write(b"\x10\x00\x00\x00garbage")
+
+        with self._open(snapshot_every=0) as system:
+            self.assertEqual(system.lsn, 2)
+            self.assertEqual(system.deposit(3, "a", 5), 105)
+        self.assertEqual(len(read_wal(wal_path)[1]), 3)
+
+    @timeout(1)
+    def test_wal_case_04_snapshot_without_rotation_skips_replayed_records(self):
+        with self._open(snapshot_every=0) as system:
+            system.create_account(1, "a")
+            system.deposit(2, "a", 100)
+            wal_path = system.wal_path
+            with open(wal_path, "rb") as f:
+                stale_wal = f.read()
+            system.snapshot()
+            system.deposit(3, "a", 1)
+        # Simulate a crash after the snapshot was written but before the WAL was rotated.
+        with open(wal_path, "wb") as f:
+            f.write(stale_wal)
+
+        with self._open(snapshot_every=0) as system:
+            self.assertEqual(system.deposit(4, "a", 0), 100)
+
+    @timeout(1)
+    def test_wal_case_05_batch_and_compact_backend(self):
+        ops = [
+            ("create_account", 1, "a"),
+            ("deposit", 2, "a", "50"),
+            ("schedule_payment", 3, "a", 20, 0),
+            ("pay", 3, "a", 10),
+        ]
+        with self._open(system_factory=CompactBankingSystemImpl, group_commit=2) as system:
+            self.assertEqual(system.apply_batch(ops), [True, 50, "payment1", 20])
+            with self.assertRaises(ValueError):
+                system.deposit(4, "a", "lots")
+            system.snapshot()
+
+        with self._open(system_factory=CompactBankingSystemImpl) as system:
+            self.assertIsInstance(system.system, CompactBankingSystemImpl)
+            self.assertEqual(system.top_spenders(5, 1), ["a"])
+            self.assertEqual(system.deposit(6, "a", 0), 20)
+            system.create_account(7, "b")
+            system.deposit(8, "b", 100)
+            system.pay(9, "b", 40)
+            self.assertEqual(system.top_spenders(10, 2), ["b", "a"])
+
+    @timeout(2)
+    def test_wal_case_06_snapshot_leaves_out_payment_history(self):
+        snapshot_path = os.path.join(self.directory, "snapshot.bin")
+        sizes = []
+        with self._open(snapshot_every=0) as system:
+            system.create_account(1, "a")
+            system.deposit(2, "a", 10**9)
+            for rounds in (100, 2000):
+                for t in range(rounds):
+                    system.schedule_payment(3, "a", 1, 0)
+                system.pay(4, "a", 1)
+                system.snapshot()
+                sizes.append(os.path.getsize(snapshot_path))
+            self.assertEqual(len(system.system.payment_history), 2100)
+        self.assertLess(sizes[1], sizes[0] + 100)
+
+        with self._open(snapshot_every=0) as system:
+            self.assertEqual(system.system.payment_history, {})
+            self.assertEqual(system.deposit(5, "a", 0), 10**9 - 2102)
+            self.assertEqual(system.schedule_payment(6, "a", 1, 10), "payment2101")
+
+    @timeout(1)
+    def test_wal_case_07_cancel_payment_without_id_is_logged(self):
+        op = ("cancel_payment", 3, "a", None)
+        self.assertEqual(decode_op(encode_op(op)), op)
+        with self._open(snapshot_every=0) as system:
+            system.create_account(1, "a")
+            self.assertFalse(system.cancel_payment(2, "a", None))
+        with self._open(snapshot_every=0) as system:
+            self.assertEqual(system.lsn, 2)
@@ -0,0 +1,41 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+sys.path.insert(0, os.path.join(parent_dir, "benchmarks"))
+
+from timeout_decorator import timeout
+import unittest
+from banking_system_replay_bench import IMPLS, generate_workload, parse_mix, replay
+
+
+class BankingSystemWorkloadTests(unittest.TestCase):
+    failureException = Exception
+
+    @timeout(1)
+    def test_workload_case_01_generator_is_seeded(self):
+        first = generate_workload(7, 500, 50, zipf_s=1.2)
+        self.assertEqual(first, generate_workload(7, 500, 50, zipf_s=1.2))
+        self.assertNotEqual(first, generate_workload(8, 500, 50, zipf_s=1.2))
+        self.assertEqual(len(first), 500 + 2 * 50)
+
+    @timeout(1)
+    def test_workload_case_02_mix_limits_op_kinds(self):
+        ops = generate_workload(1, 300, 20, mix=parse_mix("deposit=1,schedule_payment=1"))
+        self.assertEqual({op[0] for op in ops[40:]}, {"deposit", "schedule_payment"})
+        with self.assertRaises(ValueError):
+            parse_mix("withdraw=1")
+
+    @timeout(2)
+    def test_workload_case_03_backends_agree_on_replay(self):
+        ops = generate_workload(3, 2000, 100, max_delay=20)
+        results = []
+        for factory in IMPLS.values():
+            system = factory()
+            self.assertEqual(len(replay(system, ops)), len(ops))
+            results.append(system.apply_batch([("top_spenders", 10**6, 20)]))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
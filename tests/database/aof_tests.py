@@ -0,0 +1,188 @@
+import inspect
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from database_aof import (AOF_FILE, FSYNC_ALWAYS, FSYNC_EVERYSEC, PREVIOUS_AOF_FILE, DurableDatabase,
+                          MappedSnapshot, decode_op, encode_op, read_aof)
+from database_compact_impl import CompactDatabaseImpl
+from database_impl import DatabaseImpl, exponential_thinning, keep_last
+
+
+class DurableDatabaseTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _open(self, **kwargs):
+        kwargs.setdefault("rewrite_every", 0)
+        return DurableDatabase(self.directory, **kwargs)
+
+    @timeout(1)
+    def test_aof_case_01_recovers_from_log_only(self):
+        with self._open(fsync=FSYNC_ALWAYS) as db:
+            db.set_at("k", "a", "1", 1)
+            db.set_at_with_ttl("k", "b", "2", 1, 10)
+            db.mset_at("k", {"c": "3", "d": "4"}, 2)
+            db.mset_many_at_with_ttl([("x", [("f", "5")])], 2, 100)
+            self.assertTrue(db.delete_at("k", "d", 3))
+            self.assertEqual(db.backup(4), 2)
+            db.set_at("k", "a", "changed", 5)
+
+        with self._open() as db:
+            self.assertEqual(db.lsn, 7)
+            self.assertEqual(db.last_timestamp, 5)
+            self.assertEqual(db.scan_at("k", 10), "a(changed), b(2), c(3)")
+            db.restore(20, 4)
+            self.assertEqual(db.scan_at("k", 20), "a(1), b(2), c(3)")
+            self.assertEqual(db.scan_at("k", 27), "a(1), c(3)")
+        with self._open() as db:
+            self.assertEqual(db.get_at("x", "f", 117), "5")
+            self.assertIsNone(db.get_at("x", "f", 118))
+
+    @timeout(1)
+    def test_aof_case_02_rewrite_compacts_log_to_live_state(self):
+        with self._open() as db:
+            for t in range(50):
+                db.set_at_with_ttl("k", f"f{t}", str(t), t, 5)
+            db.set_at("k", "keep", "v", 50)
+            db.rewrite(background=False)
+            db.set_at("k", "after", "w", 51)
+
+        base_lsn, ops, _ = read_aof(os.path.join(self.directory, AOF_FILE))
+        self.assertEqual((base_lsn, [op[0] for op in ops]), (51, ["set_at_with_ttl"]))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, PREVIOUS_AOF_FILE)))
+        with self._open() as db:
+            self.assertEqual(db.scan_at("k", 50), "after(w), f46(46), f47(47), f48(48), f49(49), keep(v)")
+            # Records expired by the last logged timestamp were dropped by the rewrite.
+            self.assertEqual(len(db.db.db["k"]), 6)
+
+    @timeout(2)
+    def test_aof_case_03_background_rewrite_and_interrupted_rewrite(self):
+        with self._open(rewrite_every=10) as db:
+            for t in range(35):
+                db.set_at("k", f"f{t:02d}", str(t), t)
+            db.wait_for_rewrite()
+        with self._open() as db:
+            self.assertEqual(len(db.scan_at("k", 40).split(", ")), 35)
+            db.rewrite(background=False)
+            db.set_at("k", "late", "x", 41)
+
+        # Simulate a crash after the AOF was rotated out but before its replacement was created.
+        os.replace(os.path.join(self.directory, AOF_FILE), os.path.join(self.directory, PREVIOUS_AOF_FILE))
+        with self._open() as db:
+            self.assertEqual(db.get_at("k", "late", 41), "x")
+            self.assertFalse(os.path.exists(os.path.join(self.directory, PREVIOUS_AOF_FILE)))
+
+    @timeout(1)
+    def test_aof_case_04_torn_tail_is_discarded(self):
+        with self._open(db_factory=CompactDatabaseImpl) as db:
+            db.set_at("k", "a", "1", 1)
+        with open(os.path.join(self.directory, AOF_FILE), "ab") as f:
+            f.write(b"\x10\x00\x00\x00garbage")
+        with self._open(db_factory=CompactDatabaseImpl) as db:
+            self.assertEqual(db.lsn, 1)
+            db.set_at("k", "b", "2", 2)
+        with self._open(db_factory=CompactDatabaseImpl) as db:
+            self.assertEqual(db.scan_at("k", 2), "a(1), b(2)")
+
+    @timeout(1)
+    def test_aof_case_05_mmap_backups_survive_rewrite(self):
+        with self._open(mmap_backups=True) as db:
+            db.set_at("k", "a", "1", 1)
+            db.backup(2)
+            db.set_at("k", "a", "2", 3)
+            self.assertIsInstance(db.db.backups[0], MappedSnapshot)
+            db.rewrite(background=False)
+        with self._open(mmap_backups=True) as db:
+            self.assertIsInstance(db.db.backups[0], MappedSnapshot)
+            db.restore(4, 2)
+            self.assertEqual(db.get_at("k", "a", 4), "1")
+
+    @timeout(1)
+    def test_aof_case_06_retention_policies_survive_rewrite_and_reopen(self):
+        for retention in (keep_last(2), exponential_thinning(1, 2)):
+            shutil.rmtree(self.directory)
+            factory = lambda: DatabaseImpl(backup_retention=retention)
+            reference = factory()
+            with self._open(db_factory=factory) as db:
+                for t in range(1, 10):
+                    for target in (db, reference):
+                        target.set_at("k", "a", str(t), t)
+                        target.backup(t)
+                db.rewrite(background=False)
+            self.assertFalse(os.path.exists(os.path.join(self.directory, PREVIOUS_AOF_FILE)))
+            with self._open(db_factory=factory) as db:
+                self.assertEqual(db.db.backup_retention, retention)
+                self.assertEqual(db.db.backup_times, reference.backup_times)
+                db.backup(20)
+                reference.backup(20)
+                self.assertEqual(db.db.backup_times, reference.backup_times)
+                self.assertLess(len(db.db.backup_times), 5)
+
+    @timeout(0.4)
+    def test_aof_case_07_op_encoding_round_trips(self):
+        ops = [
+            ("set_at_with_ttl", "k", "é", "v", 3, 10**18),
+            ("mset_many_at_with_ttl", [("k", [("a", "1"), ("b", "")]), ("j", [])], 1, 5),
+            ("restore", 9, 4),
+        ]
+        for op in ops:
+            self.assertEqual(decode_op(encode_op(op)), op)
+        with self.assertRaises(ValueError):
+            encode_op(("get_at", "k", "f", 1))
+        with self.assertRaises(ValueError):
+            DurableDatabase(self.directory, fsync="sometimes")
+
+
+    @timeout(2)
+    def test_aof_case_08_mapped_backups_share_one_file(self):
+        with self._open(mmap_backups=True, db_factory=lambda: DatabaseImpl(backup_retention=keep_last(2))) as db:
+            store = db._snapshot_file
+            store._MIN_COMPACT_BYTES = 0
+            for t in range(1, 200):
+                db.set_at("k", f"f{t}", "v", t)
+                db.backup(t)
+            self.assertTrue(all(snapshot._store is store for snapshot in db.db.backups))
+            # Dropped backups are reclaimed, so the file stays near the size of the kept ones.
+            self.assertLessEqual(store._size, 3 * store._live)
+            db.restore(300, 198)
+            self.assertEqual(db.get_at("k", "f198", 300), "v")
+            self.assertEqual(db.get_at("k", "f199", 300), None)
+
+    @timeout(3)
+    def test_aof_case_09_everysec_syncs_idle_tail(self):
+        with self._open(fsync=FSYNC_EVERYSEC) as db:
+            db.set_at("k", "a", "1", 1)
+            self.assertEqual(db._unsynced, 1)
+            deadline = time.monotonic() + 2
+            while db._unsynced and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertEqual(db._unsynced, 0)
+
+    @timeout(3)
+    def test_aof_case_10_failed_rewrites_keep_every_segment(self):
+        # A lambda retention policy can't be pickled, so every snapshot write fails.
+        unpicklable = lambda: DatabaseImpl(backup_retention=lambda times, now: times)
+        with self._open(db_factory=unpicklable, rewrite_every=3) as db:
+            for t in range(12):
+                db.set_at("k", f"f{t:02d}", str(t), t)
+                db._join_rewrite()
+            self.assertIsNotNone(db.rewrite_error())
+            self.assertTrue(os.path.exists(os.path.join(self.directory, PREVIOUS_AOF_FILE)))
+            self.assertRaises(Exception, db.rewrite, background=False)
+        with self._open() as db:
+            self.assertEqual(db.scan_at("k", 12), ", ".join(f"f{t:02d}({t})" for t in range(12)))
+            self.assertFalse(os.path.exists(os.path.join(self.directory, PREVIOUS_AOF_FILE)))
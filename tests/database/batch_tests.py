@@ -0,0 +1,48 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from database_compact_impl import CompactDatabaseImpl
+from database_impl import DatabaseImpl
+
+
+class DatabaseBatchTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.dbs = [DatabaseImpl(), CompactDatabaseImpl()]
+
+    @timeout(0.4)
+    def test_batch_case_01_mget_matches_get_at(self):
+        for db in self.dbs:
+            db.set_at("k", "a", "1", 0)
+            db.set_at_with_ttl("k", "b", "2", 0, 5)
+            self.assertEqual(db.mget_at("k", ["b", "a", "missing", "a"], 4), ["2", "1", None, "1"])
+            self.assertEqual(db.mget_at("k", ["b", "a"], 5), [None, "1"])
+            self.assertEqual(db.mget_at("nope", ["a", "b"], 0), [None, None])
+            self.assertEqual(db.mget_many_at([("k", ["a"]), ("nope", ["a"]), ("k", ("b",))], 1),
+                             [["1"], [None], ["2"]])
+
+    @timeout(0.4)
+    def test_batch_case_02_mset_applies_items_in_order(self):
+        for db in self.dbs:
+            db.mset_at("k", [("b", "1"), ("a", "2"), ("b", "3")], 0)
+            db.mset_at_with_ttl("k", {"c": "4", "a": "5"}, 1, 10)
+            self.assertEqual(db.scan_at("k", 10), "a(5), b(3), c(4)")
+            self.assertEqual(db.scan_at("k", 11), "b(3)")
+            self.assertEqual(db.purge_expired(11), 2)
+
+    @timeout(0.4)
+    def test_batch_case_03_mset_many_spans_keys(self):
+        for db in self.dbs:
+            db.mset_many_at_with_ttl({"x": [("f", "1")], "y": {"g": "2", "h": "3"}, "empty": []}, 0, 3)
+            db.mset_many_at([("x", {"f": "forever"})], 1)
+            self.assertEqual(db.mget_many_at({"x": ["f"], "y": ["g", "h"]}, 3), [["forever"], [None, None]])
+            self.assertNotIn("empty", db.db)
+            self.assertEqual(db.backup(3), 1)
@@ -0,0 +1,97 @@
+import inspect
+import os
+import random
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from database_compact_impl import CompactDatabaseImpl
+from database_impl import DatabaseImpl
+
+
+def _random_ops(seed: int, count: int) -> list[tuple]:
+    rng = random.Random(seed)
+    keys = ["k1", "k2", "k3"]
+    fields = ["a", "ab", "abc", "b", "ba", "c", ""]
+    ops = []
+    timestamp = 0
+    for _ in range(count):
+        timestamp += rng.choice([0, 1, 1, 2, 3])
+        kind = rng.randrange(8)
+        if kind == 0:
+            ops.append(("set_at_with_ttl", rng.choice(keys), rng.choice(fields), str(rng.randint(0, 9)),
+                        timestamp, rng.randint(1, 15)))
+        elif kind == 1:
+            ops.append(("set_at", rng.choice(keys), rng.choice(fields), str(rng.randint(0, 9)), timestamp))
+        elif kind == 2:
+            ops.append(("get_at", rng.choice(keys), rng.choice(fields), timestamp))
+        elif kind == 3:
+            ops.append(("delete_at", rng.choice(keys), rng.choice(fields), timestamp))
+        elif kind == 4:
+            ops.append(("scan_at", rng.choice(keys), timestamp))
+        elif kind == 5:
+            ops.append(("scan_by_prefix_at", rng.choice(keys), rng.choice(["a", "ab", "", "b", "z"]), timestamp))
+        elif kind == 6:
+            ops.append(("backup", timestamp))
+        else:
+            ops.append(("restore", timestamp, rng.randint(0, timestamp)))
+    return ops
+
+
+class CompactDatabaseTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.db = CompactDatabaseImpl()
+
+    @timeout(0.4)
+    def test_compact_case_01_records_are_columnar(self):
+        self.db.set_at("k", "b", "2", 1)
+        self.db.set_at_with_ttl("k", "a", "1", 1, 10)
+        columns = self.db.db["k"]
+        self.assertEqual(columns.names, ["a", "b"])
+        self.assertEqual(columns.values, ["1", "2"])
+        self.assertEqual(list(columns.created), [1, 1])
+        self.assertEqual(list(columns.ttls), [10, 0])
+        self.assertEqual(list(columns.has_ttl), [1, 0])
+        self.assertEqual(self.db.scan_at("k", 11), "b(2)")
+        self.assertEqual(self.db.purge_expired(11), 1)
+        self.assertEqual(self.db.db["k"].names, ["b"])
+
+    @timeout(0.4)
+    def test_compact_case_02_backup_shares_columns_until_written(self):
+        self.db.set_at("k", "a", "1", 1)
+        self.db.set_at("other", "a", "1", 1)
+        self.db.backup(2)
+        self.db.set_at("k", "a", "changed", 3)
+        snapshot_db = self.db.backups[0].db
+        self.assertIs(snapshot_db["other"], self.db.db["other"])
+        self.assertEqual(snapshot_db["k"].values, ["1"])
+        self.db.restore(4, 2)
+        self.assertEqual(self.db.get_at("k", "a", 4), "1")
+
+    @timeout(5)
+    def test_compact_case_03_matches_dict_storage(self):
+        for seed in range(30):
+            reference = DatabaseImpl(purge_on_write=True)
+            compact = CompactDatabaseImpl(purge_on_write=True)
+            for op in _random_ops(seed, 200):
+                expected = getattr(reference, op[0])(*op[1:])
+                self.assertEqual(getattr(compact, op[0])(*op[1:]), expected, (seed, op))
+
+    @timeout(0.4)
+    def test_compact_case_04_out_of_range_write_changes_nothing(self):
+        self.db.set_at("k", "a", "1", 0)
+        with self.assertRaises(OverflowError):
+            self.db.set_at_with_ttl("k", "b", "2", 0, 2 ** 63)
+        with self.assertRaises(OverflowError):
+            self.db.set_at_with_ttl("k", "a", "2", 0, 2 ** 63)
+        with self.assertRaises(OverflowError):
+            self.db.set_at("new", "a", "1", 2 ** 63)
+        self.assertEqual(self.db.scan_at("k", 1), "a(1)")
+        self.assertEqual(self.db.db["k"].names, ["a"])
+        self.assertNotIn("new", self.db.db)
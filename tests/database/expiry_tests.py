@@ -0,0 +1,93 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from database_impl import DatabaseImpl
+
+
+class DatabaseExpiryTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.db = DatabaseImpl()
+
+    @timeout(0.4)
+    def test_expiry_case_01_purge_removes_dead_fields_and_keys(self):
+        self.db.set_at_with_ttl("k1", "a", "1", 0, 5)
+        self.db.set_at_with_ttl("k1", "b", "2", 0, 10)
+        self.db.set_at_with_ttl("k2", "a", "3", 0, 5)
+        self.db.set_at("k2", "b", "4", 0)
+        self.assertEqual(self.db.purge_expired(4), 0)
+        self.assertEqual(self.db.purge_expired(5), 2)
+        self.assertEqual(set(self.db.db), {"k1", "k2"})
+        self.assertEqual(self.db.scan_at("k1", 5), "b(2)")
+        self.assertEqual(self.db.purge_expired(100), 1)
+        self.assertEqual(list(self.db.db), ["k2"])
+        self.assertEqual(self.db.field_order, {"k2": ["b"]})
+
+    @timeout(0.4)
+    def test_expiry_case_02_overwritten_records_are_not_purged(self):
+        self.db.set_at_with_ttl("k", "f", "old", 0, 5)
+        self.db.set_at_with_ttl("k", "f", "new", 3, 10)
+        self.db.set_at_with_ttl("k", "g", "old", 0, 5)
+        self.db.set_at("k", "g", "forever", 1)
+        self.assertEqual(self.db.purge_expired(6), 0)
+        self.assertEqual(self.db.get_at("k", "f", 6), "new")
+        self.assertEqual(self.db.purge_expired(13), 1)
+        self.assertEqual(self.db.scan_at("k", 13), "g(forever)")
+
+    @timeout(1)
+    def test_expiry_case_03_purge_on_write_bounds_memory(self):
+        db = DatabaseImpl(purge_on_write=True)
+        for t in range(20000):
+            db.set_at_with_ttl(f"k{t}", "f", "v", t, 3)
+        self.assertLess(len(db.db), 10)
+        self.assertLess(len(db.expiry_heap), 10)
+        self.assertEqual(db.get_at("k19999", "f", 20000), "v")
+
+    @timeout(1)
+    def test_expiry_case_04_overwrites_do_not_grow_heap(self):
+        for t in range(20000):
+            self.db.set_at_with_ttl("k", "f", str(t), t, 10**6)
+        self.assertLess(len(self.db.expiry_heap), 200)
+        self.assertEqual(self.db.purge_expired(10**7), 1)
+        self.assertEqual(self.db.db, {})
+
+    @timeout(0.4)
+    def test_expiry_case_05_restore_reindexes_expiry(self):
+        self.db.set_at_with_ttl("k", "f", "v", 0, 10)
+        self.db.backup(2)
+        self.db.purge_expired(10)
+        self.db.restore(20, 2)
+        self.assertEqual(self.db.get_at("k", "f", 27), "v")
+        self.assertEqual(self.db.purge_expired(27), 0)
+        self.assertEqual(self.db.purge_expired(28), 1)
+
+    @timeout(1)
+    def test_expiry_case_06_restore_leaves_heap_ready_for_bounded_purges(self):
+        db = DatabaseImpl(purge_on_write=True)
+        db.mset_at_with_ttl("k", [(f"f{i}", "v") for i in range(1000)], 0, 100)
+        db.backup(1)
+        db.restore(5, 1)
+        self.assertFalse(db._expiry_heap_stale)
+        self.assertEqual(len(db.expiry_heap), 1000)
+        db.set_at("other", "f", "v", 200)
+        self.assertEqual(len(db.db["k"]), 1000 - DatabaseImpl._PURGE_ON_WRITE_LIMIT)
+
+    @timeout(0.4)
+    def test_expiry_case_07_restore_without_purge_on_write_defers_rebuild(self):
+        self.db.mset_at_with_ttl("k", [(f"f{i}", "v") for i in range(100)], 0, 100)
+        self.db.backup(1)
+        self.db.restore(5, 1)
+        self.assertTrue(self.db._expiry_heap_stale)
+        self.assertEqual(self.db.expiry_heap, [])
+        self.db.set_at_with_ttl("k", "f0", "w", 6, 1)
+        self.assertEqual(self.db.purge_expired(103), 1)
+        self.assertFalse(self.db._expiry_heap_stale)
+        self.assertEqual(self.db.purge_expired(104), 99)
@@ -79,3 +79,20 @@ class DatabaseLevel2Tests(unittest.TestCase):
         self.db.set("k", "a", "1")
         self.db.set("k", "a", "2")
         self.assertEqual(self.db.scan("k"), "a(2)")
+
+    @timeout(0.4)
+    def test_level2_case_11_scan_by_prefix_bounds(self):
+        for field in ["a", "ab", "ab\U0010ffff", "ab\U0010ffffz", "ac", "b"]:
+            self.db.set("k", field, "v")
+        self.assertEqual(self.db.scan_by_prefix("k", "ab"), "ab(v), ab\U0010ffff(v), ab\U0010ffffz(v)")
+        self.assertEqual(self.db.scan_by_prefix("k", "ab\U0010ffff"), "ab\U0010ffff(v), ab\U0010ffffz(v)")
+        self.assertEqual(self.db.scan_by_prefix("k", "b"), "b(v)")
+
+    @timeout(1)
+    def test_level2_case_12_prefix_scan_on_wide_key(self):
+        for i in range(20000):
+            self.db.set("k", f"f{i:05d}", str(i))
+        self.db.delete("k", "f12341")
+        for _ in range(2000):
+            self.assertEqual(self.db.scan_by_prefix("k", "f1234"), ", ".join(
+                f"f1234{d}(1234{d})" for d in range(10) if d != 1))
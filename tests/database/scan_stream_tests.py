@@ -0,0 +1,69 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from database_compact_impl import CompactDatabaseImpl
+from database_impl import DatabaseImpl
+
+
+def _format(records) -> str:
+    return ", ".join(f"{field}({value})" for field, value in records)
+
+
+class DatabaseScanStreamTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.dbs = [DatabaseImpl(), CompactDatabaseImpl()]
+        for db in self.dbs:
+            for i in range(10):
+                db.set_at_with_ttl("k", f"f{i}", str(i), 0, 5 if i % 3 == 0 else 100)
+            db.set_at("k", "g", "x", 0)
+
+    @timeout(0.4)
+    def test_scan_stream_case_01_iterator_matches_scan(self):
+        for db in self.dbs:
+            self.assertEqual(_format(db.iter_scan_at("k", 10)), db.scan_at("k", 10))
+            self.assertEqual(_format(db.iter_scan_at("k", 10, prefix="f")), db.scan_by_prefix_at("k", "f", 10))
+            self.assertEqual(list(db.iter_scan_at("missing", 0)), [])
+
+    @timeout(0.4)
+    def test_scan_stream_case_02_pages_cover_the_scan(self):
+        for db in self.dbs:
+            records, cursor = [], None
+            while True:
+                page, cursor = db.scan_page_at("k", 10, 2, cursor)
+                self.assertLessEqual(len(page), 2)
+                records += page
+                if cursor is None:
+                    break
+            self.assertEqual(records, list(db.iter_scan_at("k", 10)))
+            self.assertEqual(db.scan_page_at("k", 10, 100, prefix="f"),
+                             (list(db.iter_scan_at("k", 10, prefix="f")), None))
+            with self.assertRaises(ValueError):
+                db.scan_page_at("k", 10, 0)
+
+    @timeout(0.4)
+    def test_scan_stream_case_03_cursor_survives_writes(self):
+        for db in self.dbs:
+            page, cursor = db.scan_page_at("k", 0, 3)
+            self.assertEqual(page, [("f0", "0"), ("f1", "1"), ("f2", "2")])
+            db.delete_at("k", "f3", 0)
+            db.set_at("k", "f2a", "new", 0)
+            db.set_at("k", "f0a", "skipped", 0)
+            page, _ = db.scan_page_at("k", 0, 2, cursor)
+            self.assertEqual(page, [("f2a", "new"), ("f4", "4")])
+
+    @timeout(1)
+    def test_scan_stream_case_04_first_result_does_not_scan_the_key(self):
+        for db in self.dbs:
+            db.mset_at("wide", [(f"field{i:06d}", "v") for i in range(100_000)], 0)
+            iterator = db.iter_scan_at("wide", 0)
+            for _ in range(2000):
+                self.assertEqual(next(iterator)[1], "v")
@@ -0,0 +1,137 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from database_impl import DatabaseImpl, exponential_thinning, keep_last
+
+
+class DatabaseSnapshotTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.db = DatabaseImpl()
+
+    @timeout(0.4)
+    def test_snapshot_case_01_writes_after_backup_do_not_leak_into_it(self):
+        self.db.set_at("k", "a", "1", 0)
+        self.db.set_at("k", "b", "2", 0)
+        self.db.set_at_with_ttl("t", "x", "9", 0, 50)
+        self.db.backup(1)
+        self.db.set_at("k", "a", "changed", 2)
+        self.db.delete_at("k", "b", 2)
+        self.db.set_at("new", "f", "v", 2)
+        self.db.purge_expired(60)
+        self.db.restore(10, 1)
+        self.assertEqual(self.db.scan_at("k", 10), "a(1), b(2)")
+        self.assertIsNone(self.db.get_at("new", "f", 10))
+        self.assertEqual(self.db.get_at("t", "x", 58), "9")
+        self.assertIsNone(self.db.get_at("t", "x", 59))
+
+    @timeout(0.4)
+    def test_snapshot_case_02_untouched_keys_are_shared(self):
+        self.db.set_at("a", "f", "1", 0)
+        self.db.set_at("b", "f", "1", 0)
+        self.db.backup(1)
+        self.db.set_at("a", "f", "2", 2)
+        snapshot_db = self.db.backups[0].db
+        self.assertIs(snapshot_db["b"], self.db.db["b"])
+        self.assertIsNot(snapshot_db["a"], self.db.db["a"])
+        self.assertEqual(snapshot_db["a"]["f"][0], "1")
+
+    @timeout(0.4)
+    def test_snapshot_case_03_restored_state_is_isolated_from_backup(self):
+        self.db.set_at("k", "a", "1", 0)
+        self.db.backup(1)
+        self.db.restore(2, 1)
+        self.db.set_at("k", "a", "2", 3)
+        self.db.restore(4, 1)
+        self.assertEqual(self.db.get_at("k", "a", 4), "1")
+
+    @timeout(1)
+    def test_snapshot_case_04_repeated_backups_of_wide_key_are_cheap(self):
+        for i in range(5000):
+            self.db.set_at("k", f"f{i}", "v", 0)
+        for t in range(1, 2000):
+            self.db.set_at("other", "f", str(t), t)
+            self.assertEqual(self.db.backup(t), 2)
+        self.assertIs(self.db.backups[0].db["k"], self.db.backups[-1].db["k"])
+
+    @timeout(0.4)
+    def test_snapshot_case_05_restore_picks_latest_timestamp_not_latest_call(self):
+        self.db.set_at("k", "f", "at10", 10)
+        self.db.backup(10)
+        self.db.set_at("k", "f", "at5", 11)
+        self.db.backup(5)
+        self.db.restore(20, 12)
+        self.assertEqual(self.db.get_at("k", "f", 20), "at10")
+        self.db.restore(21, 7)
+        self.assertEqual(self.db.get_at("k", "f", 21), "at5")
+        self.assertEqual(self.db.backup_times, [5, 10])
+
+    @timeout(0.4)
+    def test_snapshot_case_06_keep_last_retention(self):
+        db = DatabaseImpl(backup_retention=keep_last(2))
+        for t in range(1, 6):
+            db.set_at("k", "f", str(t), t)
+            db.backup(t)
+        self.assertEqual(db.backup_times, [4, 5])
+        db.restore(10, 3)
+        self.assertIsNone(db.get_at("k", "f", 10))
+        with self.assertRaises(ValueError):
+            keep_last(0)
+
+    @timeout(1)
+    def test_snapshot_case_07_exponential_thinning_is_logarithmic(self):
+        db = DatabaseImpl(backup_retention=exponential_thinning(min_age=1, factor=2))
+        for t in range(1, 5001):
+            db.set_at("k", "f", str(t), t)
+            db.backup(t)
+        self.assertLessEqual(len(db.backup_times), 14)
+        self.assertEqual(db.backup_times[-1], 5000)
+        # Older backups are spaced further apart.
+        gaps = [b - a for a, b in zip(db.backup_times, db.backup_times[1:])]
+        self.assertGreater(gaps[0], gaps[-1])
+        db.restore(6000, 4999)
+        self.assertEqual(db.get_at("k", "f", 6000), str(db.backup_times[-2]))
+
+    @timeout(0.4)
+    def test_snapshot_case_08_restore_shares_snapshot_and_shifts_ttls(self):
+        self.db.set_at_with_ttl("k", "short", "s", 0, 5)
+        self.db.set_at_with_ttl("k", "long", "l", 0, 20)
+        self.db.set_at("k", "inf", "i", 0)
+        self.db.backup(10)
+        self.db.restore(100, 10)
+        self.assertIs(self.db.db, self.db.backups[0].db)
+        # "short" had expired at the backup; "long" has 10 left from t=100.
+        self.assertIsNone(self.db.get_at("k", "short", 100))
+        self.assertEqual(self.db.scan_at("k", 109), "inf(i), long(l)")
+        self.assertEqual(self.db.scan_at("k", 110), "inf(i)")
+        # A write after the restore is not hidden by the snapshot's expiry floor.
+        self.db.set_at_with_ttl("k", "short", "new", 50, 100)
+        self.assertEqual(self.db.get_at("k", "short", 60), "new")
+        self.db.backup(105)
+        self.db.restore(200, 105)
+        self.assertEqual(self.db.scan_at("k", 204), "inf(i), long(l), short(new)")
+        self.assertEqual(self.db.scan_at("k", 205), "inf(i), short(new)")
+        self.assertEqual(self.db.purge_expired(205), 1)
+        self.assertEqual(self.db.field_order["k"], ["inf", "short"])
+
+    @timeout(0.4)
+    def test_snapshot_case_09_clone_is_independent(self):
+        self.db.set_at_with_ttl("k", "a", "1", 0, 10)
+        self.db.backup(1)
+        clone = self.db.clone()
+        clone.set_at("k", "a", "clone", 2)
+        clone.restore(3, 1)
+        self.db.set_at("k", "b", "2", 2)
+        self.assertEqual(self.db.scan_at("k", 5), "a(1), b(2)")
+        self.assertEqual(clone.scan_at("k", 11), "a(1)")
+        self.assertEqual(clone.purge_expired(12), 1)
+        self.assertEqual(self.db.purge_expired(10), 1)
+        self.assertEqual(self.db.scan_at("k", 10), "b(2)")
@@ -0,0 +1,94 @@
+import inspect
+import os
+import sys
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from in_memory_db_impl import InMemoryDBImpl
+from in_memory_db_threaded_impl import ThreadedInMemoryDBImpl
+
+
+class BlockingLockTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.db = ThreadedInMemoryDBImpl()
+        self.db.set_or_inc("k", "f", 1)
+
+    def _lock_in_thread(self, caller_id: str, timeout: float | None) -> tuple[threading.Thread, list]:
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.db.lock(caller_id, "k", timeout)))
+        thread.start()
+        return thread, results
+
+    @timeout(2)
+    def test_blocking_case_01_unlock_wakes_next_waiter(self):
+        self.assertEqual(self.db.lock("a", "k"), "acquired")
+        thread, results = self._lock_in_thread("b", None)
+        time.sleep(0.05)
+        self.assertEqual(results, [])
+        self.assertEqual(self.db.lock_waiters["k"], {"a", "b"})
+        self.assertEqual(self.db.unlock("k"), "released")
+        thread.join(1)
+        self.assertEqual(results, ["acquired"])
+        self.assertEqual(self.db.set_or_inc_by_caller("k", "f", 1, "b"), 2)
+
+    @timeout(2)
+    def test_blocking_case_02_timeout_leaves_caller_queued(self):
+        self.assertEqual(self.db.lock("a", "k"), "acquired")
+        self.assertEqual(self.db.lock("b", "k", 0.02), "wait")
+        self.assertEqual(self.db.lock("b", "k", 0.02), "")
+        self.assertEqual(list(self.db.locks["k"]), ["a", "b"])
+        self.db.unlock("k")
+        self.assertEqual(self.db.lock("b", "k", None), "")
+
+    @timeout(2)
+    def test_blocking_case_03_waiters_are_served_in_order(self):
+        self.assertEqual(self.db.lock("a", "k"), "acquired")
+        order = []
+        threads = []
+        for caller_id in ("b", "c", "d"):
+            thread = threading.Thread(
+                target=lambda caller_id=caller_id: order.append((caller_id, self.db.lock(caller_id, "k", None))))
+            thread.start()
+            threads.append(thread)
+            # Queue in a known order.
+            while caller_id not in self.db.lock_waiters.get("k", ()):
+                time.sleep(0.001)
+        for served in range(1, 4):
+            self.db.unlock("k")
+            while len(order) < served:
+                time.sleep(0.001)
+        for thread in threads:
+            thread.join(1)
+        self.assertEqual(order, [("b", "acquired"), ("c", "acquired"), ("d", "acquired")])
+
+    @timeout(2)
+    def test_blocking_case_04_removed_key_wakes_waiters(self):
+        self.assertEqual(self.db.lock("a", "k"), "acquired")
+        thread, results = self._lock_in_thread("b", 5)
+        time.sleep(0.05)
+        self.assertTrue(self.db.delete_by_caller("k", "f", "a"))
+        thread.join(1)
+        self.assertEqual(results, ["invalid_request"])
+        self.assertEqual(self.db.lock_waiters, {})
+
+    @timeout(2)
+    def test_blocking_case_05_key_deleted_and_recreated_during_wait(self):
+        self.assertEqual(self.db.lock("a", "k"), "acquired")
+        thread, results = self._lock_in_thread("b", 5)
+        time.sleep(0.05)
+        with self.db._mutex:
+            # Delete and recreate before the waiter can run.
+            self.assertTrue(InMemoryDBImpl.delete_by_caller(self.db, "k", "f", "a"))
+            self.assertEqual(InMemoryDBImpl.set_or_inc(self.db, "k", "f", 1), 1)
+        thread.join(1)
+        self.assertEqual(results, ["invalid_request"])
+        self.assertEqual(self.db.locks, {})
+        self.assertEqual(self.db.lock("b", "k"), "acquired")
@@ -0,0 +1,80 @@
+import inspect
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from in_memory_db_compact_impl import CompactInMemoryDBImpl
+from in_memory_db_impl import InMemoryDBImpl
+
+
+class CompactCountersTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.db = CompactInMemoryDBImpl()
+
+    @timeout(0.4)
+    def test_compact_case_01_matches_dict_storage(self):
+        reference = InMemoryDBImpl()
+        ops = [
+            ("set_or_inc", "k1", "hits", 3), ("set_or_inc", "k2", "misses", 1),
+            ("set_or_inc", "k1", "misses", 0), ("get", "k1", "misses"), ("get", "k2", "hits"),
+            ("lock", "c1", "k1"), ("set_or_inc", "k1", "hits", 5), ("delete", "k1", "hits"),
+            ("set_or_inc_by_caller", "k1", "hits", 5, "c1"), ("delete_by_caller", "k1", "hits", "c1"),
+            ("get", "k1", "hits"), ("unlock", "k1"), ("delete", "k1", "misses"), ("get", "k1", "misses"),
+            ("lock", "c1", "k1"), ("set_or_inc", "k1", "hits", 2), ("top_n_keys", 2), ("top_n_keys", -1),
+        ]
+        for name, *args in ops:
+            self.assertEqual(getattr(self.db, name)(*args), getattr(reference, name)(*args), (name, args))
+        self.assertEqual(self.db.db.keys(), reference.db.keys())
+
+    @timeout(0.4)
+    def test_compact_case_02_fields_share_columns(self):
+        self.db.set_or_inc("k1", "a", 1)
+        self.db.set_or_inc_many("k2", ["b", "c"], [2, 3])
+        self.db.set_or_inc("k3", "c", 4)
+        self.assertEqual(self.db.field_names, ["a", "b", "c"])
+        self.assertEqual(self.db.field_index, {"a": 0, "b": 1, "c": 2})
+        # Rows grow to the column table only when written; absent columns hold -2**63.
+        self.assertEqual(list(self.db.db["k1"]), [1])
+        self.assertEqual(self.db.get("k1", "c"), None)
+        self.assertEqual(self.db.set_or_inc("k1", "c", 5), 5)
+        self.assertEqual(list(self.db.db["k1"]), [1, -2 ** 63, 5])
+        self.assertEqual(self.db.delete("k1", "a"), True)
+        self.assertEqual(self.db.delete("k1", "c"), True)
+        self.assertNotIn("k1", self.db.db)
+
+    @timeout(0.4)
+    def test_compact_case_03_set_or_inc_many(self):
+        for db in (self.db, InMemoryDBImpl()):
+            self.assertEqual(db.set_or_inc_many("k", [], []), [])
+            self.assertEqual(db.get("k", "a"), None)
+            self.assertEqual(db.set_or_inc_many("k", ["a", "b", "a"], [1, 2, 3]), [1, 2, 4])
+            self.assertEqual(db.set_or_inc_many("k", ("b", "c"), (10, -1)), [12, -1])
+            self.assertEqual(db.top_n_keys(1), "k(5)")
+            self.assertRaises(ValueError, db.set_or_inc_many, "k", ["a", "b"], [1])
+            self.assertEqual(db.get("k", "a"), 4)
+
+            self.assertEqual(db.lock("c1", "k"), "acquired")
+            self.assertEqual(db.set_or_inc_many("k", ["a", "d"], [1, 1]), [4, 0])
+            self.assertEqual(db.top_n_keys(1), "k(5)")
+            db.unlock("k")
+
+    @timeout(0.4)
+    def test_compact_case_04_overflow_changes_nothing(self):
+        self.db.set_or_inc("k", "a", 2 ** 63 - 2)
+        with self.assertRaises(OverflowError):
+            self.db.set_or_inc_many("k", ["b", "a", "a"], [5, 1, 1])
+        with self.assertRaises(OverflowError):
+            self.db.set_or_inc("k", "a", 2)
+        self.assertEqual(self.db.get("k", "a"), 2 ** 63 - 2)
+        self.assertEqual(self.db.get("k", "b"), None)
+        self.assertEqual(self.db.top_n_keys(1), "k(1)")
+        self.assertEqual(self.db.field_names, ["a"])
+        self.assertEqual(self.db.set_or_inc_many("k", ["a", "b", "a"], [1, 5, -3]), [2 ** 63 - 1, 5, 2 ** 63 - 4])
+        self.assertEqual(self.db.top_n_keys(1), "k(4)")
@@ -78,3 +78,23 @@ class InMemoryDBLevel2Tests(unittest.TestCase):
         self.db.set_or_inc("a", "f", 10)
         self.db.set_or_inc("a", "f", -2)
         self.assertEqual(self.db.top_n_keys(1), "a(2)")
+
+    @timeout(0.4)
+    def test_level2_case_11_ranking_buckets_follow_counts(self):
+        self.db.set_or_inc("b", "f", 1)
+        self.db.set_or_inc("a", "f", 1)
+        self.db.set_or_inc("b", "g", 1)
+        self.assertEqual({count: list(keys) for count, keys in self.db.modif_buckets.items()}, {1: ["a"], 2: ["b"]})
+        self.db.delete("a", "f")
+        self.assertEqual({count: list(keys) for count, keys in self.db.modif_buckets.items()}, {2: ["b"]})
+        self.assertEqual(list(self.db.modif_counts), [2])
+        self.assertEqual(self.db.top_n_keys(5), "b(2)")
+
+    @timeout(1)
+    def test_level2_case_12_top_n_with_many_keys(self):
+        for i in range(20000):
+            self.db.set_or_inc(f"key{i:05d}", "f", 1)
+        self.db.set_or_inc("key10000", "f", 1)
+        for _ in range(2000):
+            self.assertEqual(self.db.top_n_keys(3), "key10000(2), key00000(1), key00001(1)")
+        self.assertEqual(self.db.top_n_keys(-19998), "key10000(2), key00000(1)")
@@ -0,0 +1,97 @@
+import inspect
+import os
+import sys
+import threading
+import time
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from in_memory_db_impl import InMemoryDBImpl
+from in_memory_db_threaded_impl import ThreadedInMemoryDBImpl
+
+
+class LockLeaseTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.now = 0
+        self.db = InMemoryDBImpl(lock_lease=10, clock=lambda: self.now)
+        for key in ("a", "b", "c"):
+            self.db.set_or_inc(key, "f", 1)
+
+    @timeout(0.4)
+    def test_lease_case_01_expired_holder_loses_lock_to_next_waiter(self):
+        self.assertEqual(self.db.lock("crashed", "a"), "acquired")
+        self.assertEqual(self.db.lock("w", "a"), "wait")
+        self.now = 9
+        self.assertEqual(self.db.set_or_inc_by_caller("a", "f", 1, "w"), 1)
+        self.now = 10
+        self.assertEqual(self.db.set_or_inc_by_caller("a", "f", 1, "w"), 2)
+        self.assertEqual(list(self.db.locks["a"]), ["w"])
+        # The new holder's lease runs from when it was handed the lock.
+        self.now = 19
+        self.assertEqual(self.db.set_or_inc("a", "f", 1), 2)
+        self.now = 20
+        self.assertEqual(self.db.set_or_inc("a", "f", 1), 3)
+        self.assertEqual(self.db.locks, {})
+
+    @timeout(0.4)
+    def test_lease_case_02_lock_again_renews_lease(self):
+        self.assertEqual(self.db.lock("x", "a"), "acquired")
+        self.now = 8
+        self.assertEqual(self.db.lock("x", "a"), "")
+        self.now = 15
+        self.assertEqual(self.db.delete("a", "f"), False)
+        self.now = 18
+        self.assertEqual(self.db.unlock("a"), "")
+        self.assertEqual(self.db.lease_heap, [])
+
+    @timeout(0.4)
+    def test_lease_case_03_deadlocks_are_reported(self):
+        db = InMemoryDBImpl()
+        for key in ("a", "b", "c", "d"):
+            db.set_or_inc(key, "f", 1)
+        db.lock("p", "a")
+        db.lock("q", "b")
+        db.lock("q", "a")
+        db.lock("p", "b")
+        db.lock("r", "c")
+        db.lock("s", "c")
+        db.lock("s", "d")
+        self.assertEqual(db.deadlocks(), [["p", "q"]])
+        db.lock("r", "d")
+        db.lock("t", "d")
+        self.assertEqual(db.deadlocks(), [["p", "q"], ["r", "s"]])
+        db.unlock("a")
+        self.assertEqual(db.deadlocks(), [["r", "s"]])
+
+    @timeout(2)
+    def test_lease_case_04_blocked_waiter_takes_over_expired_lease(self):
+        db = ThreadedInMemoryDBImpl(lock_lease=0.05)
+        db.set_or_inc("k", "f", 1)
+        self.assertEqual(db.lock("crashed", "k"), "acquired")
+        results = []
+        thread = threading.Thread(target=lambda: results.append(db.lock("w", "k", 1)))
+        start = time.monotonic()
+        thread.start()
+        thread.join(1.5)
+        self.assertEqual(results, ["acquired"])
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    @timeout(2)
+    def test_lease_case_05_waiter_wakes_in_seconds_with_millisecond_clock(self):
+        db = ThreadedInMemoryDBImpl(lock_lease=50, clock=lambda: time.monotonic() * 1000, clock_unit=0.001)
+        db.set_or_inc("k", "f", 1)
+        self.assertEqual(db.lock("crashed", "k"), "acquired")
+        results = []
+        thread = threading.Thread(target=lambda: results.append(db.lock("w", "k", 1)))
+        start = time.monotonic()
+        thread.start()
+        thread.join(1.5)
+        self.assertEqual(results, ["acquired"])
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertRaises(ValueError, ThreadedInMemoryDBImpl, clock_unit=0)
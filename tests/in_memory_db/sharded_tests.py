@@ -0,0 +1,74 @@
+import inspect
+import os
+import sys
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+parent_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, parent_dir)
+
+from timeout_decorator import timeout
+import unittest
+from in_memory_db_impl import InMemoryDBImpl
+from in_memory_db_sharded_impl import ShardedInMemoryDBImpl
+
+
+class ShardedTests(unittest.TestCase):
+    failureException = Exception
+
+    def setUp(self):
+        self.db = ShardedInMemoryDBImpl(num_shards=4)
+
+    def _keys_on_different_shards(self) -> tuple[str, str]:
+        first = "k0"
+        for i in range(1, 100):
+            if self.db._shard(f"k{i}") is not self.db._shard(first):
+                return first, f"k{i}"
+        self.fail("no two keys on different shards")
+
+    @timeout(0.4)
+    def test_sharded_case_01_top_n_keys_merges_shards(self):
+        single = InMemoryDBImpl()
+        for i in range(20):
+            for _ in range(i % 5 + 1):
+                self.db.set_or_inc(f"k{i}", "f", 1)
+                single.set_or_inc(f"k{i}", "f", 1)
+        for n in (0, 1, 3, 7, 20, 25, -1, -12, -30):
+            self.assertEqual(self.db.top_n_keys(n), single.top_n_keys(n))
+
+    @timeout(0.4)
+    def test_sharded_case_02_deadlock_across_shards(self):
+        a, b = self._keys_on_different_shards()
+        self.db.set_or_inc(a, "f", 1)
+        self.db.set_or_inc(b, "f", 1)
+        self.assertEqual(self.db.lock("c1", a), "acquired")
+        self.assertEqual(self.db.lock("c2", b), "acquired")
+        self.assertEqual(self.db.lock("c1", b), "wait")
+        self.assertEqual(self.db.deadlocks(), [])
+        self.assertEqual(self.db.lock("c2", a), "wait")
+        self.assertEqual(self.db.deadlocks(), [["c1", "c2"]])
+        self.assertEqual(self.db.unlock(a), "released")
+        self.assertEqual(self.db.deadlocks(), [])
+
+    @timeout(2)
+    def test_sharded_case_03_concurrent_callers(self):
+        num_threads, num_keys, rounds = 8, 16, 160
+
+        def worker(caller_id):
+            for i in range(rounds):
+                key = f"k{i % num_keys}"
+                self.db.lock(caller_id, key, None)
+                self.db.set_or_inc_by_caller(key, "f", 1, caller_id)
+                self.db.unlock(key)
+
+        for i in range(num_keys):
+            self.db.set_or_inc(f"k{i}", "f", 0)
+        threads = [threading.Thread(target=worker, args=(f"c{i}",)) for i in range(num_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        total = num_threads * rounds // num_keys
+        for i in range(num_keys):
+            self.assertEqual(self.db.get(f"k{i}", "f"), total)
+        self.assertEqual(self.db.deadlocks(), [])